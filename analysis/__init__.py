@@ -0,0 +1,17 @@
+"""
+Scripts de análise estatística das sessões do HipTech
+
+Os módulos importam uns aos outros pelo nome (from session_loader import ...),
+para continuarem rodando direto da pasta (python statistical_analysis.py);
+por isso a pasta entra no sys.path quando ela é importada como pacote.
+
+Uso como pacote, a partir da pasta do projeto:
+    python -m analysis run angle emg ecg ttest --sessions 19-23 --patient 3
+"""
+
+import sys
+from pathlib import Path
+
+_ANALYSIS_DIR = str(Path(__file__).resolve().parent)
+if _ANALYSIS_DIR not in sys.path:
+    sys.path.insert(0, _ANALYSIS_DIR)
@@ -0,0 +1,52 @@
+"""
+Linha de comando única das análises
+
+    python -m analysis run [angle emg ecg ttest] [--sessions 19-23] [--patient 3]
+                           [--db ...] [--output-dir ...] [--workers N]
+                           [--no-plots] [--no-excel]
+    python -m analysis export [--db ...] [--out ...] [--sessions ...] [--overwrite]
+    python -m analysis cache [--clear] [--sessions ...]
+    python -m analysis report [--sessions 19-23] [--patient 3] [--output-dir ...] [--workers N] [--force]
+
+run carrega as sessões selecionadas uma única vez e passa os mesmos dados
+para todas as análises escolhidas. A leitura dos dados brutos é distribuída
+entre --workers processos; o padrão é o número de CPUs, o mesmo de
+batch_analysis.run_batch (--workers 1 lê tudo no processo principal).
+"""
+
+import argparse
+import sys
+
+import batch_analysis
+import feature_cache
+import report_figures
+import session_archive
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m analysis', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Executa as análises sobre as sessões selecionadas')
+    batch_analysis.add_run_arguments(run)
+    run.set_defaults(handler=batch_analysis.run_command)
+
+    export = commands.add_parser('export', help='Exporta as sessões para o arquivo em memory-map')
+    session_archive.add_export_arguments(export)
+    export.set_defaults(handler=session_archive.export_command)
+
+    cache = commands.add_parser('cache', help='Mostra ou invalida o cache de features por sessão')
+    feature_cache.add_cache_arguments(cache)
+    cache.set_defaults(handler=feature_cache.cache_command)
+
+    report = commands.add_parser('report', help='Gera as figuras das sessões e os boxplots entre sessões')
+    report_figures.add_report_arguments(report)
+    report.set_defaults(handler=report_figures.report_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
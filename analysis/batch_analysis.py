@@ -0,0 +1,299 @@
+"""
+Análise em lote de muitas sessões (histórico completo de pacientes)
+
+Seleciona as sessões (por ID, por paciente ou todas), calcula as features
+de cada canal (feature_cache.compute_features) em paralelo num
+ProcessPoolExecutor e entrega o resultado, em ordem de ID, às etapas
+estatísticas dos scripts de análise (ângulo, EMG, ECG e teste t pareado).
+Cada sessão é lida uma única vez, mesmo rodando as quatro análises, e as
+features ficam no cache em disco: numa nova execução só as sessões novas ou
+alteradas são lidas de novo.
+
+Uso:
+    python batch_analysis.py --patients 1 2 --workers 4
+    python batch_analysis.py --sessions 19-23 --patients 3
+    python batch_analysis.py                      # todas as sessões do banco
+
+(ou python -m analysis run ..., a partir da pasta do projeto)
+
+Sessões com métricas pré-calculadas pelo backend não precisam de nenhuma
+leitura dos dados brutos; só as demais são distribuídas entre os processos.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from session_loader import DEFAULT_DB_PATH, connect_readonly, load_raw_data, load_session_metrics
+from session_archive import DEFAULT_ARCHIVE_DIR, open_archive
+from feature_cache import DEFAULT_CACHE_PATH, FeatureCache, compute_features, print_report
+
+ANALYSES = ('angle', 'emg', 'ecg', 'ttest')
+# Limite de parâmetros por consulta IN (SQLite antigo aceita até 999)
+QUERY_BATCH = 500
+
+# Conexão de cada processo do pool (aberta uma vez em _init_worker)
+_worker_conn = None
+_worker_archive = None
+_worker_cache = None
+
+
+def _batches(ids):
+    for start in range(0, len(ids), QUERY_BATCH):
+        yield ids[start:start + QUERY_BATCH]
+
+
+def parse_session_ids(values):
+    """
+    IDs de sessões a partir de argumentos como '19-23', '25' ou '19,20'
+
+    Returns:
+        list: IDs em ordem crescente, sem repetição
+    """
+    ids = set()
+    for value in values:
+        for part in str(value).split(','):
+            part = part.strip()
+            if not part:
+                continue
+            first, _, last = part.partition('-')
+            if last:
+                ids.update(range(int(first), int(last) + 1))
+            else:
+                ids.add(int(first))
+    return sorted(ids)
+
+
+def select_sessions(conn, session_ids=None, patient_ids=None):
+    """
+    IDs das sessões selecionadas, em ordem crescente
+
+    Args:
+        conn: Conexão sqlite3 aberta com o clinic.db
+        session_ids: IDs de sessões
+        patient_ids: IDs de pacientes (todas as sessões deles); com session_ids,
+            só as sessões da lista que são desses pacientes
+
+    Returns:
+        list: IDs das sessões que existem no banco (todas se nada for pedido)
+    """
+    if session_ids:
+        column, values = 'id', [int(s) for s in session_ids]
+    elif patient_ids:
+        column, values = 'patient_id', [int(p) for p in patient_ids]
+    else:
+        return [row[0] for row in conn.execute("SELECT id FROM sessions ORDER BY id")]
+    patients = {int(p) for p in patient_ids or []}
+    found = set()
+    for batch in _batches(values):
+        rows = conn.execute(
+            f"SELECT id, patient_id FROM sessions WHERE {column} IN ({','.join('?' * len(batch))})", batch
+        ).fetchall()
+        found.update(session_id for session_id, patient_id in rows if not patients or patient_id in patients)
+    return sorted(found)
+
+
+def session_features(conn, session_id, archive=None, feature_cache=None):
+    """
+    Features de uma sessão calculadas dos dados brutos (no mesmo formato das
+    métricas do backend), lidas do cache de features se os dados não mudaram
+
+    Returns:
+        tuple: ({canal: {'min': ..., 'max': ..., ...}}, True se veio do cache)
+    """
+    if feature_cache is not None:
+        return feature_cache.session_features(conn, session_id, archive)
+    return compute_features(load_raw_data(conn, session_id, archive, cache=False)), False
+
+
+def _init_worker(db_path, archive_path, cache_path):
+    global _worker_conn, _worker_archive, _worker_cache
+    _worker_conn = connect_readonly(db_path)
+    _worker_archive = open_archive(archive_path)
+    _worker_cache = FeatureCache(cache_path) if cache_path else None
+
+
+def _extract(session_id):
+    return (session_id, *session_features(_worker_conn, session_id, _worker_archive, _worker_cache))
+
+
+def extract_features(db_path, session_ids, workers=None, archive_path=DEFAULT_ARCHIVE_DIR,
+                     cache_path=DEFAULT_CACHE_PATH):
+    """
+    Dados das sessões para as etapas estatísticas, no formato de
+    sessions_data dos analisadores
+
+    Args:
+        db_path: Caminho para o arquivo clinic.db
+        session_ids: IDs das sessões
+        workers: Número de processos (os.cpu_count() se None; 1 = sem pool)
+        archive_path: Pasta exportada por session_archive.py (opcional)
+        cache_path: Arquivo do cache de features (None = sempre recalcular)
+
+    Returns:
+        dict: {session_id: {'timestamp', 'duration', 'metrics', 'raw_data'}},
+        em ordem crescente de ID
+    """
+    ids = sorted(int(s) for s in session_ids)
+    conn = connect_readonly(db_path)
+    try:
+        sessions = {}
+        metrics = {}
+        for batch in _batches(ids):
+            rows = conn.execute(
+                f"SELECT id, timestamp, duration_seconds FROM sessions WHERE id IN ({','.join('?' * len(batch))}) ORDER BY id",
+                batch
+            ).fetchall()
+            for session_id, timestamp, duration in rows:
+                sessions[session_id] = {'timestamp': timestamp, 'duration': duration, 'metrics': {}, 'raw_data': None}
+            metrics.update(load_session_metrics(conn, batch))
+    finally:
+        conn.close()
+
+    for session_id, session_metrics in metrics.items():
+        if session_id in sessions:
+            sessions[session_id]['metrics'] = session_metrics
+    pending = [session_id for session_id in sessions if session_id not in metrics]
+
+    workers = workers or os.cpu_count() or 1
+    print(f"✓ {len(sessions)} sessão(ões): {len(sessions) - len(pending)} com métricas pré-calculadas, "
+          f"{len(pending)} a extrair dos dados brutos")
+    if pending:
+        if workers == 1 or len(pending) == 1:
+            conn = connect_readonly(db_path)
+            archive = open_archive(archive_path)
+            feature_cache = FeatureCache(cache_path) if cache_path else None
+            try:
+                results = [(session_id, *session_features(conn, session_id, archive, feature_cache))
+                           for session_id in pending]
+            finally:
+                conn.close()
+                if feature_cache is not None:
+                    feature_cache.close()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(db_path), archive_path, cache_path)) as executor:
+                # map devolve na ordem de pending: a saída não depende de qual processo termina antes
+                chunksize = max(1, len(pending) // (workers * 4))
+                results = list(executor.map(_extract, pending, chunksize=chunksize))
+        for session_id, features, _ in results:
+            sessions[session_id]['metrics'] = features
+        print(f"✓ Dados brutos processados ({min(workers, len(pending))} processo(s))")
+        if cache_path:
+            hits = sum(1 for _, _, hit in results if hit)
+            print_report(hits, len(results) - hits)
+    return sessions
+
+
+def run_batch(db_path, session_ids, analyses=ANALYSES, workers=None, output_dir="./",
+              archive_path=DEFAULT_ARCHIVE_DIR, cache_path=DEFAULT_CACHE_PATH, plots=True, excel=True):
+    """
+    Executa as análises escolhidas sobre as sessões, com a extração em paralelo
+
+    Os gráficos são gerados com o backend sem janela (HEADLESS_BACKEND); com
+    plots=False o matplotlib nem é importado, e com excel=False o openpyxl.
+
+    Args:
+        workers: Processos da extração; o padrão (None) é os.cpu_count(),
+            o mesmo da linha de comando (python -m analysis run); 1 = sem pool
+
+    Returns:
+        dict: {análise: analisador} com os resultados de cada análise
+    """
+    # Importados só aqui: os processos do pool só precisam do session_loader
+    from session_analyzer import HEADLESS_BACKEND
+    from statistical_analysis import AngleDeltaAnalyzer
+    from emg_analysis import EMGDeltaAnalyzer
+    from ecg_analysis import ECGDeltaAnalyzer
+    from ttest_pareado import PairedTTestAnalyzer
+    classes = {'angle': AngleDeltaAnalyzer, 'emg': EMGDeltaAnalyzer,
+               'ecg': ECGDeltaAnalyzer, 'ttest': PairedTTestAnalyzer}
+
+    print(f"\n{'='*80}")
+    print(f"EXTRAÇÃO EM LOTE - {len(session_ids)} sessão(ões)")
+    print(f"{'='*80}")
+    sessions_data = extract_features(db_path, session_ids, workers, archive_path, cache_path)
+    if not sessions_data:
+        print("✗ Nenhuma sessão encontrada")
+        return {}
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    analyzers = {}
+    for name in analyses:
+        analyzer = classes[name](db_path=db_path, archive_path=archive_path, cache_path=cache_path)
+        analyzer.sessions_data = dict(sessions_data)
+        analyzer.session_ids = list(sessions_data)
+        analyzer.plot_backend = HEADLESS_BACKEND
+        try:
+            if analyzer.analyze(output_dir, plots=plots, excel=excel) is False:
+                continue
+        except Exception as e:
+            print(f"\n✗ Erro na análise {name}: {e}")
+            continue
+        analyzers[name] = analyzer
+    return analyzers
+
+
+def add_run_arguments(parser):
+    """Opções da análise em lote (também usadas por python -m analysis run)"""
+    # Sem choices=: o argparse rejeita o padrão vazio de nargs='*' com choices
+    parser.add_argument('analyses', nargs='*', metavar='análise',
+                        help=f"Análises a executar: {', '.join(ANALYSES)} (padrão: todas)")
+    parser.add_argument('--db', default=str(DEFAULT_DB_PATH), help='Caminho para o clinic.db')
+    parser.add_argument('--sessions', nargs='+', help="IDs das sessões, ex. 19-23 25")
+    parser.add_argument('--patients', '--patient', type=int, nargs='+', help='IDs dos pacientes (todo o histórico)')
+    parser.add_argument('--workers', type=int,
+                        help='Processos para a extração (padrão: número de CPUs; 1 = sem paralelismo)')
+    parser.add_argument('--output-dir', default='./', help='Pasta dos arquivos gerados')
+    parser.add_argument('--archive', default=str(DEFAULT_ARCHIVE_DIR),
+                        help='Pasta exportada por session_archive.py (usada se existir)')
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_PATH), help='Arquivo do cache de features')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Recalcula as features de todas as sessões sem usar o cache')
+    parser.add_argument('--no-plots', action='store_true', help='Não gera os gráficos (nem importa o matplotlib)')
+    parser.add_argument('--no-excel', action='store_true', help='Exporta só os CSVs, sem os arquivos .xlsx')
+
+
+def run_command(args):
+    unknown = [name for name in args.analyses if name not in ANALYSES]
+    if unknown:
+        print(f"✗ Análise desconhecida: {', '.join(unknown)} (opções: {', '.join(ANALYSES)})")
+        return 2
+    if args.workers is not None and args.workers < 1:
+        print("✗ --workers deve ser pelo menos 1")
+        return 2
+    try:
+        session_ids = parse_session_ids(args.sessions or [])
+    except ValueError:
+        print(f"✗ IDs de sessões inválidos: {' '.join(args.sessions)}")
+        return 2
+
+    try:
+        conn = connect_readonly(args.db)
+    except FileNotFoundError as e:
+        print(f"✗ {e}")
+        return 1
+    try:
+        session_ids = select_sessions(conn, session_ids, args.patients)
+    finally:
+        conn.close()
+    if not session_ids:
+        print("✗ Nenhuma sessão encontrada para a seleção")
+        return 1
+
+    analyses = list(dict.fromkeys(args.analyses or ANALYSES))
+    cache_path = None if args.no_cache else args.cache
+    analyzers = run_batch(args.db, session_ids, analyses, args.workers, args.output_dir, args.archive, cache_path,
+                          plots=not args.no_plots, excel=not args.no_excel)
+    return 0 if len(analyzers) == len(analyses) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_run_arguments(parser)
+    return run_command(parser.parse_args())
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark do carregamento de uma sessão longa pelas análises
+
+Cria um banco temporário com uma sessão de SESSION_MINUTES minutos gravada
+nos dois formatos (JSON antigo em raw_data_blob e canais binários em
+session_channels) e mede o tempo para obter mínimo e máximo de todos os
+canais:
+
+- laço por ponto: json.loads + uma list comprehension por canal (como os
+  scripts faziam antes de session_loader.records_to_channels)
+- session_loader: load_raw_data sem cache (um único DataFrame.from_records)
+- session_loader com cache: load_raw_data de novo para a mesma sessão
+
+Uso:
+    python bench_loader.py
+"""
+
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from session_loader import connect_readonly, load_raw_data, clear_cache, channel_min_max
+
+SESSION_MINUTES = 30
+SAMPLE_RATE = 100       # pontos por segundo (ver backend/main.ALIGN_RATE)
+REPEAT = 3
+CHANNELS = ['ESQ_angle', 'ESQ_emg', 'ESQ_ecg', 'DIR_angle', 'DIR_emg', 'DIR_ecg']
+
+
+def make_session(rng):
+    """Canais sintéticos de uma sessão: {canal: np.ndarray}"""
+    n = SESSION_MINUTES * 60 * SAMPLE_RATE
+    channels = {'timestamp': 1.7e9 + np.arange(n) / SAMPLE_RATE}
+    for name in CHANNELS:
+        channels[name] = np.round(rng.normal(45, 20, n), 2)
+    return channels
+
+
+def create_db(path, channels):
+    """Sessão 1 só com o JSON antigo; sessão 2 com os mesmos dados em canais binários"""
+    n = len(channels['timestamp'])
+    records = [{name: float(values[i]) for name, values in channels.items()} for i in range(n)]
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE sessions (id INTEGER PRIMARY KEY, timestamp TEXT, duration_seconds REAL, raw_data_blob TEXT);
+        CREATE TABLE session_channels (id INTEGER PRIMARY KEY, session_id INTEGER, name TEXT, dtype TEXT,
+                                       compression TEXT, length INTEGER, data BLOB);
+        CREATE INDEX ix_session_channels_session_id ON session_channels (session_id);
+    """)
+    duration = SESSION_MINUTES * 60.0
+    conn.execute("INSERT INTO sessions VALUES (1, '2025-01-01 00:00:00', ?, ?)", (duration, json.dumps(records)))
+    conn.execute("INSERT INTO sessions VALUES (2, '2025-01-01 01:00:00', ?, NULL)", (duration,))
+    conn.executemany(
+        "INSERT INTO session_channels (session_id, name, dtype, compression, length, data) VALUES (2, ?, '<f8', 'none', ?, ?)",
+        [(name, len(values), values.astype('<f8').tobytes()) for name, values in channels.items()]
+    )
+    conn.commit()
+    conn.close()
+
+
+def per_point_loop(conn, session_id):
+    """Carregamento como era feito antes: parse do JSON e um laço por canal"""
+    row = conn.execute("SELECT raw_data_blob FROM sessions WHERE id = ?", (session_id,)).fetchone()
+    raw_data = json.loads(row[0])
+    ranges = {}
+    for name in CHANNELS:
+        values = np.array([p[name] for p in raw_data if isinstance(p, dict) and name in p], dtype=float)
+        ranges[name] = (float(np.min(values)), float(np.max(values)))
+    return ranges
+
+
+def with_loader(conn, session_id, cold=True):
+    if cold:
+        clear_cache()
+    session_data = {'metrics': {}, 'raw_data': load_raw_data(conn, session_id)}
+    return {name: channel_min_max(session_data, name) for name in CHANNELS}
+
+
+def best_ms(fn, *args, **kwargs):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times), result
+
+
+def main():
+    rng = np.random.default_rng(0)
+    channels = make_session(rng)
+    print(f"Sessão de {SESSION_MINUTES} min: {len(channels['timestamp'])} pontos x {len(channels)} canais\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'bench.db'
+        create_db(db_path, channels)
+        conn = connect_readonly(db_path)
+        try:
+            loop_ms, expected = best_ms(per_point_loop, conn, 1)
+            rows = [
+                ('JSON', 'laço por ponto', loop_ms, expected),
+                ('JSON', 'session_loader', *best_ms(with_loader, conn, 1)),
+                ('JSON', 'session_loader com cache', *best_ms(with_loader, conn, 1, cold=False)),
+                ('binário', 'session_loader', *best_ms(with_loader, conn, 2)),
+                ('binário', 'session_loader com cache', *best_ms(with_loader, conn, 2, cold=False)),
+            ]
+        finally:
+            conn.close()
+
+    print(f"{'formato':<8} | {'método':<26} | {'ms':>9} | {'speedup':>8}")
+    print("-" * 60)
+    for fmt, method, ms, result in rows:
+        status = '✓' if result == expected else '✗ resultado diferente'
+        print(f"{fmt:<8} | {method:<26} | {ms:>9.1f} | {loop_ms / ms:>7.1f}x {status}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Verificação do tempo de importação dos scripts de análise
+
+Roda python -X importtime -c "import <módulo>" num processo novo para cada
+módulo e falha se algum deles importar matplotlib, seaborn ou openpyxl: essas
+bibliotecas só devem ser carregadas ao gerar um gráfico (session_analyzer.load_pyplot)
+ou exportar um .xlsx. Também mostra o tempo acumulado de cada importação e,
+com --max-ms, falha se algum passar do limite.
+
+Uso:
+    python check_import_time.py
+    python check_import_time.py --max-ms 2500
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+MODULES = [
+    'session_loader',
+    'feature_cache',
+    'batch_analysis',
+    'session_analyzer',
+    'statistical_analysis',
+    'emg_analysis',
+    'ecg_analysis',
+    'ttest_pareado',
+    'report_figures',
+]
+LAZY_MODULES = ('matplotlib', 'seaborn', 'openpyxl')
+REPEAT = 3
+
+
+def import_time(module):
+    """
+    Importa o módulo num processo novo com -X importtime
+
+    Returns:
+        tuple: (tempo acumulado em ms, conjunto dos pacotes importados)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=Path(__file__).resolve().parent, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    cumulative = None
+    imported = set()
+    # Linhas no formato "import time: self [us] | cumulative | pacote"
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, total, name = line.split('|')
+        name = name.strip()
+        imported.add(name.split('.')[0])
+        if name == module and total.strip().isdigit():
+            cumulative = int(total) / 1000
+    return cumulative, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-ms', type=float, help='Tempo máximo de importação de cada módulo')
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'módulo':<22} | {'ms':>8} | status")
+    print("-" * 60)
+    for module in MODULES:
+        try:
+            runs = [import_time(module) for _ in range(REPEAT)]
+        except RuntimeError as e:
+            print(f"{module:<22} | {'-':>8} | ✗ erro ao importar: {e}")
+            failed = True
+            continue
+        ms = min(total for total, _ in runs)
+        heavy = sorted(set(LAZY_MODULES) & runs[0][1])
+        problems = []
+        if heavy:
+            problems.append(f"importa {', '.join(heavy)}")
+        if args.max_ms is not None and ms > args.max_ms:
+            problems.append(f"acima de {args.max_ms:.0f} ms")
+        failed = failed or bool(problems)
+        print(f"{module:<22} | {ms:>8.1f} | {'✗ ' + '; '.join(problems) if problems else '✓'}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,157 +12,23 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-import sqlite3
-import json
 import pandas as pd
 import numpy as np
 from scipy import stats
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 from datetime import datetime
 
-# Configuração de estilo para gráficos
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (14, 10)
-plt.rcParams['font.size'] = 10
+from session_analyzer import DeltaAnalyzer, load_pyplot
 
-class ECGDeltaAnalyzer:
+
+class ECGDeltaAnalyzer(DeltaAnalyzer):
     """Classe para análise de variação ECG e teste de normalidade"""
     
-    def __init__(self, db_path="../backend/clinic.db"):
-        """
-        Inicializa o analisador com caminho para o banco de dados
-        
-        Args:
-            db_path: Caminho para o arquivo clinic.db
-        """
-        self.db_path = Path(db_path)
-        self.conn = None
-        self.sessions_data = {}
-        self.deltas_esq = []
-        self.deltas_dir = []
-        self.shapiro_results = {}
-        self.descriptive_stats = {}
-        
-    def connect_db(self):
-        """Conecta ao banco de dados SQLite"""
-        try:
-            self.conn = sqlite3.connect(str(self.db_path))
-            print(f"✓ Conectado ao banco de dados: {self.db_path}")
-        except Exception as e:
-            print(f"✗ Erro ao conectar ao banco de dados: {e}")
-            raise
-    
-    def close_db(self):
-        """Fecha a conexão com o banco de dados"""
-        if self.conn:
-            self.conn.close()
-            print("✓ Conexão com banco de dados fechada")
-    
-    def extract_session_data(self, session_ids=[19, 20, 21, 22, 23]):
-        """
-        Extrai dados brutos das sessões especificadas
-        
-        Args:
-            session_ids: Lista de IDs de sessões a processar
-        """
-        print(f"\n{'='*80}")
-        print(f"EXTRAÇÃO DE DADOS - Sessões {session_ids[0]} a {session_ids[-1]}")
-        print(f"{'='*80}")
-        
-        query = f"""
-            SELECT id, timestamp, duration_seconds, raw_data_blob 
-            FROM sessions 
-            WHERE id IN ({','.join(map(str, session_ids))})
-            ORDER BY id
-        """
-        
-        try:
-            df = pd.read_sql_query(query, self.conn)
-            
-            if df.empty:
-                print(f"✗ Nenhuma sessão encontrada para IDs: {session_ids}")
-                return False
-            
-            print(f"✓ {len(df)} sessão(ões) encontrada(s)\n")
-            
-            for idx, row in df.iterrows():
-                session_id = row['id']
-                try:
-                    raw_data = json.loads(row['raw_data_blob'])
-                    self.sessions_data[session_id] = {
-                        'timestamp': row['timestamp'],
-                        'duration': row['duration_seconds'],
-                        'raw_data': raw_data
-                    }
-                    print(f"  Sessão {session_id}: ✓ Dados extraídos")
-                except json.JSONDecodeError as e:
-                    print(f"  Sessão {session_id}: ✗ Erro ao decodificar JSON: {e}")
-            
-            return True
-            
-        except Exception as e:
-            print(f"✗ Erro ao extrair dados das sessões: {e}")
-            raise
-    
-    def calculate_deltas(self):
-        """
-        Calcula a variação (delta) de ECG para cada sessão
-        Delta = ECG_máximo - ECG_mínimo
-        """
-        print(f"\n{'='*80}")
-        print(f"CÁLCULO DE VARIAÇÃO ECG (DELTA)")
-        print(f"{'='*80}\n")
-        
-        for session_id, data in sorted(self.sessions_data.items()):
-            try:
-                raw_data = data['raw_data']
-                
-                # raw_data é uma lista de dicionários com timestamps e valores
-                ecg_esq_list = []
-                ecg_dir_list = []
-                
-                if isinstance(raw_data, list):
-                    # Extrair ECG de cada ponto de dados
-                    for point in raw_data:
-                        if isinstance(point, dict):
-                            if 'ESQ_ecg' in point:
-                                ecg_esq_list.append(point['ESQ_ecg'])
-                            if 'DIR_ecg' in point:
-                                ecg_dir_list.append(point['DIR_ecg'])
-                else:
-                    # Fallback para dicionário (compatibilidade)
-                    ecg_esq_list = raw_data.get('ESQ_ecg', [])
-                    ecg_dir_list = raw_data.get('DIR_ecg', [])
-                
-                ecg_esq = np.array(ecg_esq_list)
-                ecg_dir = np.array(ecg_dir_list)
-                
-                if len(ecg_esq) == 0 or len(ecg_dir) == 0:
-                    print(f"  Sessão {session_id}: ✗ Dados de ECG incompletos")
-                    continue
-                
-                # Calcular deltas
-                delta_esq = np.max(ecg_esq) - np.min(ecg_esq)
-                delta_dir = np.max(ecg_dir) - np.min(ecg_dir)
-                
-                self.deltas_esq.append(delta_esq)
-                self.deltas_dir.append(delta_dir)
-                
-                print(f"  Sessão {session_id}:")
-                print(f"    - Perna Esquerda: ΔECG = {delta_esq:.2f} mV (Min: {np.min(ecg_esq):.2f} mV, Max: {np.max(ecg_esq):.2f} mV)")
-                print(f"    - Perna Direita:  ΔECG = {delta_dir:.2f} mV (Min: {np.min(ecg_dir):.2f} mV, Max: {np.max(ecg_dir):.2f} mV)")
-                
-            except Exception as e:
-                print(f"  Sessão {session_id}: ✗ Erro ao calcular deltas: {e}")
-        
-        if len(self.deltas_esq) == 0 or len(self.deltas_dir) == 0:
-            print("\n✗ Nenhum delta foi calculado com sucesso")
-            return False
-        
-        print(f"\n✓ Deltas calculados: {len(self.deltas_esq)} sessões processadas")
-        return True
+    CHANNEL = 'ecg'
+    SIGNAL = 'ECG'
+    TITLE = 'VARIAÇÃO ECG'
+    SYMBOL = 'ΔECG'
+    UNIT = ' mV'
     
     def shapiro_wilk_test(self):
         """
@@ -247,6 +113,8 @@ class ECGDeltaAnalyzer:
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True)
         
+        plt = load_pyplot(self.plot_backend)
+        
         # Criar figura com apenas o boxplot
         fig, ax = plt.subplots(figsize=(10, 6))
         
@@ -269,16 +137,18 @@ class ECGDeltaAnalyzer:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         plot_file = output_path / f"boxplot_deltas_ecg_{timestamp}.png"
         plt.savefig(plot_file, dpi=300, bbox_inches='tight')
+        plt.close(fig)
         print(f"✓ Gráfico salvo em: {plot_file}")
         
         return plot_file
     
-    def export_to_csv(self, output_dir="./"):
+    def export_to_csv(self, output_dir="./", excel=True):
         """
         Exporta resultados consolidados em CSV de forma clara e legível
         
         Args:
             output_dir: Diretório para salvar o arquivo CSV
+            excel: Salva também as abas em .xlsx (importa o openpyxl)
         """
         print(f"\n{'='*80}")
         print(f"EXPORTAÇÃO DE RESULTADOS")
@@ -288,7 +158,8 @@ class ECGDeltaAnalyzer:
         output_path.mkdir(exist_ok=True)
         
         # Criar múltiplos DataFrames para melhor organização
-        session_ids = sorted(self.sessions_data.keys())
+        # (só as sessões que entraram nos deltas; as incompletas ficam de fora)
+        session_ids = self.delta_sessions
         
         # DataFrame 1: Dados por sessão
         df_sessions = pd.DataFrame({
@@ -327,20 +198,21 @@ class ECGDeltaAnalyzer:
             ]
         })
         
-        # Salvar múltiplas abas em um único arquivo Excel
+        # Salvar múltiplas abas em um único arquivo Excel (se pedido)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        excel_file = output_path / f"analise_ecg_completa_{timestamp}.xlsx"
-        
-        try:
-            # Tentar salvar em Excel com múltiplas abas
-            with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-                df_sessions.to_excel(writer, sheet_name='Dados por Sessão', index=False)
-                df_stats_esq.to_excel(writer, sheet_name='Stats Esquerda', index=False)
-                df_stats_dir.to_excel(writer, sheet_name='Stats Direita', index=False)
-                df_shapiro.to_excel(writer, sheet_name='Shapiro-Wilk', index=False)
-            print(f"✓ Resultados em Excel exportados em: {excel_file}")
-        except Exception as e:
-            print(f"⚠ Aviso ao salvar Excel: {e}")
+        if excel:
+            excel_file = output_path / f"analise_ecg_completa_{timestamp}.xlsx"
+        
+            try:
+                # Tentar salvar em Excel com múltiplas abas
+                with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
+                    df_sessions.to_excel(writer, sheet_name='Dados por Sessão', index=False)
+                    df_stats_esq.to_excel(writer, sheet_name='Stats Esquerda', index=False)
+                    df_stats_dir.to_excel(writer, sheet_name='Stats Direita', index=False)
+                    df_shapiro.to_excel(writer, sheet_name='Shapiro-Wilk', index=False)
+                print(f"✓ Resultados em Excel exportados em: {excel_file}")
+            except Exception as e:
+                print(f"⚠ Aviso ao salvar Excel: {e}")
         
         # Também salvar em CSV simples e consolidado
         csv_file = output_path / f"analise_ecg_resultados_{timestamp}.csv"
@@ -416,40 +288,6 @@ class ECGDeltaAnalyzer:
         print(f"    - Distribuição: {'✓ NORMAL (p > 0.05)' if self.shapiro_results['DIR']['normal'] else '✗ NÃO NORMAL (p ≤ 0.05)'}")
         
         print(f"\n{'='*80}\n")
-    
-    def run_analysis(self, session_ids=[19, 20, 21, 22, 23], output_dir="./"):
-        """
-        Executa a análise completa
-        
-        Args:
-            session_ids: Lista de IDs de sessões a analisar
-            output_dir: Diretório para salvar arquivos de saída
-        """
-        try:
-            self.connect_db()
-            
-            # Executar todas as etapas da análise
-            if not self.extract_session_data(session_ids):
-                return False
-            
-            if not self.calculate_deltas():
-                return False
-            
-            self.shapiro_wilk_test()
-            self.calculate_descriptive_stats()
-            self.generate_plots(output_dir)
-            self.export_to_csv(output_dir)
-            self.print_summary()
-            
-            print("✓ Análise completada com sucesso!")
-            return True
-            
-        except Exception as e:
-            print(f"\n✗ Erro durante a análise: {e}")
-            return False
-        
-        finally:
-            self.close_db()
 
 
 def main():
@@ -0,0 +1,243 @@
+"""
+Cache em disco das features por sessão calculadas dos dados brutos
+
+Sessões sem métricas pré-calculadas pelo backend (bancos antigos, ainda não
+migrados) precisam ter os dados brutos lidos e decodificados a cada execução
+das análises. Este cache guarda, por sessão, as features calculadas (mínimo,
+máximo, delta, média, desvio padrão, RMS e, no EMG, a envoltória) junto com
+o hash dos dados brutos e a versão do cálculo: numa nova execução só as
+sessões novas ou alteradas são recalculadas; as demais vêm do cache e só as
+estatísticas entre sessões (baratas) são refeitas.
+
+Uso:
+    python feature_cache.py                     # resumo do cache
+    python feature_cache.py --clear             # invalida tudo
+    python feature_cache.py --clear --sessions 19 20
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from session_loader import open_raw_data
+
+# Mudar o cálculo de compute_features exige aumentar a versão: as features
+# guardadas com outra versão deixam de valer e são recalculadas
+FEATURES_VERSION = 3
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / 'cache_features.sqlite'
+TIMESTAMP_CHANNEL = 'timestamp'
+SAMPLE_RATE = 100           # Hz, se a sessão não tiver timestamps
+ENVELOPE_SECONDS = 0.1      # janela do RMS móvel da envoltória do EMG
+
+
+def _float(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def sample_rate(timestamps):
+    """
+    Taxa de amostragem (Hz) pelos timestamps da sessão, ou SAMPLE_RATE sem eles
+
+    Usa a mediana dos intervalos entre amostras: os intervalos sem dados que
+    o backend pula (MAX_GAP) não baixam a taxa, como numa média sobre a sessão.
+    """
+    if timestamps is None or len(timestamps) < 2:
+        return SAMPLE_RATE
+    steps = np.diff(np.asarray(timestamps, dtype=np.float64))
+    steps = steps[steps > 0]
+    if len(steps) == 0:
+        return SAMPLE_RATE
+    return 1.0 / float(np.median(steps))
+
+
+def compute_features(channels):
+    """
+    Features de cada canal de uma sessão, com os mesmos nomes das métricas do
+    backend (min, max, delta, mean, std, rms) mais a envoltória do EMG
+
+    Args:
+        channels: {canal: np.ndarray}, como devolvido por load_raw_data
+
+    Returns:
+        dict: {canal: {'min': ..., 'max': ..., ...}} só com os canais que têm dados
+    """
+    rate = sample_rate(channels.get(TIMESTAMP_CHANNEL))
+
+    features = {}
+    for name, values in channels.items():
+        if name == TIMESTAMP_CHANNEL:
+            continue
+        # Pontos sem valor (NaN) ficam de fora, como em channel_min_max e nas métricas do backend
+        values = np.asarray(values)
+        finite = np.isfinite(values)
+        if not finite.all():
+            values = values[finite]
+        if len(values) == 0:
+            continue
+        # Mínimo e máximo no dtype original, iguais aos de channel_min_max
+        minimum, maximum = float(np.min(values)), float(np.max(values))
+        signal = np.asarray(values, dtype=np.float64)
+        mean = signal.mean()
+        row = {
+            'count': len(signal),
+            'min': minimum,
+            'max': maximum,
+            'delta': maximum - minimum,
+            'mean': _float(mean),
+            'std': _float(signal.std(ddof=1)) if len(signal) > 1 else None,
+            'rms': _float(np.sqrt(np.mean(np.square(signal)))),
+        }
+        if name.endswith('_emg'):
+            # Envoltória: RMS móvel do sinal sem a componente contínua
+            window = min(len(signal), max(1, int(round(ENVELOPE_SECONDS * rate))))
+            envelope = np.sqrt(np.convolve(np.square(signal - mean), np.ones(window) / window, mode='valid'))
+            row['envelope_peak'] = _float(envelope.max())
+            row['envelope_mean'] = _float(envelope.mean())
+        features[name] = row
+    return features
+
+
+class FeatureCache:
+    """Features por sessão num SQLite local, válidas enquanto o hash dos dados e a versão baterem"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, version=FEATURES_VERSION):
+        self.path = Path(path)
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Vários processos do batch_analysis podem gravar ao mesmo tempo
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_features (
+                session_id INTEGER PRIMARY KEY,
+                digest TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                features TEXT NOT NULL,
+                computed_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, session_id, digest):
+        """Features guardadas da sessão, ou None se não houver ou estiverem desatualizadas"""
+        row = self.conn.execute(
+            "SELECT features FROM session_features WHERE session_id = ? AND digest = ? AND version = ?",
+            (int(session_id), digest, self.version)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id, digest, features):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO session_features (session_id, digest, version, features, computed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (int(session_id), digest, self.version, json.dumps(features), time.time())
+        )
+        self.conn.commit()
+
+    def session_features(self, conn, session_id, archive=None):
+        """
+        Features da sessão: do cache se os dados brutos não mudaram, senão
+        calculadas (e guardadas)
+
+        Args:
+            conn: Conexão sqlite3 aberta com o clinic.db
+            session_id: ID da sessão
+            archive: SessionArchive opcional (ver session_archive.open_archive)
+
+        Returns:
+            tuple: (features, True se veio do cache)
+        """
+        digest, load = open_raw_data(conn, session_id, archive, cache=False)
+        if digest is None:
+            return {}, False
+        features = self.get(session_id, digest)
+        if features is not None:
+            self.hits += 1
+            return features, True
+        features = compute_features(load())
+        self.put(session_id, digest, features)
+        self.misses += 1
+        return features, False
+
+    def invalidate(self, session_ids=None):
+        """
+        Remove features do cache
+
+        Args:
+            session_ids: IDs das sessões (todas se None)
+
+        Returns:
+            int: Número de sessões removidas
+        """
+        if session_ids is None:
+            cursor = self.conn.execute("DELETE FROM session_features")
+        else:
+            ids = [int(s) for s in session_ids]
+            cursor = self.conn.execute(
+                f"DELETE FROM session_features WHERE session_id IN ({','.join('?' * len(ids))})", ids
+            )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def info(self):
+        """{versão: número de sessões} das features guardadas"""
+        return dict(self.conn.execute(
+            "SELECT version, COUNT(*) FROM session_features GROUP BY version ORDER BY version"
+        ).fetchall())
+
+    def report(self):
+        """Imprime quantas sessões vieram do cache e quantas foram calculadas"""
+        print_report(self.hits, self.misses)
+
+
+def print_report(hits, misses):
+    if hits or misses:
+        print(f"✓ Cache de features: {hits} sessão(ões) do cache, {misses} calculada(s) dos dados brutos")
+
+
+def add_cache_arguments(parser):
+    """Opções do comando de cache (também usadas por python -m analysis cache)"""
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_PATH), help='Arquivo do cache de features')
+    parser.add_argument('--clear', action='store_true', help='Invalida as features guardadas')
+    parser.add_argument('--sessions', type=int, nargs='+', help='Só estas sessões (com --clear)')
+
+
+def cache_command(args):
+    if not Path(args.cache).exists():
+        print(f"✓ Cache vazio: {args.cache}")
+        return 0
+    cache = FeatureCache(args.cache)
+    try:
+        if args.clear:
+            removed = cache.invalidate(args.sessions)
+            print(f"✓ {removed} sessão(ões) removida(s) do cache")
+        versions = cache.info()
+        total = sum(versions.values())
+        print(f"✓ Cache {args.cache}: {total} sessão(ões)")
+        for version, count in versions.items():
+            note = '' if version == FEATURES_VERSION else ' (versão antiga, será recalculada)'
+            print(f"    - versão {version}: {count}{note}")
+    finally:
+        cache.close()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_cache_arguments(parser)
+    return cache_command(parser.parse_args())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,586 @@
+"""
+Figuras do relatório das sessões (o conjunto de GráficosColetaFinal)
+
+Para cada sessão gera as três figuras do scientific_report.ipynb:
+
+- sessao<ID>_bruto.png: ângulo, EMG e ECG brutos das duas pernas
+- sessao<ID>_EMG+ECG_filtrado.png: EMG e ECG com passa-baixa de 3 Hz
+- sessao<ID>_angulo_filtrado.png: ângulo com filtro de Kalman
+
+e, para o conjunto das sessões, os boxplots dos deltas (máximo - mínimo) de
+ângulo, EMG e ECG das duas pernas.
+
+As figuras são desenhadas em paralelo num ProcessPoolExecutor. Cada processo
+cria uma única vez cada figura (eixos, títulos, legendas, cores) e só troca
+os dados das linhas de uma sessão para a outra. O manifesto da pasta de saída
+guarda, por arquivo, o hash dos dados que o geraram: numa nova execução só as
+figuras de sessões novas ou alteradas são desenhadas de novo. Arquivos que
+já estão na pasta mas não constam do manifesto (ex. as figuras originais de
+GráficosColetaFinal) não são sobrescritos sem --force.
+
+Uso:
+    python report_figures.py --sessions 19-23 --workers 4
+    python report_figures.py --patients 3 --output-dir relatorio
+    python report_figures.py --force             # redesenha (e sobrescreve) tudo
+
+(ou python -m analysis report ..., a partir da pasta do projeto)
+"""
+
+import argparse
+import json
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from session_loader import DEFAULT_DB_PATH, connect_readonly, open_raw_data, load_raw_data, channel_delta
+from session_archive import DEFAULT_ARCHIVE_DIR, open_archive
+from feature_cache import DEFAULT_CACHE_PATH, SAMPLE_RATE, TIMESTAMP_CHANNEL, sample_rate
+from batch_analysis import extract_features, parse_session_ids, select_sessions
+
+# Mudar o desenho de alguma figura exige aumentar a versão: as figuras do
+# manifesto com outra versão são redesenhadas
+RENDER_VERSION = 2
+# Fora do git: GráficosColetaFinal/ só é usada se pedida com --output-dir
+DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent / 'relatorio_figuras'
+MANIFEST_FILE = 'manifesto_figuras.json'
+SESSION_DPI = 100
+BOXPLOT_DPI = 300
+
+FILTER_ORDER = 4
+FILTER_CUTOFF = 3           # Hz, envoltória suave do EMG/ECG
+KALMAN_Q = 1e-5             # covariância do ruído do processo
+KALMAN_R = 0.01             # covariância do ruído da medição
+TIME_STEP = 0.1             # s por ponto, se a sessão não tiver duração
+
+# Perna: (legenda, estilo da linha); cores do dashboard: (esquerda, direita)
+LEGS = {'ESQ': ('Esq (Parética)', '--'), 'DIR': ('Dir (Controle)', '-')}
+COLORS = {
+    'angle': {'ESQ': '#a78bfa', 'DIR': '#7c3aed'},
+    'emg': {'ESQ': '#60a5fa', 'DIR': '#1e40af'},
+    'ecg': {'ESQ': '#fbbf24', 'DIR': '#ea580c'},
+}
+SESSION_FIGURES = ('bruto', 'EMG+ECG_filtrado', 'angulo_filtrado')
+
+# Canal: (arquivo, rótulo do eixo, título), como nos scripts de análise
+BOXPLOTS = {
+    'angle': ('boxplot_deltas_angulares.png', 'Variação Angular (°)', 'Boxplot: Distribuição de Deltas Angulares'),
+    'emg': ('boxplot_deltas_emg.png', 'Variação EMG (µV)', 'Boxplot: Distribuição de Deltas EMG'),
+    'ecg': ('boxplot_deltas_ecg.png', 'Variação ECG (mV)', 'Boxplot: Distribuição de Deltas ECG'),
+}
+
+# Estado de cada processo (aberto uma vez em _init_worker)
+_worker_conn = None
+_worker_archive = None
+_worker_plt = None
+_templates = {}
+
+
+def session_files(session_id):
+    """Nomes dos arquivos das figuras de uma sessão"""
+    return [f"sessao{session_id}_{kind}.png" for kind in SESSION_FIGURES]
+
+
+def lowpass(values, fs, cutoff=FILTER_CUTOFF):
+    """
+    Butterworth passa-baixa de fase zero (filtfilt), como no notebook
+
+    Returns:
+        np.ndarray: Sinal filtrado, ou o próprio sinal se for curto demais ou
+        se o corte não couber abaixo da frequência de Nyquist
+    """
+    from scipy.signal import butter, filtfilt
+    if cutoff >= fs / 2:
+        return values
+    b, a = butter(FILTER_ORDER, cutoff, btype='low', fs=fs)
+    if len(values) <= 3 * max(len(a), len(b)):
+        return values
+    return filtfilt(b, a, values)
+
+
+def kalman_1d(values, q=KALMAN_Q, r=KALMAN_R):
+    """
+    Filtro de Kalman 1D simples (estado constante + ruído), como no notebook
+
+    Args:
+        values: Medidas (sinal ruidoso)
+        q: Covariância do ruído do processo (confiança na previsão)
+        r: Covariância do ruído da medição (confiança na medida)
+    """
+    estimate = np.empty(len(values))
+    if len(values) == 0:
+        return estimate
+    x, p = float(values[0]), 1.0
+    estimate[0] = x
+    for k, measured in enumerate(values[1:].tolist(), start=1):
+        p += q
+        gain = p / (p + r)
+        x += gain * (measured - x)
+        p *= 1 - gain
+        estimate[k] = x
+    return estimate
+
+
+def session_series(channels, duration):
+    """
+    Séries (tempo, valores) de cada figura de uma sessão
+
+    Args:
+        channels: {canal: np.ndarray}, como devolvido por load_raw_data
+        duration: Duração da sessão em segundos (distribui os pontos no tempo
+            nas sessões antigas, sem o canal de timestamps)
+
+    Returns:
+        dict: {figura: {série: (tempo, valores)}}, sem as séries sem dados
+    """
+    series = {kind: {} for kind in SESSION_FIGURES}
+    timestamps = channels.get(TIMESTAMP_CHANNEL)
+    if timestamps is not None:
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+    for leg in LEGS:
+        for channel in COLORS:
+            values = np.asarray(channels.get(f'{leg}_{channel}', ()), dtype=np.float64)
+            if len(values) == 0:
+                continue
+            if timestamps is not None and len(timestamps) == len(values):
+                # Tempo real das amostras: intervalos sem dados (MAX_GAP do backend) não são esticados
+                seconds = timestamps - timestamps[0]
+                fs = sample_rate(timestamps)
+            elif duration and duration > 0:
+                seconds = np.linspace(0, duration, len(values))
+                fs = (len(values) - 1) / duration if len(values) > 1 else SAMPLE_RATE
+            else:
+                seconds = np.arange(len(values)) * TIME_STEP
+                fs = SAMPLE_RATE
+            # Pontos sem valor (NaN) ficam de fora: os filtros não os aceitam
+            finite = np.isfinite(values)
+            if not finite.all():
+                seconds, values = seconds[finite], values[finite]
+                if len(values) == 0:
+                    continue
+            name = f'{leg}_{channel}'
+            series['bruto'][name] = (seconds, values)
+            if channel == 'angle':
+                series['angulo_filtrado'][name] = (seconds, kalman_1d(values))
+            else:
+                series['EMG+ECG_filtrado'][name] = (seconds, lowpass(values, fs))
+    return series
+
+
+class FigureTemplate:
+    """Figura desenhada uma vez; a cada sessão só os dados e os títulos mudam"""
+
+    def __init__(self, fig, axes, titles, lines):
+        """
+        Args:
+            fig: Figura do matplotlib
+            axes: Eixos, na ordem de titles
+            titles: Título de cada eixo (pode ter {session_id})
+            lines: {série: (eixo, Line2D)}
+        """
+        self.fig = fig
+        self.axes = axes
+        self.titles = titles
+        self.lines = lines
+
+    def render(self, series, path, dpi, session_id=None):
+        for name, (ax, line) in self.lines.items():
+            if name in series:
+                line.set_data(*series[name])
+                line.set_visible(True)
+            else:
+                line.set_data([], [])
+                line.set_visible(False)
+        for ax, title in zip(self.axes, self.titles):
+            ax.set_title(title.format(session_id=session_id), fontsize=14)
+            ax.relim(visible_only=True)
+            # Eixos com limite fixo (ângulo de 0 a 180°) só reescalam no tempo
+            ax.autoscale_view(scaley=ax.get_autoscaley_on())
+            handles = [line for axis, line in self.lines.values() if axis is ax and line.get_visible()]
+            if handles:
+                ax.legend(handles=handles, loc='upper right')
+            elif ax.get_legend() is not None:
+                ax.get_legend().remove()
+        self.fig.savefig(path, dpi=dpi)
+
+
+def _line(ax, leg, channel, linewidth, label=None):
+    default_label, style = LEGS[leg]
+    line, = ax.plot([], [], label=label or default_label, color=COLORS[channel][leg],
+                    linestyle=style, linewidth=linewidth)
+    return ax, line
+
+
+def _raw_template(plt):
+    fig, axes = plt.subplots(3, 1, figsize=(14, 14), layout='constrained')
+    fig.get_layout_engine().set(hspace=0.08)
+    labels = {'angle': 'Ângulo (°)', 'emg': 'Sinal (0-4095)', 'ecg': 'Sinal (0-4095)'}
+    lines = {}
+    for ax, channel in zip(axes, COLORS):
+        for leg in LEGS:
+            lines[f'{leg}_{channel}'] = _line(ax, leg, channel, 2 if channel == 'angle' else 1.5)
+        ax.set_ylabel(labels[channel], fontsize=12)
+        ax.set_xlabel('Tempo (segundos)', fontsize=12)
+        ax.grid(True, linestyle='--', alpha=0.6)
+    axes[0].set_ylim(0, 180)
+    titles = [
+        'Ângulo da Flexão do Quadril x Tempo - Sessão {session_id}',
+        'Sinal EMG bruto (Reto Femoral) x tempo - Sessão {session_id}',
+        'Sinal ECG bruto (Isquiotibial) x tempo - Sessão {session_id}',
+    ]
+    return FigureTemplate(fig, axes, titles, lines)
+
+
+def _filtered_template(plt):
+    fig, axes = plt.subplots(2, 1, sharex=True, figsize=(14, 10), layout='constrained')
+    fig.get_layout_engine().set(hspace=0.08)
+    lines = {}
+    for ax, channel in zip(axes, ('emg', 'ecg')):
+        for leg in LEGS:
+            lines[f'{leg}_{channel}'] = _line(ax, leg, channel, 2)
+        ax.set_ylabel('Amplitude (u.a.)')
+        ax.grid(True, linestyle='--', alpha=0.6)
+    axes[-1].set_xlabel('Tempo (s)')
+    titles = [
+        f'Ativação Muscular - Reto Femoral (EMG) - Filtrado ({FILTER_CUTOFF}Hz)',
+        f'Ativação Muscular - Isquiotibial (ECG) - Filtrado ({FILTER_CUTOFF}Hz)',
+    ]
+    return FigureTemplate(fig, axes, titles, lines)
+
+
+def _angle_template(plt):
+    fig, ax = plt.subplots(figsize=(14, 6), layout='constrained')
+    lines = {
+        'DIR_angle': _line(ax, 'DIR', 'angle', 2.5, label='Dir (Kalman)'),
+        'ESQ_angle': _line(ax, 'ESQ', 'angle', 2.5, label='Esq (Kalman)'),
+    }
+    ax.set_xlabel('Tempo (s)')
+    ax.set_ylabel('Ângulo (°)')
+    ax.grid(True, linestyle='--', alpha=0.6)
+    ax.set_ylim(0, 180)
+    titles = ['Cinemática Avançada: Ângulo da Flexão do Quadril - Filtro de Kalman']
+    return FigureTemplate(fig, [ax], titles, lines)
+
+
+def _boxplot_template(plt):
+    fig, ax = plt.subplots(figsize=(10, 6), layout='constrained')
+    ax.set_xlabel('Pernas', fontsize=12, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+    return fig, ax, {}
+
+
+TEMPLATES = {
+    'bruto': _raw_template,
+    'EMG+ECG_filtrado': _filtered_template,
+    'angulo_filtrado': _angle_template,
+    'boxplot': _boxplot_template,
+}
+
+
+def _template(kind):
+    if kind not in _templates:
+        _templates[kind] = TEMPLATES[kind](_worker_plt)
+    return _templates[kind]
+
+
+def session_key(conn, session_id, duration, dpi=SESSION_DPI, archive=None):
+    """
+    Chave do manifesto para as figuras de uma sessão: muda se os dados
+    brutos, a duração, a resolução ou RENDER_VERSION mudarem
+
+    Só o hash dos dados é calculado (open_raw_data), sem decodificá-los; para
+    sessões no arquivo (archive) vale o hash gravado na exportação.
+
+    Returns:
+        str: Chave, ou None se a sessão não tiver dados brutos
+    """
+    digest, _ = open_raw_data(conn, session_id, archive, cache=False)
+    if digest is None:
+        return None
+    return f"{RENDER_VERSION}:{dpi}:{digest}:{duration}"
+
+
+def render_session(session_id, duration, output_dir, dpi=SESSION_DPI):
+    """
+    Desenha as três figuras de uma sessão (no processo atual, ver _init_worker)
+
+    Args:
+        session_id: ID da sessão
+        duration: Duração da sessão em segundos
+        output_dir: Pasta das figuras
+        dpi: Resolução das figuras
+    """
+    channels = load_raw_data(_worker_conn, session_id, _worker_archive, cache=False)
+    series = session_series(channels, duration)
+    for kind, name in zip(SESSION_FIGURES, session_files(session_id)):
+        _template(kind).render(series[kind], Path(output_dir) / name, dpi, session_id)
+
+
+def render_boxplot(channel, deltas_esq, deltas_dir, output_dir, dpi=BOXPLOT_DPI):
+    """Boxplot dos deltas das duas pernas, igual ao dos scripts de análise"""
+    fig, ax, artists = _template('boxplot')
+    for items in artists.values():
+        for artist in items:
+            artist.remove()
+    ax.ignore_existing_data_limits = True
+
+    file_name, ylabel, title = BOXPLOTS[channel]
+    bp = ax.boxplot([deltas_esq, deltas_dir], tick_labels=['Perna Esquerda\n(Parética)', 'Perna Direita\n(Controle)'],
+                    patch_artist=True, widths=0.6)
+    for patch, color in zip(bp['boxes'], ['#FF6B6B', '#4ECDC4']):
+        patch.set_facecolor(color)
+        patch.set_alpha(0.7)
+    artists.clear()
+    artists.update(bp)
+
+    ax.set_ylabel(ylabel, fontsize=12, fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    fig.savefig(Path(output_dir) / file_name, dpi=dpi)
+
+
+def session_deltas(sessions, channel):
+    """
+    Deltas das duas pernas por sessão, só das sessões com as duas pernas
+
+    Args:
+        sessions: sessions_data ({session_id: {'metrics': ..., 'raw_data': ...}})
+        channel: Sufixo do canal: 'angle', 'emg' ou 'ecg'
+
+    Returns:
+        dict: {session_id: (delta_esq, delta_dir)}, em ordem de ID
+    """
+    deltas = {}
+    for session_id, data in sessions.items():
+        try:
+            delta_esq = channel_delta(data, f'ESQ_{channel}')
+            delta_dir = channel_delta(data, f'DIR_{channel}')
+        except Exception as e:
+            print(f"  Sessão {session_id}: ✗ Erro ao calcular deltas de {channel}: {e}")
+            continue
+        if not np.isnan(delta_esq) and not np.isnan(delta_dir):
+            deltas[session_id] = (float(delta_esq), float(delta_dir))
+    return deltas
+
+
+def boxplot_key(session_ids, deltas_esq, deltas_dir, dpi=BOXPLOT_DPI):
+    payload = json.dumps([session_ids, deltas_esq, deltas_dir]).encode()
+    return f"{RENDER_VERSION}:{dpi}:{zlib.crc32(payload):08x}"
+
+
+def _init_worker(db_path, archive_path):
+    global _worker_conn, _worker_archive, _worker_plt
+    from session_analyzer import HEADLESS_BACKEND, load_pyplot
+    _worker_conn = connect_readonly(db_path)
+    _worker_archive = open_archive(archive_path)
+    _worker_plt = load_pyplot(HEADLESS_BACKEND)
+
+
+def _close_worker():
+    global _worker_conn
+    _worker_plt.close('all')
+    _templates.clear()
+    if _worker_conn is not None:
+        _worker_conn.close()
+        _worker_conn = None
+
+
+def _render(task):
+    kind, *args = task
+    try:
+        if kind == 'session':
+            render_session(*args)
+        else:
+            render_boxplot(*args)
+    except Exception as e:
+        return task, str(e)
+    return task, None
+
+
+def _read_manifest(output_dir):
+    path = Path(output_dir) / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except ValueError:
+        return {}
+
+
+def _write_manifest(output_dir, manifest):
+    path = Path(output_dir) / MANIFEST_FILE
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    tmp.replace(path)
+
+
+def render_report(db_path, session_ids, output_dir=DEFAULT_OUTPUT_DIR, workers=None,
+                  archive_path=DEFAULT_ARCHIVE_DIR, cache_path=DEFAULT_CACHE_PATH,
+                  boxplots=True, force=False):
+    """
+    Gera as figuras das sessões e os boxplots entre sessões
+
+    Args:
+        db_path: Caminho para o arquivo clinic.db
+        session_ids: IDs das sessões
+        output_dir: Pasta das figuras (e do manifesto)
+        workers: Número de processos (os.cpu_count() se None; 1 = sem pool)
+        archive_path: Pasta exportada por session_archive.py (opcional)
+        cache_path: Arquivo do cache de features, usado nos deltas dos boxplots
+        boxplots: Gera também os boxplots dos deltas
+        force: Redesenha todas as figuras, mesmo sem alterações nos dados, e
+            sobrescreve arquivos que não estão no manifesto
+
+    Returns:
+        dict: {'rendered': [...], 'skipped': [...], 'kept': [...], 'failed': [...]}
+        com os nomes dos arquivos ('kept': já existiam fora do manifesto)
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    manifest = {} if force else _read_manifest(output_path)
+    sessions = extract_features(db_path, session_ids, workers, archive_path, cache_path)
+
+    print(f"\n{'='*80}")
+    print(f"GERAÇÃO DE FIGURAS - {len(sessions)} sessão(ões)")
+    print(f"{'='*80}\n")
+
+    result = {'rendered': [], 'skipped': [], 'kept': [], 'failed': []}
+
+    def foreign(files):
+        # Arquivos existentes que este script não gerou: preservados sem --force
+        found = [name for name in files if name not in manifest and (output_path / name).exists()]
+        if found and not force:
+            print(f"  {', '.join(found)}: ⚠ já existe(m) fora do manifesto, mantido(s) (use --force para sobrescrever)")
+            result['kept'].extend(files)
+            return True
+        return False
+
+    keys = {}
+    tasks = []
+    # Só os hashes dos dados brutos: as sessões sem alterações nem chegam aos processos
+    conn = connect_readonly(db_path)
+    archive = open_archive(archive_path)
+    try:
+        for session_id, data in sessions.items():
+            files = session_files(session_id)
+            key = session_key(conn, session_id, data['duration'], archive=archive)
+            if key is None:
+                print(f"  Sessão {session_id}: ✗ Sem dados brutos")
+            elif manifest.get(files[0]) == key and all((output_path / name).exists() for name in files):
+                print(f"  Sessão {session_id}: ✓ sem alterações")
+                result['skipped'].extend(files)
+            elif not foreign(files):
+                keys.update(dict.fromkeys(files, key))
+                tasks.append(('session', session_id, data['duration'], str(output_path), SESSION_DPI))
+    finally:
+        conn.close()
+
+    if boxplots:
+        for channel, (file_name, _, _) in BOXPLOTS.items():
+            deltas = session_deltas(sessions, channel)
+            if not deltas:
+                continue
+            deltas_esq = [left for left, _ in deltas.values()]
+            deltas_dir = [right for _, right in deltas.values()]
+            key = boxplot_key(list(deltas), deltas_esq, deltas_dir)
+            if manifest.get(file_name) == key and (output_path / file_name).exists():
+                print(f"  {file_name}: ✓ sem alterações")
+                result['skipped'].append(file_name)
+                continue
+            if foreign([file_name]):
+                continue
+            keys[file_name] = key
+            tasks.append(('boxplot', channel, deltas_esq, deltas_dir, str(output_path), BOXPLOT_DPI))
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    if not tasks:
+        results = []
+    elif workers == 1:
+        _init_worker(str(db_path), archive_path)
+        try:
+            results = [_render(task) for task in tasks]
+        finally:
+            _close_worker()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(db_path), archive_path)) as executor:
+            # Uma sessão por tarefa: as figuras de cada processo reaproveitam os mesmos templates
+            results = list(executor.map(_render, tasks))
+
+    for task, error in results:
+        if task[0] == 'session':
+            label, files = f"Sessão {task[1]}", session_files(task[1])
+        else:
+            label, files = BOXPLOTS[task[1]][0], [BOXPLOTS[task[1]][0]]
+        if error:
+            print(f"  {label}: ✗ Erro ao gerar figuras: {error}")
+            result['failed'].extend(files)
+            continue
+        print(f"  {label}: ✓ {len(files)} figura(s) gerada(s)")
+        manifest.update({name: keys[name] for name in files})
+        result['rendered'].extend(files)
+    _write_manifest(output_path, manifest)
+
+    processes = f" ({workers} processo(s))" if tasks else ''
+    kept = f", {len(result['kept'])} mantida(s)" if result['kept'] else ''
+    print(f"\n✓ {len(result['rendered'])} figura(s) gerada(s){processes}, {len(result['skipped'])} sem alterações"
+          f"{kept}: {output_path}")
+    return result
+
+
+def add_report_arguments(parser):
+    """Opções do gerador de figuras (também usadas por python -m analysis report)"""
+    parser.add_argument('--db', default=str(DEFAULT_DB_PATH), help='Caminho para o clinic.db')
+    parser.add_argument('--sessions', nargs='+', help="IDs das sessões, ex. 19-23 25")
+    parser.add_argument('--patients', '--patient', type=int, nargs='+', help='IDs dos pacientes (todo o histórico)')
+    parser.add_argument('--workers', type=int, help='Processos para desenhar as figuras (padrão: número de CPUs)')
+    parser.add_argument('--output-dir', default=str(DEFAULT_OUTPUT_DIR), help='Pasta das figuras')
+    parser.add_argument('--archive', default=str(DEFAULT_ARCHIVE_DIR),
+                        help='Pasta exportada por session_archive.py (usada se existir)')
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE_PATH), help='Arquivo do cache de features')
+    parser.add_argument('--no-cache', action='store_true', help='Recalcula as features sem usar o cache')
+    parser.add_argument('--no-boxplots', action='store_true', help='Só as figuras por sessão')
+    parser.add_argument('--force', action='store_true',
+                        help='Redesenha todas as figuras, mesmo sem alterações, e sobrescreve as que não estão no manifesto')
+
+
+def report_command(args):
+    if args.workers is not None and args.workers < 1:
+        print("✗ --workers deve ser pelo menos 1")
+        return 2
+    try:
+        session_ids = parse_session_ids(args.sessions or [])
+    except ValueError:
+        print(f"✗ IDs de sessões inválidos: {' '.join(args.sessions)}")
+        return 2
+
+    try:
+        conn = connect_readonly(args.db)
+    except FileNotFoundError as e:
+        print(f"✗ {e}")
+        return 1
+    try:
+        session_ids = select_sessions(conn, session_ids, args.patients)
+    finally:
+        conn.close()
+    if not session_ids:
+        print("✗ Nenhuma sessão encontrada para a seleção")
+        return 1
+
+    cache_path = None if args.no_cache else args.cache
+    result = render_report(args.db, session_ids, args.output_dir, args.workers, args.archive, cache_path,
+                           boxplots=not args.no_boxplots, force=args.force)
+    return 1 if result['failed'] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_report_arguments(parser)
+    return report_command(parser.parse_args())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Base comum dos scripts de análise
+
+Conexão com o banco, extração das sessões (session_loader.load_sessions) e
+cálculo dos deltas (máximo - mínimo) das duas pernas, que antes eram
+copiados em statistical_analysis.py, emg_analysis.py, ecg_analysis.py e
+ttest_pareado.py.
+
+matplotlib e seaborn só são importados por load_pyplot, na hora de gerar o
+primeiro gráfico: quem só precisa dos números (ttest_pareado.py, --no-plots,
+os processos do batch_analysis.py) não paga a importação.
+"""
+
+from pathlib import Path
+
+from session_loader import connect_readonly, load_sessions, channel_min_max
+from session_archive import DEFAULT_ARCHIVE_DIR, open_archive
+from feature_cache import DEFAULT_CACHE_PATH, FeatureCache
+
+# Backend sem janela, para gerar os PNGs em lote ou num servidor sem display
+HEADLESS_BACKEND = 'Agg'
+
+_style_applied = False
+
+
+def load_pyplot(backend=None):
+    """
+    Importa matplotlib.pyplot e aplica o estilo dos gráficos (uma vez)
+
+    Args:
+        backend: Backend do matplotlib a forçar antes de importar o pyplot,
+            ex. HEADLESS_BACKEND (None = o padrão do matplotlib)
+
+    Returns:
+        module: matplotlib.pyplot
+    """
+    global _style_applied
+    import matplotlib
+    if backend is not None:
+        matplotlib.use(backend)
+    import matplotlib.pyplot as plt
+    if not _style_applied:
+        import seaborn as sns
+        sns.set_style("whitegrid")
+        plt.rcParams['figure.figsize'] = (14, 10)
+        plt.rcParams['font.size'] = 10
+        _style_applied = True
+    return plt
+
+
+class SessionAnalyzer:
+    """Classe base: banco de dados e dados das sessões"""
+
+    def __init__(self, db_path="../backend/clinic.db", archive_path=DEFAULT_ARCHIVE_DIR,
+                 cache_path=DEFAULT_CACHE_PATH):
+        """
+        Inicializa o analisador com caminho para o banco de dados
+
+        Args:
+            db_path: Caminho para o arquivo clinic.db
+            archive_path: Pasta exportada por session_archive.py; usada para os
+                dados brutos das sessões que estiverem nela (ignorada se não existir)
+            cache_path: Arquivo do cache de features (feature_cache.py), ou None
+                para sempre recalcular a partir dos dados brutos
+        """
+        self.db_path = Path(db_path)
+        self.archive_path = archive_path
+        self.cache_path = cache_path
+        self.conn = None
+        self.archive = None
+        self.feature_cache = None
+        self.sessions_data = {}
+        # Backend do matplotlib para os gráficos (ver load_pyplot)
+        self.plot_backend = None
+
+    def connect_db(self):
+        """Conecta ao banco de dados SQLite (somente leitura)"""
+        try:
+            self.conn = connect_readonly(self.db_path)
+            print(f"✓ Conectado ao banco de dados: {self.db_path}")
+            self.archive = open_archive(self.archive_path)
+            if self.archive is not None:
+                print(f"✓ Arquivo de sessões (memory-map): {self.archive_path}")
+            if self.cache_path is not None:
+                self.feature_cache = FeatureCache(self.cache_path)
+        except Exception as e:
+            print(f"✗ Erro ao conectar ao banco de dados: {e}")
+            raise
+
+    def close_db(self):
+        """Fecha a conexão com o banco de dados"""
+        if self.feature_cache:
+            self.feature_cache.close()
+            self.feature_cache = None
+        if self.conn:
+            self.conn.close()
+            print("✓ Conexão com banco de dados fechada")
+
+    def extract_session_data(self, session_ids=[19, 20, 21, 22, 23]):
+        """
+        Extrai dados das sessões especificadas
+
+        Args:
+            session_ids: Lista de IDs de sessões a processar
+        """
+        print(f"\n{'='*80}")
+        print(f"EXTRAÇÃO DE DADOS - Sessões {session_ids[0]} a {session_ids[-1]}")
+        print(f"{'='*80}")
+
+        try:
+            sessions = load_sessions(self.conn, session_ids, self.archive, self.feature_cache)
+        except Exception as e:
+            print(f"✗ Erro ao extrair dados das sessões: {e}")
+            raise
+
+        if not sessions:
+            print(f"✗ Nenhuma sessão encontrada para IDs: {session_ids}")
+            return False
+        if self.feature_cache is not None:
+            self.feature_cache.report()
+
+        self.sessions_data.update(sessions)
+        return True
+
+
+class DeltaAnalyzer(SessionAnalyzer):
+    """
+    Classe base das análises de variação (delta max-min) de um sinal entre
+    as pernas esquerda e direita; as subclasses definem o sinal e as unidades
+    """
+
+    CHANNEL = None      # sufixo do canal: 'angle', 'emg' ou 'ecg'
+    SIGNAL = None       # nome do sinal nas mensagens, ex. 'ângulo'
+    TITLE = None        # ex. 'VARIAÇÃO ANGULAR'
+    SYMBOL = None       # ex. 'ΔAngle'
+    UNIT = None         # ex. '°' ou ' µV' (com o espaço, se houver)
+
+    def __init__(self, db_path="../backend/clinic.db", archive_path=DEFAULT_ARCHIVE_DIR,
+                 cache_path=DEFAULT_CACHE_PATH):
+        super().__init__(db_path, archive_path, cache_path)
+        self.deltas_esq = []
+        self.deltas_dir = []
+        self.delta_sessions = []
+        self.shapiro_results = {}
+        self.descriptive_stats = {}
+
+    def calculate_deltas(self):
+        """
+        Calcula a variação (delta) do sinal para cada sessão
+        Delta = máximo - mínimo
+        """
+        print(f"\n{'='*80}")
+        print(f"CÁLCULO DE {self.TITLE} (DELTA)")
+        print(f"{'='*80}\n")
+
+        unit = self.UNIT
+        for session_id, data in sorted(self.sessions_data.items()):
+            try:
+                # Mínimo e máximo lidos das métricas pré-calculadas da sessão
+                # (ou calculados dos dados brutos em sessões sem métricas)
+                range_esq = channel_min_max(data, f'ESQ_{self.CHANNEL}')
+                range_dir = channel_min_max(data, f'DIR_{self.CHANNEL}')
+
+                if range_esq is None or range_dir is None:
+                    print(f"  Sessão {session_id}: ✗ Dados de {self.SIGNAL} incompletos")
+                    continue
+
+                min_esq, max_esq = range_esq
+                min_dir, max_dir = range_dir
+
+                # Calcular deltas
+                delta_esq = max_esq - min_esq
+                delta_dir = max_dir - min_dir
+
+                self.deltas_esq.append(delta_esq)
+                self.deltas_dir.append(delta_dir)
+                self.delta_sessions.append(session_id)
+
+                print(f"  Sessão {session_id}:")
+                print(f"    - Perna Esquerda: {self.SYMBOL} = {delta_esq:.2f}{unit} (Min: {min_esq:.2f}{unit}, Max: {max_esq:.2f}{unit})")
+                print(f"    - Perna Direita:  {self.SYMBOL} = {delta_dir:.2f}{unit} (Min: {min_dir:.2f}{unit}, Max: {max_dir:.2f}{unit})")
+
+            except Exception as e:
+                print(f"  Sessão {session_id}: ✗ Erro ao calcular deltas: {e}")
+
+        if len(self.deltas_esq) == 0 or len(self.deltas_dir) == 0:
+            print("\n✗ Nenhum delta foi calculado com sucesso")
+            return False
+
+        print(f"\n✓ Deltas calculados: {len(self.deltas_esq)} sessões processadas")
+        return True
+
+    def analyze(self, output_dir="./", plots=True, excel=True):
+        """
+        Etapas da análise a partir de sessions_data já preenchido (por
+        extract_session_data ou pelo batch_analysis.py)
+
+        Args:
+            output_dir: Diretório para salvar arquivos de saída
+            plots: Gera o boxplot (False = sem importar matplotlib)
+            excel: Exporta também o .xlsx (False = só o CSV)
+        """
+        if not self.calculate_deltas():
+            return False
+
+        self.shapiro_wilk_test()
+        self.calculate_descriptive_stats()
+        if plots:
+            self.generate_plots(output_dir)
+        self.export_to_csv(output_dir, excel=excel)
+        self.print_summary()
+
+        print("✓ Análise completada com sucesso!")
+        return True
+
+    def run_analysis(self, session_ids=[19, 20, 21, 22, 23], output_dir="./", plots=True, excel=True):
+        """
+        Executa a análise completa
+
+        Args:
+            session_ids: Lista de IDs de sessões a analisar
+            output_dir: Diretório para salvar arquivos de saída
+            plots: Gera o boxplot
+            excel: Exporta também o .xlsx
+        """
+        try:
+            self.connect_db()
+
+            # Executar todas as etapas da análise
+            if not self.extract_session_data(session_ids):
+                return False
+
+            return self.analyze(output_dir, plots, excel)
+
+        except Exception as e:
+            print(f"\n✗ Erro durante a análise: {e}")
+            return False
+
+        finally:
+            self.close_db()
@@ -0,0 +1,194 @@
+"""
+Arquivo colunar das sessões em disco, lido com memory-map
+
+Exporta os dados brutos das sessões do clinic.db para uma pasta com um
+arquivo .npy por canal de cada sessão (no mesmo dtype gravado pelo backend,
+para que as análises deem exatamente os mesmos números) e um index.json.
+
+As análises abrem os canais com np.load(mmap_mode='r'). Nada é decodificado
+nem copiado para a memória até ser lido, então analisar centenas de sessões
+não custa tempo de parse nem RAM proporcional ao total.
+
+Uso:
+    python session_archive.py [--db ../backend/clinic.db] [--out sessoes_arquivo] [--sessions 19 20 21] [--overwrite]
+
+A exportação é incremental: sessões que já estão no arquivo são puladas
+(a não ser com --overwrite), pois sessões salvas não mudam.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from session_loader import DEFAULT_DB_PATH, connect_readonly, open_raw_data
+
+INDEX_FILE = 'index.json'
+ARCHIVE_VERSION = 1
+DEFAULT_ARCHIVE_DIR = Path(__file__).resolve().parent / 'sessoes_arquivo'
+
+
+def _write_session(out_dir, session_id, channels):
+    """Grava os canais numa pasta temporária e a renomeia no fim (nunca fica pela metade)"""
+    final_dir = out_dir / f'session_{session_id}'
+    tmp_dir = out_dir / f'session_{session_id}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    entries = {}
+    for name, values in channels.items():
+        array = np.ascontiguousarray(values)
+        dtype = array.dtype.newbyteorder('<').str
+        array = array.astype(dtype, copy=False)
+        filename = f'{name}.npy'
+        np.save(tmp_dir / filename, array)
+        entries[name] = {'file': f'{final_dir.name}/{filename}', 'dtype': dtype, 'length': int(len(array))}
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.replace(tmp_dir, final_dir)
+    return entries
+
+
+def _read_index(out_dir):
+    path = Path(out_dir) / INDEX_FILE
+    if not path.exists():
+        return {'version': ARCHIVE_VERSION, 'sessions': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_index(out_dir, index):
+    path = Path(out_dir) / INDEX_FILE
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, path)
+
+
+def export_sessions(db_path, out_dir=DEFAULT_ARCHIVE_DIR, session_ids=None, overwrite=False):
+    """
+    Exporta sessões do banco para o arquivo em disco
+
+    Args:
+        db_path: Caminho para o arquivo clinic.db
+        out_dir: Pasta do arquivo (criada se não existir)
+        session_ids: IDs a exportar (todas as sessões se None)
+        overwrite: Reexportar sessões que já estão no arquivo
+
+    Returns:
+        list: IDs das sessões exportadas nesta execução
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    index = _read_index(out_dir)
+    exported = []
+    conn = connect_readonly(db_path)
+    try:
+        if session_ids is None:
+            rows = conn.execute("SELECT id, timestamp, duration_seconds FROM sessions ORDER BY id").fetchall()
+        else:
+            ids = [int(s) for s in session_ids]
+            rows = conn.execute(
+                f"SELECT id, timestamp, duration_seconds FROM sessions WHERE id IN ({','.join('?' * len(ids))}) ORDER BY id",
+                ids
+            ).fetchall()
+        for session_id, timestamp, duration in rows:
+            if str(session_id) in index['sessions'] and not overwrite:
+                continue
+            # Uma sessão por vez: a memória usada não cresce com o número de sessões
+            digest, load = open_raw_data(conn, session_id, cache=False)
+            channels = load()
+            if not channels:
+                print(f"  Sessão {session_id}: ✗ Sem dados brutos, ignorada")
+                continue
+            index['sessions'][str(session_id)] = {
+                'timestamp': timestamp,
+                'duration_seconds': duration,
+                # Hash dos dados no banco: chave do cache de features sem reler o banco
+                'digest': digest,
+                'channels': _write_session(out_dir, session_id, channels),
+            }
+            # Índice salvo a cada sessão: uma exportação interrompida pode continuar depois
+            _write_index(out_dir, index)
+            exported.append(session_id)
+            print(f"  Sessão {session_id}: ✓ {len(channels)} canais exportados")
+    finally:
+        conn.close()
+    return exported
+
+
+class SessionArchive:
+    """Leitura do arquivo exportado; os canais são abertos como memory-map"""
+
+    def __init__(self, path=DEFAULT_ARCHIVE_DIR):
+        self.path = Path(path)
+        self.index = _read_index(self.path)
+        if self.index.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Versão de arquivo não suportada: {self.index.get('version')}")
+        self.sessions = self.index['sessions']
+
+    def __contains__(self, session_id):
+        return str(session_id) in self.sessions
+
+    def session_ids(self):
+        return sorted(int(s) for s in self.sessions)
+
+    def info(self, session_id):
+        """Metadados da sessão (timestamp, duração, canais)"""
+        return self.sessions[str(session_id)]
+
+    def digest(self, session_id):
+        """Hash dos dados brutos gravado na exportação, ou None (sessão fora do arquivo ou exportada sem hash)"""
+        entry = self.sessions.get(str(session_id))
+        return entry.get('digest') if entry else None
+
+    def channel(self, session_id, name):
+        """Um canal como np.memmap somente leitura (nenhum dado é lido até ser usado)"""
+        entry = self.sessions[str(session_id)]['channels'][name]
+        return np.load(self.path / entry['file'], mmap_mode='r')
+
+    def channels(self, session_id):
+        """
+        Todos os canais da sessão: {nome: np.memmap}, vazio se a sessão não
+        estiver no arquivo
+        """
+        if session_id not in self:
+            return {}
+        return {name: self.channel(session_id, name) for name in self.sessions[str(session_id)]['channels']}
+
+
+def open_archive(path):
+    """SessionArchive da pasta, ou None se ela não tiver um arquivo exportado"""
+    if path is None or not (Path(path) / INDEX_FILE).exists():
+        return None
+    return SessionArchive(path)
+
+
+def add_export_arguments(parser):
+    """Opções da exportação (também usadas por python -m analysis export)"""
+    parser.add_argument('--db', default=str(DEFAULT_DB_PATH), help='Caminho para o clinic.db')
+    parser.add_argument('--out', default=str(DEFAULT_ARCHIVE_DIR), help='Pasta do arquivo')
+    parser.add_argument('--sessions', type=int, nargs='*', help='IDs das sessões (padrão: todas)')
+    parser.add_argument('--overwrite', action='store_true', help='Reexportar sessões já arquivadas')
+
+
+def export_command(args):
+    print(f"Exportando sessões de {args.db} para {args.out}")
+    try:
+        exported = export_sessions(args.db, args.out, args.sessions, args.overwrite)
+    except Exception as e:
+        print(f"✗ Erro na exportação: {e}")
+        return 1
+    print(f"✓ {len(exported)} sessão(ões) exportada(s)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_export_arguments(parser)
+    return export_command(parser.parse_args())
+
+if __name__ == '__main__':
+    sys.exit(main())
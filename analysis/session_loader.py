@@ -0,0 +1,384 @@
+"""
+Carregamento dos dados brutos das sessões armazenados no banco clinic.db
+
+Sessões novas guardam cada canal (timestamp, ESQ_angle, DIR_emg, ...) como um
+array NumPy binário na tabela session_channels, ou em pedaços de poucos
+segundos na tabela recording_chunks quando vêm de uma gravação do servidor;
+sessões antigas ainda podem ter apenas o JSON em sessions.raw_data_blob.
+Qualquer que seja o formato, load_raw_data devolve {canal: np.ndarray}.
+"""
+
+import json
+import sqlite3
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Ajustes das conexões somente leitura (mesmos valores de cache/mmap do backend)
+READONLY_PRAGMAS = {
+    'query_only': 'ON',
+    'cache_size': -65536,     # KiB (64 MB)
+    'mmap_size': 268435456,   # 256 MB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,     # ms
+}
+
+# clinic.db do backend, independente da pasta de onde as análises são rodadas
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / 'backend' / 'clinic.db'
+
+# Sessões decodificadas mantidas em memória, chaveadas por (id, hash dos dados)
+CACHE_SIZE = 32
+_channel_cache = OrderedDict()
+
+
+def connect_readonly(db_path):
+    """
+    Abre o clinic.db somente para leitura
+
+    Com o banco em modo WAL (ativado pelo backend) as análises podem rodar
+    enquanto o backend grava novas sessões, sem bloquear nem ser bloqueadas.
+
+    Args:
+        db_path: Caminho para o arquivo clinic.db
+
+    Returns:
+        sqlite3.Connection: Conexão que não consegue alterar o banco
+    """
+    path = Path(db_path).resolve()
+    if not path.exists():
+        # mode=ro nunca cria o arquivo; falhar aqui dá uma mensagem mais clara
+        raise FileNotFoundError(f"Banco de dados não encontrado: {path}")
+    conn = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+    for name, value in READONLY_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def load_session_channels(conn, session_id):
+    """
+    Carrega os canais de uma sessão como arrays NumPy (sem parse de JSON)
+    
+    Args:
+        conn: Conexão sqlite3 aberta com o clinic.db
+        session_id: ID da sessão
+        
+    Returns:
+        dict: {nome_do_canal: np.ndarray}, vazio se a sessão não tiver canais
+    """
+    return _decode_rows(_channel_rows(conn, session_id))
+
+
+def _channel_rows(conn, session_id):
+    """Linhas (name, dtype, compression, length, data) dos canais da sessão"""
+    try:
+        rows = conn.execute(
+            "SELECT name, dtype, compression, length, data FROM session_channels WHERE session_id = ?",
+            (int(session_id),)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # Banco criado antes da tabela session_channels existir
+        return []
+    return rows or _recording_chunks(conn, session_id)
+
+
+def _decode_rows(rows):
+    parts = {}
+    for name, dtype, compression, length, data in rows:
+        if compression == 'zlib':
+            data = zlib.decompress(data)
+        parts.setdefault(name, []).append(np.frombuffer(data, dtype=dtype, count=length))
+    return {name: arrays[0] if len(arrays) == 1 else np.concatenate(arrays) for name, arrays in parts.items()}
+
+
+def _recording_chunks(conn, session_id):
+    """
+    Pedaços (chunks) gravados durante a coleta, para sessões salvas a partir
+    de uma gravação do servidor; em ordem, prontos para concatenar por canal
+    """
+    try:
+        return conn.execute(
+            """SELECT c.name, c.dtype, c.compression, c.length, c.data
+               FROM sessions s JOIN recording_chunks c ON c.recording_id = s.recording_id
+               WHERE s.id = ? ORDER BY c.name, c.seq""",
+            (int(session_id),)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # Banco criado antes das gravações em chunks
+        return []
+
+
+def records_to_channels(records):
+    """
+    Converte a lista de dicionários por ponto (formato antigo) em
+    {canal: np.ndarray} com uma única construção de DataFrame, em vez de
+    percorrer os pontos em Python para cada canal
+    
+    Args:
+        records: Lista de dicionários, ex. [{'timestamp': ..., 'ESQ_angle': ...}, ...]
+        
+    Returns:
+        dict: {nome_do_canal: np.ndarray} apenas com os canais numéricos
+    """
+    frame = pd.DataFrame.from_records([p for p in records if isinstance(p, dict)])
+    channels = {}
+    for name in frame.columns:
+        column = frame[name]
+        if column.dtype.kind not in 'fiub':
+            continue
+        # Pontos sem o canal viram NaN no DataFrame; ficam de fora, como antes
+        channels[name] = column.dropna().to_numpy(dtype=float)
+    return channels
+
+
+def _digest(payload):
+    """
+    Hash dos dados armazenados de uma sessão: CRC32 + tamanho, rápido o
+    bastante para não pesar numa sessão longa (quem usa o hash também guarda o
+    ID da sessão, então basta distinguir versões dos dados de uma sessão)
+    """
+    crc, size = 0, 0
+    for part in payload:
+        crc = zlib.crc32(part, crc)
+        size += len(part)
+    return f"{size:x}-{crc:08x}"
+
+
+def _cached(session_id, digest, decode, cache):
+    """
+    Devolve os canais decodificados da sessão, reaproveitando a decodificação
+    anterior se os dados armazenados não mudaram (mesmo hash)
+    """
+    if not cache:
+        return decode()
+    key = (int(session_id), digest)
+    channels = _channel_cache.get(key)
+    if channels is None:
+        channels = decode()
+        for values in channels.values():
+            # Arrays compartilhados entre análises: ninguém pode alterá-los
+            values.setflags(write=False)
+        _channel_cache[key] = channels
+        if len(_channel_cache) > CACHE_SIZE:
+            _channel_cache.popitem(last=False)
+    else:
+        _channel_cache.move_to_end(key)
+    return channels
+
+
+def clear_cache():
+    """Esvazia o cache de sessões decodificadas"""
+    _channel_cache.clear()
+
+
+def _raw_source(conn, session_id):
+    """(payload, decode) dos dados brutos da sessão no banco, ou (None, None)"""
+    rows = _channel_rows(conn, session_id)
+    if rows:
+        payload = [piece for name, dtype, compression, length, data in rows
+                   for piece in (f"{name}:{dtype}:{compression}:{length}".encode(), data)]
+        return payload, lambda: _decode_rows(rows)
+    # Lido como bytes: o hash não precisa recodificar o texto
+    row = conn.execute("SELECT CAST(raw_data_blob AS BLOB) FROM sessions WHERE id = ?", (int(session_id),)).fetchone()
+    if not row or not row[0]:
+        return None, None
+    return [row[0]], lambda: records_to_channels(json.loads(row[0]))
+
+
+def open_raw_data(conn, session_id, archive=None, cache=True):
+    """
+    Hash dos dados brutos armazenados de uma sessão e uma função que os
+    carrega, para quem só precisa decodificá-los quando o hash mudou (ver
+    feature_cache.py)
+    
+    Args:
+        conn: Conexão sqlite3 aberta com o clinic.db
+        session_id: ID da sessão
+        archive: SessionArchive opcional (ver session_archive.open_archive)
+        cache: Guardar os canais carregados no cache em memória
+        
+    Returns:
+        tuple: (hash ou None se a sessão não tiver dados brutos, load()),
+        onde load() devolve o mesmo que load_raw_data
+    """
+    archived = archive.digest(session_id) if archive is not None else None
+    if archived is not None:
+        # Sessão no arquivo: o hash gravado na exportação evita ler o banco
+        return archived, lambda: archive.channels(session_id)
+    
+    payload, decode = _raw_source(conn, session_id)
+    if payload is None:
+        return None, dict
+    digest = _digest(payload)
+    
+    def load():
+        if archive is not None and session_id in archive:
+            return archive.channels(session_id)
+        return _cached(session_id, digest, decode, cache)
+    return digest, load
+
+
+def load_raw_data(conn, session_id, archive=None, cache=True):
+    """
+    Carrega os dados brutos de uma sessão: do arquivo exportado por
+    session_archive.py (memory-map) se a sessão estiver nele; senão os canais
+    binários do banco ou, para sessões antigas, o JSON de raw_data_blob
+    
+    O resultado decodificado fica num cache LRU (CACHE_SIZE sessões), então
+    carregar a mesma sessão de novo, em outra análise, não repete o parse.
+    
+    Args:
+        conn: Conexão sqlite3 aberta com o clinic.db
+        session_id: ID da sessão
+        archive: SessionArchive opcional (ver session_archive.open_archive)
+        cache: Guardar o resultado no cache (False para leituras de passagem,
+            como a exportação de todas as sessões)
+        
+    Returns:
+        dict: {nome_do_canal: np.ndarray}, vazio se a sessão não tiver dados
+    """
+    if archive is not None and session_id in archive:
+        return archive.channels(session_id)
+    return open_raw_data(conn, session_id, cache=cache)[1]()
+
+
+def load_sessions(conn, session_ids, archive=None, feature_cache=None):
+    """
+    Carrega as sessões para as análises: metadados, métricas pré-calculadas e,
+    só para as sessões sem métricas, os dados brutos (ou, com feature_cache,
+    as features guardadas em disco no lugar deles)
+    
+    Args:
+        conn: Conexão sqlite3 aberta com o clinic.db
+        session_ids: Lista de IDs de sessões
+        archive: SessionArchive opcional (ver session_archive.open_archive)
+        feature_cache: FeatureCache opcional (ver feature_cache.py)
+        
+    Returns:
+        dict: {session_id: {'timestamp', 'duration', 'metrics', 'raw_data'}},
+        na ordem dos IDs; vazio se nenhuma sessão for encontrada
+    """
+    ids = [int(s) for s in session_ids]
+    if not ids:
+        return {}
+    rows = conn.execute(
+        f"SELECT id, timestamp, duration_seconds FROM sessions WHERE id IN ({','.join('?' * len(ids))}) ORDER BY id",
+        ids
+    ).fetchall()
+    if not rows:
+        return {}
+    print(f"✓ {len(rows)} sessão(ões) encontrada(s)\n")
+    
+    # Métricas pré-calculadas pelo backend ao salvar cada sessão
+    metrics = load_session_metrics(conn, [row[0] for row in rows])
+    
+    sessions = {}
+    for session_id, timestamp, duration in rows:
+        raw_data, session_metrics = None, metrics.get(session_id, {})
+        try:
+            # Dados brutos só são carregados para sessões sem métricas
+            if session_id in metrics:
+                pass
+            elif feature_cache is not None:
+                session_metrics, _ = feature_cache.session_features(conn, session_id, archive)
+            else:
+                raw_data = load_raw_data(conn, session_id, archive)
+        except json.JSONDecodeError as e:
+            print(f"  Sessão {session_id}: ✗ Erro ao decodificar JSON: {e}")
+            continue
+        sessions[session_id] = {
+            'timestamp': timestamp,
+            'duration': duration,
+            'metrics': session_metrics,
+            'raw_data': raw_data
+        }
+        print(f"  Sessão {session_id}: ✓ Dados extraídos")
+    return sessions
+
+
+def load_session_metrics(conn, session_ids):
+    """
+    Carrega as métricas por canal calculadas pelo backend ao salvar cada sessão
+    
+    Args:
+        conn: Conexão sqlite3 aberta com o clinic.db
+        session_ids: Lista de IDs de sessões
+        
+    Returns:
+        dict: {session_id: {canal: {'min': ..., 'max': ..., 'delta': ..., ...}}}
+    """
+    ids = [int(s) for s in session_ids]
+    if not ids:
+        return {}
+    try:
+        cursor = conn.execute(
+            f"SELECT * FROM session_metrics WHERE session_id IN ({','.join('?' * len(ids))})", ids
+        )
+    except sqlite3.OperationalError:
+        # Banco criado antes da tabela session_metrics existir
+        return {}
+    
+    columns = [c[0] for c in cursor.description]
+    metrics = {}
+    for row in cursor.fetchall():
+        record = dict(zip(columns, row))
+        metrics.setdefault(record['session_id'], {})[record['channel']] = record
+    return metrics
+
+
+def channel_values(raw_data, channel):
+    """
+    Extrai um canal dos dados brutos como array NumPy
+    
+    Args:
+        raw_data: Canais (dict) ou lista de dicionários por ponto (formato antigo)
+        channel: Nome do canal, ex. 'ESQ_angle'
+    """
+    if isinstance(raw_data, list):
+        raw_data = records_to_channels(raw_data)
+    values = raw_data.get(channel, [])
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'f':
+        # Sem cópia: canais em memory-map são lidos direto do disco
+        return values
+    return np.asarray(values, dtype=float)
+
+
+def channel_min_max(session_data, channel):
+    """
+    Mínimo e máximo de um canal, lidos das métricas pré-calculadas quando
+    existirem; caso contrário calculados a partir dos dados brutos
+    
+    Args:
+        session_data: Entrada de sessions_data ({'metrics': ..., 'raw_data': ...})
+        channel: Nome do canal, ex. 'ESQ_angle'
+        
+    Returns:
+        tuple: (mínimo, máximo), ou None se o canal não tiver dados
+    """
+    metrics = session_data.get('metrics') or {}
+    stats = metrics.get(channel)
+    if stats and stats.get('min') is not None and stats.get('max') is not None:
+        return stats['min'], stats['max']
+    
+    values = channel_values(session_data.get('raw_data') or {}, channel)
+    # Pontos sem valor (NaN) ficam de fora, como em records_to_channels
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None
+    return float(np.min(values)), float(np.max(values))
+
+
+def channel_delta(session_data, channel):
+    """
+    Variação (máximo - mínimo) de um canal, ou NaN se o canal não tiver dados
+    
+    Args:
+        session_data: Entrada de sessions_data ({'metrics': ..., 'raw_data': ...})
+        channel: Nome do canal, ex. 'ESQ_emg'
+    """
+    value_range = channel_min_max(session_data, channel)
+    if value_range is None:
+        return np.nan
+    return value_range[1] - value_range[0]
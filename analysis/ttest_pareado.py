@@ -12,28 +12,32 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-import sqlite3
-import json
 import pandas as pd
 import numpy as np
 from scipy import stats
 from pathlib import Path
 from datetime import datetime
 
+from session_loader import channel_delta
+from session_archive import DEFAULT_ARCHIVE_DIR
+from feature_cache import DEFAULT_CACHE_PATH
+from session_analyzer import SessionAnalyzer
 
-class PairedTTestAnalyzer:
+
+class PairedTTestAnalyzer(SessionAnalyzer):
     """Classe para análise de testes t pareados entre pernas"""
     
-    def __init__(self, db_path="../backend/clinic.db"):
+    def __init__(self, db_path="../backend/clinic.db", archive_path=DEFAULT_ARCHIVE_DIR,
+                 cache_path=DEFAULT_CACHE_PATH):
         """
         Inicializa o analisador com caminho para o banco de dados
         
         Args:
             db_path: Caminho para o arquivo clinic.db
+            archive_path: Pasta exportada por session_archive.py (ver SessionAnalyzer)
+            cache_path: Arquivo do cache de features, ou None (ver SessionAnalyzer)
         """
-        self.db_path = Path(db_path)
-        self.conn = None
-        self.sessions_data = {}
+        super().__init__(db_path, archive_path, cache_path)
         
         # Armazenar deltas por variável
         self.deltas = {
@@ -44,64 +48,12 @@ class PairedTTestAnalyzer:
         
         self.results = {}
         self.session_ids = [19, 20, 21, 22, 23]
-        
-    def connect_db(self):
-        """Conecta ao banco de dados SQLite"""
-        try:
-            self.conn = sqlite3.connect(str(self.db_path))
-            print(f"✓ Conectado ao banco de dados: {self.db_path}")
-        except Exception as e:
-            print(f"✗ Erro ao conectar ao banco de dados: {e}")
-            raise
-    
-    def close_db(self):
-        """Fecha a conexão com o banco de dados"""
-        if self.conn:
-            self.conn.close()
-            print("✓ Conexão com banco de dados fechada")
     
     def extract_session_data(self):
         """
         Extrai dados das sessões especificadas
         """
-        print(f"\n{'='*80}")
-        print(f"EXTRAÇÃO DE DADOS - Sessões {self.session_ids[0]} a {self.session_ids[-1]}")
-        print(f"{'='*80}")
-        
-        query = f"""
-            SELECT id, timestamp, duration_seconds, raw_data_blob 
-            FROM sessions 
-            WHERE id IN ({','.join(map(str, self.session_ids))})
-            ORDER BY id
-        """
-        
-        try:
-            df = pd.read_sql_query(query, self.conn)
-            
-            if df.empty:
-                print(f"✗ Nenhuma sessão encontrada para IDs: {self.session_ids}")
-                return False
-            
-            print(f"✓ {len(df)} sessão(ões) encontrada(s)\n")
-            
-            for idx, row in df.iterrows():
-                session_id = row['id']
-                try:
-                    raw_data = json.loads(row['raw_data_blob'])
-                    self.sessions_data[session_id] = {
-                        'timestamp': row['timestamp'],
-                        'duration': row['duration_seconds'],
-                        'raw_data': raw_data
-                    }
-                    print(f"  Sessão {session_id}: ✓ Dados extraídos")
-                except json.JSONDecodeError as e:
-                    print(f"  Sessão {session_id}: ✗ Erro ao decodificar JSON: {e}")
-            
-            return True
-            
-        except Exception as e:
-            print(f"✗ Erro ao extrair dados das sessões: {e}")
-            raise
+        return super().extract_session_data(self.session_ids)
     
     def calculate_deltas(self):
         """
@@ -113,62 +65,16 @@ class PairedTTestAnalyzer:
         
         for session_id, data in sorted(self.sessions_data.items()):
             try:
-                raw_data = data['raw_data']
-                
-                # Extrair dados de ambas as pernas
-                angles_esq = []
-                angles_dir = []
-                emg_esq = []
-                emg_dir = []
-                ecg_esq = []
-                ecg_dir = []
-                
-                if isinstance(raw_data, list):
-                    for point in raw_data:
-                        if isinstance(point, dict):
-                            # Ângulos
-                            if 'ESQ_angle' in point:
-                                angles_esq.append(point['ESQ_angle'])
-                            if 'DIR_angle' in point:
-                                angles_dir.append(point['DIR_angle'])
-                            
-                            # EMG
-                            if 'ESQ_emg' in point:
-                                emg_esq.append(point['ESQ_emg'])
-                            if 'DIR_emg' in point:
-                                emg_dir.append(point['DIR_emg'])
-                            
-                            # ECG
-                            if 'ESQ_ecg' in point:
-                                ecg_esq.append(point['ESQ_ecg'])
-                            if 'DIR_ecg' in point:
-                                ecg_dir.append(point['DIR_ecg'])
-                else:
-                    # Fallback para dicionário
-                    angles_esq = raw_data.get('ESQ_angle', [])
-                    angles_dir = raw_data.get('DIR_angle', [])
-                    emg_esq = raw_data.get('ESQ_emg', [])
-                    emg_dir = raw_data.get('DIR_emg', [])
-                    ecg_esq = raw_data.get('ESQ_ecg', [])
-                    ecg_dir = raw_data.get('DIR_ecg', [])
-                
-                # Converter para arrays numpy
-                angles_esq = np.array(angles_esq, dtype=float)
-                angles_dir = np.array(angles_dir, dtype=float)
-                emg_esq = np.array(emg_esq, dtype=float)
-                emg_dir = np.array(emg_dir, dtype=float)
-                ecg_esq = np.array(ecg_esq, dtype=float)
-                ecg_dir = np.array(ecg_dir, dtype=float)
+                # Calcular deltas para cada variável, a partir das métricas
+                # pré-calculadas da sessão (ou dos dados brutos, se não houver)
+                delta_angle_esq = channel_delta(data, 'ESQ_angle')
+                delta_angle_dir = channel_delta(data, 'DIR_angle')
                 
-                # Calcular deltas para cada variável
-                delta_angle_esq = np.max(angles_esq) - np.min(angles_esq) if len(angles_esq) > 0 else np.nan
-                delta_angle_dir = np.max(angles_dir) - np.min(angles_dir) if len(angles_dir) > 0 else np.nan
+                delta_emg_esq = channel_delta(data, 'ESQ_emg')
+                delta_emg_dir = channel_delta(data, 'DIR_emg')
                 
-                delta_emg_esq = np.max(emg_esq) - np.min(emg_esq) if len(emg_esq) > 0 else np.nan
-                delta_emg_dir = np.max(emg_dir) - np.min(emg_dir) if len(emg_dir) > 0 else np.nan
-                
-                delta_ecg_esq = np.max(ecg_esq) - np.min(ecg_esq) if len(ecg_esq) > 0 else np.nan
-                delta_ecg_dir = np.max(ecg_dir) - np.min(ecg_dir) if len(ecg_dir) > 0 else np.nan
+                delta_ecg_esq = channel_delta(data, 'ESQ_ecg')
+                delta_ecg_dir = channel_delta(data, 'DIR_ecg')
                 
                 # Armazenar deltas
                 if not np.isnan(delta_angle_esq) and not np.isnan(delta_angle_dir):
@@ -585,6 +491,29 @@ class PairedTTestAnalyzer:
                 print(f"    ✗ NÃO há diferença significante entre pernas (p ≥ 0.05)")
                 print(f"    • As pernas apresentam padrões similares nesta variável")
     
+    def analyze(self, output_dir="./", plots=True, excel=True):
+        """
+        Etapas da análise a partir de sessions_data já preenchido (por
+        extract_session_data ou pelo batch_analysis.py)
+        
+        Args:
+            output_dir: Diretório para salvar os arquivos de saída
+            plots: Sem efeito (o teste t não gera gráficos); mesma assinatura
+                das outras análises
+            excel: Gera também o .xlsx (importa o openpyxl)
+        """
+        output_path = Path(output_dir)
+        self.calculate_deltas()
+        self.perform_paired_ttests()
+        self.print_formatted_output()
+        if excel:
+            self.generate_excel_output(output_path / "ttest_pareado_resultados.xlsx")
+        self.generate_csv_output(output_path / "ttest_pareado_resultados.csv")
+        
+        print(f"\n{'='*80}")
+        print("✓ ANÁLISE CONCLUÍDA COM SUCESSO")
+        print(f"{'='*80}\n")
+    
     def run_analysis(self):
         """
         Executa a análise completa
@@ -596,15 +525,7 @@ class PairedTTestAnalyzer:
             
             self.connect_db()
             self.extract_session_data()
-            self.calculate_deltas()
-            self.perform_paired_ttests()
-            self.print_formatted_output()
-            self.generate_excel_output()
-            self.generate_csv_output()
-            
-            print(f"\n{'='*80}")
-            print("✓ ANÁLISE CONCLUÍDA COM SUCESSO")
-            print(f"{'='*80}\n")
+            self.analyze()
             
         except Exception as e:
             print(f"\n✗ ERRO DURANTE A ANÁLISE: {e}")
@@ -0,0 +1,145 @@
+import math
+from collections import namedtuple
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# --- Stream Alignment ---
+# Merges the per-leg sample streams of a station onto one time grid of
+# `rate` ticks per second, so every stored/streamed row holds both legs
+# sampled at the same instant instead of one fresh value next to a stale one.
+CHANNELS = ("angle", "emg", "ecg")
+LINEAR = "linear"
+HOLD = "hold"
+METHODS = (LINEAR, HOLD)
+
+DEFAULT_RATE = 100.0
+DEFAULT_MAX_LATENCY = 0.1   # seconds a tick may wait for a lagging leg
+MAX_GAP = 1.0               # longer silences are skipped instead of filled with held values
+DEFAULT_STALE_TIMEOUT = 0.5 # seconds after its last sample a silent leg reads NaN (no data)
+
+# `columns` maps "ESQ_angle", "DIR_emg", ... to arrays aligned with `timestamps`
+AlignedRows = namedtuple("AlignedRows", ["timestamps", "columns"])
+
+
+class _Leg:
+    def __init__(self):
+        # Last sample at or before the last emitted tick, for interpolating across batches
+        self.previous = None
+        self.pending: List[tuple] = []
+        self.seen = False
+
+    @property
+    def latest(self) -> float:
+        if self.pending:
+            return self.pending[-1][0]
+        return self.previous[0] if self.previous else -math.inf
+
+
+class StreamAligner:
+    """
+    Streaming resampler of several legs onto a common grid.
+
+    A tick is emitted once every leg that has sent data has a sample at or
+    after it, so it can be interpolated (`linear`) or take the last value at
+    or before it (`hold`). A leg lagging more than `max_latency` behind the
+    newest sample is held at its last value instead, which bounds the delay
+    of every row. Legs that never sent anything read 0, as the dashboard
+    always showed. A leg whose device has been silent for more than
+    `stale_timeout` reads NaN, so the gap is not mistaken for a real 0
+    reading downstream, and stops counting as active until it sends again.
+    Samples are processed in batches with NumPy; as long as no
+    leg lags beyond `max_latency`, any batch split gives the same rows.
+    """
+
+    def __init__(self, legs: Iterable[str], rate: float = DEFAULT_RATE, method: str = LINEAR,
+                 max_latency: float = DEFAULT_MAX_LATENCY, stale_timeout: float = DEFAULT_STALE_TIMEOUT):
+        if method not in METHODS:
+            raise ValueError(f"Unknown alignment method: {method}")
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if stale_timeout <= max_latency:
+            raise ValueError("stale_timeout must exceed max_latency")
+        self.rate = rate
+        self.method = method
+        self.max_latency = max_latency
+        self.stale_timeout = stale_timeout
+        self.legs: Dict[str, _Leg] = {leg: _Leg() for leg in legs}
+        self.next_tick = None   # index k of the next tick at k / rate
+
+    def empty(self) -> AlignedRows:
+        return AlignedRows(np.empty(0), {
+            f"{leg}_{ch}": np.empty(0) for leg in self.legs for ch in CHANNELS
+        })
+
+    def feed(self, samples) -> AlignedRows:
+        """Add ingest.Sample's (device_id = leg) and return the rows that became final."""
+        for sample in samples:
+            leg = self.legs.get(sample.device_id)
+            if leg is not None:
+                leg.pending.append((sample.timestamp, sample.angle, sample.emg, sample.ecg))
+                leg.seen = True
+        return self._emit(final=False)
+
+    def flush(self) -> AlignedRows:
+        """Emit every tick up to the newest sample, without waiting for lagging legs."""
+        return self._emit(final=True)
+
+    def _emit(self, final: bool) -> AlignedRows:
+        active = [leg for leg in self.legs.values() if leg.pending or leg.previous]
+        if not any(leg.pending for leg in active):
+            return self.empty()
+        for leg in active:
+            # Packets may arrive slightly out of order; ones older than the
+            # rows already emitted can no longer be used
+            leg.pending.sort()
+            if leg.previous and leg.pending and leg.pending[0][0] <= leg.previous[0]:
+                leg.pending = [row for row in leg.pending if row[0] > leg.previous[0]]
+        if not any(leg.pending for leg in active):
+            return self.empty()
+
+        newest = max(leg.latest for leg in active)
+        ready = newest if final else max(min(leg.latest for leg in active), newest - self.max_latency)
+
+        earliest = min(leg.pending[0][0] for leg in active if leg.pending)
+        if self.next_tick is None or earliest - self.next_tick / self.rate > MAX_GAP:
+            self.next_tick = math.ceil(earliest * self.rate)
+        last_tick = math.floor(ready * self.rate)
+        if last_tick < self.next_tick:
+            return self.empty()
+
+        ticks = np.arange(self.next_tick, last_tick + 1) / self.rate
+        self.next_tick = last_tick + 1
+        columns = {}
+        for name, leg in self.legs.items():
+            values = self._resample(leg, ticks)
+            for i, ch in enumerate(CHANNELS):
+                columns[f"{name}_{ch}"] = values[:, i]
+        return AlignedRows(ticks, columns)
+
+    def _resample(self, leg: _Leg, ticks: np.ndarray) -> np.ndarray:
+        rows = ([leg.previous] if leg.previous else []) + leg.pending
+        if not rows:
+            return np.full((len(ticks), len(CHANNELS)), np.nan if leg.seen else 0.0)
+        data = np.asarray(rows, dtype=np.float64)
+        times, values = data[:, 0], data[:, 1:]
+
+        # Keep the last sample at or before the final tick, plus everything after it
+        split = int(np.searchsorted(times, ticks[-1], side="right"))
+        if split > 0:
+            leg.previous = rows[split - 1]
+        leg.pending = rows[split:]
+
+        if self.method == LINEAR:
+            # np.interp holds the end values outside the known range
+            resampled = np.column_stack([np.interp(ticks, times, values[:, i]) for i in range(len(CHANNELS))])
+        else:
+            index = np.searchsorted(times, ticks, side="right") - 1
+            resampled = values[np.clip(index, 0, len(times) - 1)]
+
+        # Past the timeout the last value is no longer held: the leg is inactive
+        stale = ticks > times[-1] + self.stale_timeout
+        if stale[-1]:
+            resampled[stale] = np.nan
+            leg.previous = None
+        return resampled
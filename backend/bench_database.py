@@ -0,0 +1,143 @@
+"""
+Benchmark of the SQLite configuration in database.py.
+
+Saves SESSIONS recorded sessions of SESSION_MINUTES each (as POST /sessions
+does) while READERS threads keep loading a patient's history, once with a
+plain SQLite engine ("before": rollback journal, no pragmas) and once with
+database.make_engine ("after": WAL and the tuned pragmas). Each run uses a
+fresh database file in a temporary directory.
+
+    python bench_database.py
+"""
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import database
+import metrics
+import models
+import recorder
+import storage
+
+SESSION_MINUTES = 10
+SAMPLE_RATE = 100       # aligned rows per second, see main.ALIGN_RATE
+SESSIONS = 5
+READERS = 4
+PATIENTS = 20
+
+
+def make_channels(rng: np.random.Generator) -> dict:
+    n = SESSION_MINUTES * 60 * SAMPLE_RATE
+    channels = {"timestamp": time.time() + np.arange(n) / SAMPLE_RATE}
+    for leg in recorder.LEGS:
+        for ch in recorder.RECORDED_CHANNELS:
+            if ch.startswith("angle"):
+                channels[f"{leg}_{ch}"] = rng.uniform(0, 120, n).astype(np.float32)
+            else:
+                channels[f"{leg}_{ch}"] = rng.integers(0, 4096, n).astype(np.float32)
+    return channels
+
+
+def seed(Session):
+    db = Session()
+    try:
+        db.add_all([models.Patient(name=f"Patient {i}") for i in range(PATIENTS)])
+        db.commit()
+    finally:
+        db.close()
+
+
+def save_session(Session, patient_id: int, channels: dict) -> float:
+    start = time.perf_counter()
+    db = Session()
+    try:
+        db_session = models.Session(patient_id=patient_id)
+        metrics.apply_metrics(db_session, channels)
+        storage.save_channels(db_session, channels)
+        db.add(db_session)
+        db.commit()
+    finally:
+        db.close()
+    return time.perf_counter() - start
+
+
+def read_history(Session, stop: threading.Event, latencies: list, errors: list):
+    patient_id = 1
+    while not stop.is_set():
+        start = time.perf_counter()
+        db = Session()
+        try:
+            # Same query as GET /patients/{id}/history
+            db.query(models.Session).filter(models.Session.patient_id == patient_id).all()
+            latencies.append(time.perf_counter() - start)
+        except OperationalError as e:
+            errors.append(str(e.orig))
+        finally:
+            db.close()
+        patient_id = patient_id % PATIENTS + 1
+
+
+def run(engine, channels: dict) -> dict:
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(Session)
+
+    # Inserts alone
+    inserts = [save_session(Session, i % PATIENTS + 1, channels) for i in range(SESSIONS)]
+
+    # Inserts while the readers run
+    stop = threading.Event()
+    latencies, errors = [], []
+    readers = [threading.Thread(target=read_history, args=(Session, stop, latencies, errors))
+               for _ in range(READERS)]
+    for reader in readers:
+        reader.start()
+    concurrent = [save_session(Session, i % PATIENTS + 1, channels) for i in range(SESSIONS)]
+    stop.set()
+    for reader in readers:
+        reader.join()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        "insert_ms": statistics.median(inserts) * 1000,
+        "insert_busy_ms": statistics.median(concurrent) * 1000,
+        "reads": len(latencies),
+        "read_p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else float("nan"),
+        "read_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else float("nan"),
+        "read_max_ms": latencies[-1] * 1000 if latencies else float("nan"),
+        "errors": len(errors),
+    }
+
+
+def main():
+    channels = make_channels(np.random.default_rng(0))
+    size = sum(values.nbytes for values in channels.values())
+    print(f"{SESSIONS} sessions of {SESSION_MINUTES} min ({len(channels['timestamp'])} rows, "
+          f"{size / 1e6:.1f} MB of channels), {READERS} history readers")
+
+    configs = [
+        ("before", lambda url: create_engine(url, connect_args={"check_same_thread": False})),
+        ("after", database.make_engine),
+    ]
+    print(f"{'config':<7} | {'insert ms':>9} | {'+readers':>9} | {'reads':>6} | "
+          f"{'p50 ms':>7} | {'p95 ms':>7} | {'max ms':>7} | {'errors':>6}")
+    print("-" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make in configs:
+            url = f"sqlite:///{Path(tmp) / f'{name}.db'}"
+            result = run(make(url), channels)
+            print(f"{name:<7} | {result['insert_ms']:>9.1f} | {result['insert_busy_ms']:>9.1f} | "
+                  f"{result['reads']:>6} | {result['read_p50_ms']:>7.2f} | {result['read_p95_ms']:>7.2f} | "
+                  f"{result['read_max_ms']:>7.1f} | {result['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark of the /ws live stream encodings.
+
+Simulates STREAM_SECONDS of ingest at 200 and 2000 samples/s and encodes it
+the way streaming.ClientStream does for each format, reporting wire bytes per
+second and encoder CPU time per second of stream.
+
+    python bench_ws_encoding.py
+"""
+import json
+import random
+import time
+
+from streaming import encode_binary_frame
+
+STREAM_SECONDS = 10
+FRAME_FPS = 30
+RATES = [200, 2000]
+
+
+def make_samples(rate: int):
+    start = time.time()
+    samples = []
+    for i in range(rate * STREAM_SECONDS):
+        samples.append({
+            "id": "ESQ" if i % 2 else "DIR",
+            "timestamp": start + i / rate,
+            "values": {
+                "angle": random.uniform(0, 120),
+                "emg": random.randint(0, 4095),
+                "ecg": random.randint(0, 4095),
+                "last_seen": start + i / rate,
+            },
+        })
+    return samples
+
+
+def frames_of(samples, rate: int):
+    per_frame = max(1, rate // FRAME_FPS)
+    return [samples[i:i + per_frame] for i in range(0, len(samples), per_frame)]
+
+
+def dumps(message) -> str:
+    # Same settings Starlette uses for WebSocket.send_json
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def bench_json_per_sample(samples, rate):
+    total = 0
+    for sample in samples:
+        total += len(dumps({"type": "data", **sample}).encode("utf-8"))
+    return total
+
+
+def bench_json_frames(samples, rate):
+    total = 0
+    for frame in frames_of(samples, rate):
+        total += len(dumps({"type": "batch", "samples": frame}).encode("utf-8"))
+    return total
+
+
+def bench_binary_frames(samples, rate):
+    total = 0
+    for frame in frames_of(samples, rate):
+        total += len(encode_binary_frame(frame))
+    return total
+
+
+def main():
+    encoders = [
+        ("json (per sample)", bench_json_per_sample),
+        (f"json batch @{FRAME_FPS}fps", bench_json_frames),
+        (f"binary @{FRAME_FPS}fps", bench_binary_frames),
+    ]
+    print(f"{'rate':>6} | {'encoding':<22} | {'bytes/s':>12} | {'cpu ms/s':>9}")
+    print("-" * 60)
+    for rate in RATES:
+        samples = make_samples(rate)
+        for name, encoder in encoders:
+            cpu_start = time.process_time()
+            total = encoder(samples, rate)
+            cpu = time.process_time() - cpu_start
+            print(f"{rate:>6} | {name:<22} | {total / STREAM_SECONDS:>12,.0f} | {cpu * 1000 / STREAM_SECONDS:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
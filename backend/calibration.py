@@ -0,0 +1,51 @@
+from collections import namedtuple
+from typing import Dict, Optional
+
+import numpy as np
+
+# --- Angle Calibration ---
+# calibrated = clip(scale * (raw + offset), min, max), applied per station to
+# the aligned rows before they are stored, buffered or sent to clients. The
+# raw angle is kept next to it as <leg>_angle_raw.
+Profile = namedtuple("Profile", ["angle_offset", "angle_scale", "angle_min", "angle_max"])
+
+# Used for devices without a stored profile. The left sensor is mounted
+# mirrored: invert direction, -(Raw + Offset), with 26 = 36 - 10 to raise
+# the graph by 10 degrees. Both legs clamp at 0 (hyperextension/noise).
+LEG_DEFAULTS = {
+    "ESQ": Profile(angle_offset=26.0, angle_scale=-1.0, angle_min=0.0, angle_max=None),
+    "DIR": Profile(angle_offset=0.0, angle_scale=1.0, angle_min=0.0, angle_max=None),
+}
+IDENTITY = Profile(angle_offset=0.0, angle_scale=1.0, angle_min=None, angle_max=None)
+
+
+def default_profile(leg: str) -> Profile:
+    return LEG_DEFAULTS.get(leg, IDENTITY)
+
+
+def from_model(row) -> Profile:
+    return Profile(row.angle_offset, row.angle_scale, row.angle_min, row.angle_max)
+
+
+def apply(profile: Profile, angles: np.ndarray) -> np.ndarray:
+    calibrated = profile.angle_scale * (np.asarray(angles, dtype=np.float64) + profile.angle_offset)
+    if profile.angle_min is not None or profile.angle_max is not None:
+        calibrated = np.clip(calibrated, profile.angle_min, profile.angle_max)
+    return calibrated
+
+
+def calibrate_rows(rows, profiles: Dict[str, Profile]):
+    """alignment.AlignedRows with <leg>_angle calibrated and the raw value moved to <leg>_angle_raw."""
+    columns = dict(rows.columns)
+    for leg, profile in profiles.items():
+        raw = columns[f"{leg}_angle"]
+        columns[f"{leg}_angle_raw"] = raw
+        columns[f"{leg}_angle"] = apply(profile, raw)
+    return rows._replace(columns=columns)
+
+
+def profile_dict(device_id: str, profile: Profile, stored: Optional[bool] = None) -> dict:
+    info = {"device_id": device_id, **profile._asdict()}
+    if stored is not None:
+        info["stored"] = stored
+    return info
@@ -0,0 +1,113 @@
+"""
+Regression check of the query plans of the hot queries.
+
+Builds a scratch database through the migrations (so it also fails if
+migrations/ and models.py drift apart), then runs EXPLAIN QUERY PLAN on the
+history, channel and metrics queries of the backend and the analysis
+scripts. Exits with status 1 if any of them scans a table or sorts in a
+temporary B-tree instead of reading an index.
+
+    python check_query_plans.py
+"""
+import datetime
+import sys
+import tempfile
+from pathlib import Path
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import select
+
+import database
+import models
+import queries
+
+SESSION_IDS = [19, 20, 21, 22, 23]   # as in the analysis scripts
+AFTER = datetime.datetime(2025, 12, 3, 15, 0)
+
+# Plan lines that mean the whole table (or index) is read, or rows are sorted after the fact
+BAD_PLAN_STEPS = ("SCAN ", "USE TEMP B-TREE")
+
+
+def orm_queries():
+    return {
+        "history": (queries.patient_history(1), "ix_sessions_patient_id_timestamp"),
+        "history page": (queries.patient_history(1, 50, AFTER, 10), "ix_sessions_patient_id_timestamp"),
+        "history page (timestamp only)": (queries.patient_history(1, 50, AFTER), "ix_sessions_patient_id_timestamp"),
+        "session channels": (
+            select(models.SessionChannel).where(models.SessionChannel.session_id == 1), None),
+        "session channels by name": (
+            select(models.SessionChannel).where(models.SessionChannel.session_id == 1,
+                                                models.SessionChannel.name.in_(["ESQ_angle", "DIR_angle"])), None),
+        "recording chunks": (
+            select(models.RecordingChunk).where(models.RecordingChunk.recording_id == "r")
+            .order_by(models.RecordingChunk.name, models.RecordingChunk.seq), None),
+        "saved recordings": (
+            select(models.Session.recording_id).where(models.Session.recording_id.isnot(None)), None),
+        "history without metrics": (queries.sessions_without_metrics(SESSION_IDS), None),
+        "metrics backfill": (
+            select(models.SessionMetric.session_id)
+            .where(models.SessionMetric.session_id.in_(SESSION_IDS)).distinct(), None),
+    }
+
+
+def sql_queries():
+    # Literal SQL of analysis/session_loader.py and the analysis scripts
+    marks = ",".join("?" * len(SESSION_IDS))
+    return {
+        "analysis sessions": (
+            f"SELECT id, timestamp, duration_seconds FROM sessions WHERE id IN ({marks}) ORDER BY id", SESSION_IDS),
+        "analysis metrics": (f"SELECT * FROM session_metrics WHERE session_id IN ({marks})", SESSION_IDS),
+        "analysis channels": (
+            "SELECT name, dtype, compression, length, data FROM session_channels WHERE session_id = ?", [1]),
+        "analysis recording chunks": (
+            """SELECT c.name, c.dtype, c.compression, c.length, c.data
+               FROM sessions s JOIN recording_chunks c ON c.recording_id = s.recording_id
+               WHERE s.id = ? ORDER BY c.name, c.seq""", [1]),
+        "analysis sessions by patient": (f"SELECT id FROM sessions WHERE patient_id IN ({marks})", SESSION_IDS),
+        "analysis raw blob": ("SELECT CAST(raw_data_blob AS BLOB) FROM sessions WHERE id = ?", [1]),
+    }
+
+
+def explain(connection, sql: str, params) -> list:
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", tuple(params)).fetchall()
+    return [row[-1] for row in rows]
+
+
+def main() -> int:
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = database.make_engine(f"sqlite:///{Path(tmp) / 'plans.db'}")
+        database.upgrade_schema(engine)
+        with engine.connect() as connection:
+            drift = compare_metadata(MigrationContext.configure(connection), models.Base.metadata)
+            if drift:
+                failures += 1
+                print("✗ migrations do not match models.py:")
+                for diff in drift:
+                    print(f"    {diff}")
+
+            plans = {}
+            for name, (statement, index) in orm_queries().items():
+                compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+                params = [compiled.params[key] for key in compiled.positiontup]
+                plans[name] = (explain(connection, str(compiled), params), index)
+            for name, (sql, params) in sql_queries().items():
+                plans[name] = (explain(connection, sql, params), None)
+        engine.dispose()
+
+    for name, (steps, index) in plans.items():
+        bad = [step for step in steps if step.startswith(BAD_PLAN_STEPS)]
+        if index is not None and not any(index in step for step in steps):
+            bad.append(f"does not use {index}")
+        print(f"{'✗' if bad else '✓'} {name}")
+        for step in steps:
+            print(f"    {step}")
+        failures += bool(bad)
+
+    print(f"\n{failures} problem(s)" if failures else "\nAll hot queries use indexes")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,115 @@
-from sqlalchemy import create_engine
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./clinic.db"
+# Same file through aiosqlite, for the async routes and the writer task
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./clinic.db"
+
+# --- SQLite Tuning ---
+# Applied to every pooled connection. WAL lets history/channel reads run while
+# a long session is being committed instead of waiting for the write lock.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",      # with WAL: no corruption on power loss, only the last commits may be lost
+    "cache_size": -65536,         # negative = KiB, 64 MB page cache per connection
+    "mmap_size": 268435456,       # 256 MB of the file read through mmap instead of read()
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,         # ms a writer waits for another one before "database is locked"
+}
+
+# Sync routes run in Starlette's threadpool (40 threads by default): keep a
+# few connections open and let the overflow cover the rest of the threads
+POOL_SIZE = 8
+MAX_OVERFLOW = 32
+POOL_TIMEOUT = 30
+
+
+def apply_pragmas(dbapi_connection, pragmas: dict):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def make_engine(url: str = SQLALCHEMY_DATABASE_URL, pragmas: dict = SQLITE_PRAGMAS, **kwargs):
+    """Engine for a SQLite database with `pragmas` set on every new connection."""
+    options = {"pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW, "pool_timeout": POOL_TIMEOUT}
+    options.update(kwargs)
+    engine = create_engine(url, connect_args={"check_same_thread": False}, **options)
+    if pragmas:
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            apply_pragmas(dbapi_connection, pragmas)
+    return engine
+
+
+def make_async_engine(url: str = ASYNC_DATABASE_URL, pragmas: dict = SQLITE_PRAGMAS, **kwargs):
+    """Async counterpart of make_engine; pragmas are set through the wrapped sync engine."""
+    options = {"pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW, "pool_timeout": POOL_TIMEOUT}
+    options.update(kwargs)
+    engine = create_async_engine(url, **options)
+    if pragmas:
+        @event.listens_for(engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            apply_pragmas(dbapi_connection, pragmas)
+    return engine
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = make_async_engine()
+# Objects stay readable after commit: responses are built once the session is gone
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
+
+
+# --- Schema Migrations ---
+# Alembic scripts live in migrations/ (see alembic.ini). Databases created by
+# create_all() before migrations existed have no alembic_version table: they
+# are completed to the baseline revision and stamped before upgrading.
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+BASELINE_REVISION = "0001"
+BASELINE_TABLES = ("patients", "devices", "calibration_profiles", "sessions", "session_channels", "session_metrics")
+
+
+def upgrade_schema(engine=engine):
+    """Bring the database of `engine` to the latest migration."""
+    from alembic import command
+    from alembic.config import Config
+    import models  # registers the tables on Base.metadata
+
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        inspector = inspect(connection)
+        if inspector.has_table("sessions") and not inspector.has_table("alembic_version"):
+            # The baseline tables still match the models, so create_all() and
+            # add_missing_columns() reproduce revision 0001 exactly
+            tables = [Base.metadata.tables[name] for name in BASELINE_TABLES]
+            Base.metadata.create_all(connection, tables=tables)
+            add_missing_columns(connection, tables)
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+
+
+def add_missing_columns(connection, tables):
+    # create_all() never alters existing tables: add columns introduced since
+    # the database file was created (all of them are nullable)
+    inspector = inspect(connection)
+    for table in tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
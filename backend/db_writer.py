@@ -0,0 +1,107 @@
+import asyncio
+import time
+from typing import List, Optional, Tuple
+
+# --- Database Writer Task ---
+# Heavy inserts (a finished session with its metrics, recording chunks) are
+# handed to one asyncio task instead of being committed by each request.
+# Whatever is queued while a commit runs goes into the next transaction, so
+# SQLite sees a single writer and a burst of saves costs one commit. Request
+# handlers await their own object and get it back with its id assigned.
+MAX_BATCH = 16      # submissions per transaction
+
+
+class DatabaseWriter:
+    def __init__(self, session_factory, max_batch: int = MAX_BATCH):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = False
+        self.objects_total = 0
+        self.commits_total = 0
+        self.failed_total = 0
+        self.last_commit_ms = 0.0
+
+    def start(self):
+        if self.task is None:
+            # Created here so it belongs to the running event loop
+            self.queue = asyncio.Queue()
+            self.stopping = False
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Commit everything already queued, then end the task."""
+        if self.task is None:
+            return
+        # Refuse new objects so nothing is queued behind the end marker
+        self.stopping = True
+        self.queue.put_nowait(None)
+        try:
+            await self.task
+        finally:
+            self.task = None
+
+    def submit(self, objects: list) -> asyncio.Future:
+        """Queue `objects` for insertion in one transaction; the future resolves to them once committed."""
+        if self.task is None or self.stopping:
+            raise RuntimeError("Database writer is not running")
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((objects, future))
+        return future
+
+    async def add(self, obj):
+        """Insert `obj`; returns it once committed, or raises the commit error."""
+        objects = await self.submit([obj])
+        return objects[0]
+
+    async def run(self):
+        while True:
+            job = await self.queue.get()
+            if job is None:
+                return
+            jobs = [job]
+            stopping = False
+            while len(jobs) < self.max_batch and not self.queue.empty():
+                job = self.queue.get_nowait()
+                if job is None:
+                    stopping = True
+                    break
+                jobs.append(job)
+            await self._commit(jobs)
+            if stopping:
+                return
+
+    async def _commit(self, jobs: List[Tuple[list, asyncio.Future]]):
+        start = time.perf_counter()
+        try:
+            async with self.session_factory() as db:
+                db.add_all([obj for objects, _ in jobs for obj in objects])
+                await db.commit()
+        except Exception as e:
+            if len(jobs) > 1:
+                # Retry one by one so only the offending submission fails
+                for job in jobs:
+                    await self._commit([job])
+                return
+            self.failed_total += 1
+            objects, future = jobs[0]
+            if not future.done():
+                future.set_exception(e)
+            return
+        self.commits_total += 1
+        self.objects_total += sum(len(objects) for objects, _ in jobs)
+        self.last_commit_ms = (time.perf_counter() - start) * 1000
+        for objects, future in jobs:
+            # The request may have been cancelled (client gone); the objects are saved anyway
+            if not future.done():
+                future.set_result(objects)
+
+    def snapshot(self) -> dict:
+        return {
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "objects_total": self.objects_total,
+            "commits_total": self.commits_total,
+            "failed_total": self.failed_total,
+            "last_commit_ms": round(self.last_commit_ms, 2),
+        }
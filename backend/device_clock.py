@@ -0,0 +1,167 @@
+from collections import deque
+from typing import Dict, Optional
+
+from ingest import UINT32_RANGE
+
+# --- Device Clock Tracking ---
+# For devices sending the extended packet format: counts lost, reordered and
+# duplicated packets from the sequence counter, and maps the device's micros()
+# onto the host clock so every sample carries its true sampling time.
+#
+# The offset between both clocks is the lower envelope of
+# (arrival time - device time): network and scheduling delays only ever add to
+# it. The envelope may rise by at most MAX_CLOCK_DRIFT seconds per second so it
+# follows a device crystal running slow.
+MAX_CLOCK_DRIFT = 1e-4          # 100 ppm, well above ESP32 crystal tolerance
+REORDER_WINDOW = 256            # late packets further behind than this mean the device restarted
+RESTART_TOLERANCE = 0.05        # s a packet's device time may stray from its sequence slot before it means a restart
+JITTER_GAIN = 1 / 16            # RFC 3550 interarrival jitter smoothing
+RATE_WINDOW = 1.0               # seconds of device time per effective rate estimate
+MAX_TRACKED_DEVICES = 256
+
+
+def _signed_delta(value: int, reference: int) -> int:
+    """value - reference for uint32 counters, across wraparound."""
+    return (value - reference + UINT32_RANGE // 2) % UINT32_RANGE - UINT32_RANGE // 2
+
+
+class DeviceClock:
+    def __init__(self):
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.restarts = 0
+        self.jitter = 0.0               # seconds
+        self.effective_rate = 0.0       # samples per second of device time
+        self._reset()
+
+    def _reset(self):
+        self.highest_seq: Optional[int] = None    # unwrapped
+        self.offset: Optional[float] = None       # host time - device time (s)
+        self._raw_seq = 0
+        self._raw_us = 0
+        self._device_time = 0.0                   # unwrapped, of the highest seq (s)
+        self._seen: Dict[int, float] = {}        # seq -> device time, of the last REORDER_WINDOW packets
+        self._seen_order = deque()
+        self._last_transit: Optional[float] = None
+        self._rate_start: Optional[float] = None
+        self._rate_count = 0
+
+    def _remember(self, seq: int, device_time: float):
+        self._seen[seq] = device_time
+        self._seen_order.append(seq)
+        while len(self._seen_order) > REORDER_WINDOW:
+            self._seen.pop(self._seen_order.popleft(), None)
+
+    def _restarted(self, seq_delta: int, device_time: float) -> bool:
+        """Whether a packet within the reorder window belongs to a new run of the device."""
+        if seq_delta > 0:
+            # The device clock never runs backwards between two packets of one run
+            return device_time < self._device_time - RESTART_TOLERANCE
+        seq = self.highest_seq + seq_delta
+        if seq in self._seen:
+            # A duplicate repeats the sampling time; a rebooted device reuses the seq at another time
+            expected = self._seen[seq]
+        else:
+            oldest = self._seen_order[0]
+            if oldest >= self.highest_seq:
+                return False
+            period = (self._device_time - self._seen[oldest]) / (self.highest_seq - oldest)
+            expected = self._device_time + seq_delta * period
+        return abs(device_time - expected) > RESTART_TOLERANCE
+
+    def stamp(self, sample):
+        """Sample with its timestamp on the host clock, or None for a duplicate."""
+        received_at = sample.timestamp
+        if self.highest_seq is not None:
+            seq_delta = _signed_delta(sample.seq, self._raw_seq)
+            device_time = self._device_time + _signed_delta(sample.device_us, self._raw_us) / 1e6
+            # Counter went back further than any reordering, or the device clock does
+            # not match the packet's place in the sequence: the device rebooted
+            if seq_delta < -REORDER_WINDOW or self._restarted(seq_delta, device_time):
+                self.restarts += 1
+                self._reset()
+
+        if self.highest_seq is None:
+            seq = 0
+            in_order = True
+            self.highest_seq = 0
+            self._raw_seq, self._raw_us = sample.seq, sample.device_us
+            device_time = 0.0
+        else:
+            seq = self.highest_seq + seq_delta
+            if seq in self._seen:
+                self.duplicates += 1
+                return None
+            in_order = seq_delta > 0
+            if in_order:
+                self.lost += seq_delta - 1
+                self.highest_seq = seq
+                self._raw_seq, self._raw_us = sample.seq, sample.device_us
+            else:
+                # A late packet fills a gap that was counted as lost
+                self.reordered += 1
+                self.lost = max(0, self.lost - 1)
+        self.received += 1
+        self._remember(seq, device_time)
+
+        transit = received_at - device_time
+        if self.offset is None:
+            self.offset = transit
+        elif in_order:
+            self.offset = min(transit, self.offset + MAX_CLOCK_DRIFT * (device_time - self._device_time))
+            if self._last_transit is not None:
+                self.jitter += (abs(transit - self._last_transit) - self.jitter) * JITTER_GAIN
+        else:
+            self.offset = min(transit, self.offset)
+
+        if in_order:
+            self._last_transit = transit
+            self._device_time = device_time
+            self._update_rate(device_time)
+        return sample._replace(timestamp=device_time + self.offset)
+
+    def _update_rate(self, device_time: float):
+        if self._rate_start is None:
+            self._rate_start = device_time
+            self._rate_count = 0
+            return
+        self._rate_count += 1
+        elapsed = device_time - self._rate_start
+        if elapsed >= RATE_WINDOW:
+            self.effective_rate = self._rate_count / elapsed
+            self._rate_start = device_time
+            self._rate_count = 0
+
+    def snapshot(self) -> dict:
+        expected = self.received + self.lost
+        return {
+            "received": self.received,
+            "lost": self.lost,
+            "loss_ratio": round(self.lost / expected, 4) if expected else 0.0,
+            "reordered": self.reordered,
+            "duplicates": self.duplicates,
+            "restarts": self.restarts,
+            "jitter_ms": round(self.jitter * 1000, 3),
+            "effective_rate_hz": round(self.effective_rate, 1),
+        }
+
+
+class DeviceClocks:
+    def __init__(self):
+        self.devices: Dict[str, DeviceClock] = {}
+
+    def stamp(self, sample):
+        """Apply DeviceClock.stamp for extended packets; original packets keep their arrival time."""
+        if sample.seq is None:
+            return sample
+        clock = self.devices.get(sample.device_id)
+        if clock is None:
+            if len(self.devices) >= MAX_TRACKED_DEVICES:
+                return sample
+            clock = self.devices[sample.device_id] = DeviceClock()
+        return clock.stamp(sample)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {device_id: clock.snapshot() for device_id, clock in self.devices.items()}
@@ -0,0 +1,144 @@
+import math
+from typing import Dict, List
+
+import numpy as np
+
+# --- Chart Downsampling ---
+# Live: min/max buckets, so short EMG bursts survive decimation.
+# History: Largest-Triangle-Three-Buckets (Steinarsson, 2013), which keeps
+# the visual shape of a series at roughly one point per pixel.
+CHANNELS = ("angle", "emg", "ecg")
+MIN_LTTB_POINTS = 3
+
+
+class _Bucket:
+    __slots__ = ("index", "count", "first", "last", "low", "high")
+
+    def __init__(self, index: int, sample: dict):
+        self.index = index
+        self.count = 0
+        self.first = self.last = sample
+        # Per channel: (value, timestamp) of the extremes seen so far
+        self.low = {}
+        self.high = {}
+        self.add(sample)
+
+    def add(self, sample: dict):
+        self.count += 1
+        self.last = sample
+        timestamp = sample["timestamp"]
+        values = sample["values"]
+        for ch in CHANNELS:
+            value = values[ch]
+            if ch not in self.low or value < self.low[ch][0]:
+                self.low[ch] = (value, timestamp)
+            if ch not in self.high or value > self.high[ch][0]:
+                self.high[ch] = (value, timestamp)
+
+    def emit(self, device_id: str) -> List[dict]:
+        if self.count == 1:
+            return [self.first]
+        # Two points per bucket: each channel's earlier extreme goes first
+        start, end = {}, {}
+        for ch in CHANNELS:
+            low, high = self.low[ch], self.high[ch]
+            first, second = (low, high) if low[1] <= high[1] else (high, low)
+            start[ch], end[ch] = first[0], second[0]
+        return [
+            _sample(device_id, self.first["timestamp"], start),
+            _sample(device_id, self.last["timestamp"], end),
+        ]
+
+
+def _sample(device_id: str, timestamp: float, values: dict) -> dict:
+    return {"id": device_id, "timestamp": timestamp, "values": {**values, "last_seen": timestamp}}
+
+
+class MinMaxDecimator:
+    """
+    Streaming min/max decimation of live samples to about `points_per_second`
+    per device.
+
+    Samples are grouped per device into buckets of 2 / points_per_second
+    seconds. Each closed bucket becomes two samples holding the minimum and
+    maximum of every channel, in the order they occurred. The bucket still
+    filling is held back until a sample of a later bucket arrives, so output
+    lags by at most one bucket; flush() emits it when no such sample will
+    come (the stream stopped, a recording ended).
+    """
+
+    def __init__(self, points_per_second: float):
+        self.points_per_second = points_per_second
+        self.bucket_seconds = 2.0 / points_per_second
+        self._open: Dict[str, _Bucket] = {}
+
+    def feed(self, samples: List[dict]) -> List[dict]:
+        out = []
+        for sample in samples:
+            device_id = sample["id"]
+            index = math.floor(sample["timestamp"] / self.bucket_seconds)
+            bucket = self._open.get(device_id)
+            if bucket is not None and bucket.index == index:
+                bucket.add(sample)
+                continue
+            if bucket is not None:
+                out.extend(bucket.emit(device_id))
+            self._open[device_id] = _Bucket(index, sample)
+        return out
+
+    def pending(self) -> bool:
+        """Whether a bucket is still filling."""
+        return bool(self._open)
+
+    def flush(self) -> List[dict]:
+        """Emit the buckets still filling; later samples start new ones."""
+        out = []
+        for device_id, bucket in self._open.items():
+            out.extend(bucket.emit(device_id))
+        self._open.clear()
+        return out
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points LTTB keeps when reducing (x, y) to `threshold` points."""
+    n = len(y)
+    if threshold >= n or threshold < MIN_LTTB_POINTS:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges over the points between the fixed first and last one
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    selected = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        ax, ay = x[selected], y[selected]
+        area = np.abs(
+            (ax - avg_x) * (y[start:end] - ay) - (ax - x[start:end]) * (avg_y - ay)
+        )
+        selected = start + int(np.argmax(area))
+        indices[i + 1] = selected
+    return indices
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int):
+    """LTTB-reduced (x, y). NaN samples (e.g. gaps in legacy data) are ignored."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    finite = np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    keep = lttb_indices(x, y, threshold)
+    return x[keep], y[keep]
@@ -0,0 +1,188 @@
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from scipy import signal
+
+# --- Streaming Filter Chain ---
+# Runs on the aligned rows of a station (uniform grid, see alignment.py) and
+# on stored sessions. Every stage keeps its state between calls (sosfilt `zi`,
+# RMS window tail), so filtering a stream batch by batch gives the same
+# result as filtering the whole recording at once.
+#
+#   angle:    low-pass                                  -> <leg>_angle_lp
+#   emg/ecg:  band-pass + mains notch                   -> <leg>_emg_bp
+#             |band-passed| -> low-pass (envelope)       -> <leg>_emg_env
+#             moving RMS of the band-passed signal       -> <leg>_emg_rms
+CHANNELS = ("angle", "emg", "ecg")
+MUSCLE_CHANNELS = ("emg", "ecg")
+
+FILTER_ORDER = 2            # Butterworth order (band-pass filters get twice this)
+ANGLE_CUTOFF = 2.0          # Hz
+MUSCLE_BAND = (20.0, 450.0)  # Hz, limited to below Nyquist at the station rate
+MAINS_HZ = 60.0
+NOTCH_Q = 30.0
+ENVELOPE_CUTOFF = 3.0       # Hz, as in the "Filtrado (3Hz)" report plots
+RMS_WINDOW = 0.1            # seconds
+NYQUIST_MARGIN = 0.9        # highest usable cutoff as a fraction of Nyquist
+
+# Live clients pick a view (/ws?view=...); each maps the three values of a
+# sample to a raw or derived channel so every wire format stays the same.
+# Angles are calibrated (see calibration.py) except in "uncalibrated".
+VIEWS = {
+    "raw": {"angle": "angle", "emg": "emg", "ecg": "ecg"},
+    "uncalibrated": {"angle": "angle_raw", "emg": "emg", "ecg": "ecg"},
+    "filtered": {"angle": "angle_lp", "emg": "emg_bp", "ecg": "ecg_bp"},
+    "envelope": {"angle": "angle_lp", "emg": "emg_env", "ecg": "ecg_env"},
+    "rms": {"angle": "angle_lp", "emg": "emg_rms", "ecg": "ecg_rms"},
+}
+DEFAULT_VIEW = "raw"
+
+
+def _alias(frequency: float, fs: float) -> float:
+    """Frequency at which an undersampled tone shows up (mains at 60 Hz sampled at 100 Hz -> 40 Hz)."""
+    return abs(frequency - fs * round(frequency / fs))
+
+
+def design(fs: float) -> Dict[str, Optional[np.ndarray]]:
+    """Second-order sections of every stage for sample rate `fs`; None where a stage does not fit."""
+    nyquist = fs / 2
+    top = NYQUIST_MARGIN * nyquist
+
+    def lowpass(cutoff):
+        if cutoff >= top:
+            return None
+        return signal.butter(FILTER_ORDER, cutoff, btype="lowpass", fs=fs, output="sos")
+
+    low, high = MUSCLE_BAND[0], min(MUSCLE_BAND[1], top)
+    band = signal.butter(FILTER_ORDER, (low, high), btype="bandpass", fs=fs, output="sos") \
+        if low < high else None
+    mains = _alias(MAINS_HZ, fs)
+    if 0 < mains < top:
+        notch = signal.tf2sos(*signal.iirnotch(mains, NOTCH_Q, fs=fs))
+        band = notch if band is None else np.vstack((band, notch))
+
+    return {
+        "angle": lowpass(ANGLE_CUTOFF),
+        "band": band,
+        "envelope": lowpass(ENVELOPE_CUTOFF),
+    }
+
+
+class StreamingSOS:
+    """sosfilt over (channels x samples) blocks, carrying the filter state between blocks."""
+
+    def __init__(self, sos: Optional[np.ndarray]):
+        self.sos = sos
+        self.zi = None
+
+    def __call__(self, block: np.ndarray) -> np.ndarray:
+        if self.sos is None or block.shape[1] == 0:
+            return block
+        if self.zi is None:
+            # Start in steady state for the first value instead of ringing up from 0
+            self.zi = signal.sosfilt_zi(self.sos)[:, None, :] * block[None, :, 0, None]
+        out, self.zi = signal.sosfilt(self.sos, block, axis=-1, zi=self.zi)
+        return out
+
+
+class MovingRMS:
+    """RMS over the last `window` samples of every row, carrying the window tail between blocks."""
+
+    def __init__(self, window: int):
+        self.window = max(1, window)
+        self.tail = None
+
+    def __call__(self, block: np.ndarray) -> np.ndarray:
+        if block.shape[1] == 0:
+            return block
+        squared = np.square(block)
+        if self.tail is None:
+            # Window starts filled with the first value, like the sosfilt steady state
+            self.tail = np.repeat(squared[:, :1], self.window - 1, axis=1)
+        joined = np.concatenate((self.tail, squared), axis=1)
+        # Every window summed on its own (no running cumsum), so results do not depend on block boundaries
+        means = np.lib.stride_tricks.sliding_window_view(joined, self.window, axis=1).mean(axis=-1)
+        self.tail = joined[:, joined.shape[1] - (self.window - 1):]
+        return np.sqrt(means)
+
+
+class HoldGaps:
+    """
+    Replaces NaN (a stale leg, see alignment.py) with the last finite value
+    of its row, carried between blocks, so no filter state turns into NaN;
+    the caller puts NaN back in the outputs at the same positions.
+    """
+
+    def __init__(self):
+        self.last = None
+
+    def __call__(self, block: np.ndarray):
+        if self.last is None:
+            self.last = np.zeros(block.shape[0])
+        if block.shape[1] == 0:
+            return block, None
+        missing = ~np.isfinite(block)
+        if not missing.any():
+            self.last = block[:, -1].copy()
+            return block, None
+        # Index of the last finite value at or before each position; -1 = carried from the previous block
+        index = np.maximum.accumulate(np.where(missing, -1, np.arange(block.shape[1])), axis=1)
+        filled = np.take_along_axis(np.concatenate((self.last[:, None], block), axis=1), index + 1, axis=1)
+        self.last = filled[:, -1].copy()
+        return filled, missing
+
+
+class FilterChain:
+    """All stages for all legs of a station; legs are filtered together as rows of one block."""
+
+    def __init__(self, legs: Iterable[str], fs: float):
+        self.legs = tuple(legs)
+        self.fs = fs
+        sos = design(fs)
+        self.angle = StreamingSOS(sos["angle"])
+        # EMG and ECG of every leg share the band-pass and envelope stages
+        self.band = StreamingSOS(sos["band"])
+        self.envelope = StreamingSOS(sos["envelope"])
+        self.rms = MovingRMS(int(round(RMS_WINDOW * fs)))
+        self.angle_gaps = HoldGaps()
+        self.muscle_gaps = HoldGaps()
+
+    def process(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Derived channels for a block of "<leg>_<channel>" columns."""
+        angles = np.vstack([np.asarray(columns[f"{leg}_angle"], dtype=np.float64) for leg in self.legs])
+        muscle_names = [f"{leg}_{ch}" for leg in self.legs for ch in MUSCLE_CHANNELS]
+        muscles = np.vstack([np.asarray(columns[name], dtype=np.float64) for name in muscle_names])
+
+        angles, angle_gaps = self.angle_gaps(angles)
+        muscles, muscle_gaps = self.muscle_gaps(muscles)
+
+        angle_lp = self.angle(angles)
+        band = self.band(muscles)
+        envelope = self.envelope(np.abs(band))
+        rms = self.rms(band)
+        if angle_gaps is not None:
+            angle_lp[angle_gaps] = np.nan
+        if muscle_gaps is not None:
+            for derived in (band, envelope, rms):
+                derived[muscle_gaps] = np.nan
+
+        derived = {}
+        for i, leg in enumerate(self.legs):
+            derived[f"{leg}_angle_lp"] = angle_lp[i]
+        for i, name in enumerate(muscle_names):
+            derived[f"{name}_bp"] = band[i]
+            derived[f"{name}_env"] = envelope[i]
+            derived[f"{name}_rms"] = rms[i]
+        return derived
+
+
+def sample_rate(timestamps: Optional[np.ndarray], default: float) -> float:
+    if timestamps is None or len(timestamps) < 2:
+        return default
+    step = float(np.median(np.diff(timestamps)))
+    return 1.0 / step if step > 0 else default
+
+
+def filter_channels(channels: Dict[str, np.ndarray], legs: Iterable[str], fs: float) -> Dict[str, np.ndarray]:
+    """Offline run of the chain over a whole stored session."""
+    return FilterChain(legs, fs).process(channels)
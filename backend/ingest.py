@@ -0,0 +1,185 @@
+import asyncio
+import socket
+import struct
+import sys
+import time
+from collections import namedtuple
+
+# --- UDP Ingest Configuration ---
+RECV_BUFSIZE = 2048
+MAX_BATCH = 512               # upper bound of datagrams handed on per wakeup
+SOCKET_RCVBUF = 1 << 20       # 1 MiB kernel receive queue
+
+# Linux reports the cumulative number of datagrams the kernel dropped on a
+# socket (receive queue overflow) as ancillary data on recvmsg() once this
+# option is enabled. Python does not always export the constant.
+SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40 if sys.platform.startswith("linux") else None)
+
+# Packet formats:
+#   ID,angle,emg,ecg              original firmware, timestamped on arrival
+#   ID,angle,emg,ecg,seq,t_us     extended: uint32 sequence counter and device
+#                                 micros() at sampling time (both wrap around)
+UINT32_RANGE = 1 << 32
+
+# `timestamp` is arrival time until device_clock.DeviceClocks maps the device
+# time onto the host clock; `seq`/`device_us` are None for the 4 field format
+Sample = namedtuple(
+    "Sample", ["device_id", "timestamp", "angle", "emg", "ecg", "seq", "device_us"],
+    defaults=(None, None)
+)
+
+
+def parse_packet(data: bytes, received_at: float):
+    """Parse an `ID,angle,emg,ecg[,seq,t_us]` datagram. Returns None for malformed packets."""
+    parts = data.decode('utf-8', errors='replace').strip().split(',')
+    if len(parts) != 4 and len(parts) != 6:
+        return None
+    try:
+        if len(parts) == 4:
+            return Sample(parts[0].strip(), received_at, float(parts[1]), int(parts[2]), int(parts[3]))
+        seq, device_us = int(parts[4]), int(parts[5])
+        if not (0 <= seq < UINT32_RANGE and 0 <= device_us < UINT32_RANGE):
+            return None
+        return Sample(parts[0].strip(), received_at, float(parts[1]), int(parts[2]), int(parts[3]),
+                      seq, device_us)
+    except ValueError:
+        return None
+
+
+class IngestStats:
+    """Packet counters, with per-second rates over a rolling one second window."""
+
+    def __init__(self):
+        self.received_total = 0
+        self.dropped_total = 0
+        self.malformed_total = 0
+        self.batches_total = 0
+        self.largest_batch = 0
+        self.drops_supported = False
+        self.packets_per_second = 0.0
+        self.drops_per_second = 0.0
+        self._window_start = time.monotonic()
+        self._window_received = 0
+        self._window_dropped = 0
+
+    def record_batch(self, count: int):
+        self.received_total += count
+        self.batches_total += 1
+        self.largest_batch = max(self.largest_batch, count)
+        self._window_received += count
+        self._roll()
+
+    def record_kernel_drops(self, counter: int):
+        # The kernel counter is cumulative for the lifetime of the socket
+        if counter > self.dropped_total:
+            self._window_dropped += counter - self.dropped_total
+            self.dropped_total = counter
+
+    def _roll(self):
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.packets_per_second = self._window_received / elapsed
+            self.drops_per_second = self._window_dropped / elapsed
+            self._window_start = now
+            self._window_received = 0
+            self._window_dropped = 0
+
+    def snapshot(self) -> dict:
+        self._roll()
+        return {
+            "packets_per_second": round(self.packets_per_second, 1),
+            "drops_per_second": round(self.drops_per_second, 1) if self.drops_supported else None,
+            "received_total": self.received_total,
+            "dropped_total": self.dropped_total if self.drops_supported else None,
+            "malformed_total": self.malformed_total,
+            "batches_total": self.batches_total,
+            "largest_batch": self.largest_batch,
+        }
+
+
+class UDPIngestProtocol(asyncio.DatagramProtocol):
+    """
+    Hands received datagrams to `on_batch` as lists of (bytes, arrival_time).
+
+    On selector based loops `drain` is registered as the socket reader and
+    empties the whole receive queue per wakeup (asyncio's own datagram
+    transport reads a single datagram per callback). On loops without
+    add_reader (Windows Proactor) the regular `datagram_received` path is
+    used and datagrams arriving in the same loop iteration are coalesced.
+    """
+
+    def __init__(self, on_batch):
+        self.on_batch = on_batch
+        self.stats = IngestStats()
+        self.transport = None
+        self._pending = []
+        self._flush_handle = None
+
+    # --- Proactor fallback path ---
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self._pending.append((data, time.time()))
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_soon(self._flush)
+
+    def error_received(self, exc):
+        print(f"UDP Error: {exc}")
+
+    def _flush(self):
+        batch, self._pending, self._flush_handle = self._pending, [], None
+        self._dispatch(batch)
+
+    # --- Selector fast path ---
+    def drain(self, sock: socket.socket):
+        batch = []
+        use_recvmsg = self.stats.drops_supported
+        ancbufsize = socket.CMSG_SPACE(4) if use_recvmsg else 0
+        try:
+            while len(batch) < MAX_BATCH:
+                if use_recvmsg:
+                    data, ancdata, _, _ = sock.recvmsg(RECV_BUFSIZE, ancbufsize)
+                    for level, kind, cdata in ancdata:
+                        if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL:
+                            self.stats.record_kernel_drops(struct.unpack("=I", cdata[:4])[0])
+                else:
+                    data = sock.recv(RECV_BUFSIZE)
+                batch.append((data, time.time()))
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError as e:
+            print(f"UDP Error: {e}")
+        self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        if not batch:
+            return
+        self.stats.record_batch(len(batch))
+        try:
+            self.on_batch(batch)
+        except Exception as e:
+            print(f"UDP Error: {e}")
+
+
+async def start_udp_listener(on_batch, host: str, port: int) -> UDPIngestProtocol:
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RCVBUF)
+    protocol = UDPIngestProtocol(on_batch)
+    if SO_RXQ_OVFL is not None and hasattr(sock, "recvmsg"):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+            protocol.stats.drops_supported = True
+        except OSError:
+            pass
+    sock.bind((host, port))
+    sock.setblocking(False)
+
+    try:
+        loop.add_reader(sock.fileno(), protocol.drain, sock)
+        protocol.transport = sock
+    except NotImplementedError:
+        await loop.create_datagram_endpoint(lambda: protocol, sock=sock)
+    return protocol
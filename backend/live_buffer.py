@@ -0,0 +1,101 @@
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+# --- Live Ring Buffers ---
+# Recent samples of every device, kept in preallocated arrays so the UDP path
+# only copies into existing slots. Old samples are overwritten once a buffer
+# is full. Not thread-safe: write and read from the event loop. Rows of a
+# stale leg (NaN, see alignment.py) are kept in place but read as no data.
+CHANNELS = ("angle", "emg", "ecg")
+DEFAULT_SECONDS = 60
+DEFAULT_RATE = 100  # Expected samples per second per device
+
+
+class RingBuffer:
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.columns = {ch: np.zeros(capacity, dtype=np.float64) for ch in CHANNELS}
+        self.head = 0  # Next slot to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def extend(self, timestamps: np.ndarray, columns: Dict[str, np.ndarray]):
+        """Vectorised write of many samples (`columns` keyed by channel)."""
+        n = len(timestamps)
+        if n > self.capacity:
+            timestamps = timestamps[-self.capacity:]
+            columns = {ch: values[-self.capacity:] for ch, values in columns.items()}
+            n = self.capacity
+        # At most two slices: up to the end of the buffer, then from the start
+        first = min(n, self.capacity - self.head)
+        for target, source in [(self.timestamps, timestamps)] + [(self.columns[ch], columns[ch]) for ch in CHANNELS]:
+            target[self.head:self.head + first] = source[:first]
+            target[:n - first] = source[first:]
+        self.head = (self.head + n) % self.capacity
+        self.size = min(self.capacity, self.size + n)
+
+    def latest(self) -> dict:
+        i = self.head - 1
+        if self.size and not np.isfinite(self.columns["angle"][i]):
+            # Stale leg: its last real sample, if still in the buffer
+            valid = np.flatnonzero(np.isfinite(self._ordered(self.columns["angle"])))
+            i = (self.head - self.size + int(valid[-1])) % self.capacity if len(valid) else None
+        if self.size == 0 or i is None:
+            return {"angle": 0, "emg": 0, "ecg": 0, "last_seen": 0}
+        return {
+            "angle": float(self.columns["angle"][i]),
+            "emg": float(self.columns["emg"][i]),
+            "ecg": float(self.columns["ecg"][i]),
+            "last_seen": float(self.timestamps[i]),
+        }
+
+    def _ordered(self, array: np.ndarray) -> np.ndarray:
+        # Oldest sample first; a view until the buffer has wrapped around
+        if self.size < self.capacity:
+            return array[:self.size]
+        return np.concatenate((array[self.head:], array[:self.head]))
+
+    def since(self, start: float) -> Dict[str, np.ndarray]:
+        """Samples with timestamp >= start, oldest first, one array per channel."""
+        timestamps = self._ordered(self.timestamps)
+        first = int(np.searchsorted(timestamps, start, side="left"))
+        window = {"timestamp": timestamps[first:]}
+        for ch, column in self.columns.items():
+            window[ch] = self._ordered(column)[first:]
+        present = np.isfinite(window["angle"])
+        if not present.all():
+            window = {name: values[present] for name, values in window.items()}
+        return window
+
+
+class LiveStore:
+    def __init__(self, devices: Iterable[str], seconds: float = DEFAULT_SECONDS, rate: float = DEFAULT_RATE):
+        self.seconds = seconds
+        self.rate = rate
+        capacity = int(seconds * rate)
+        self.buffers: Dict[str, RingBuffer] = {device: RingBuffer(capacity) for device in devices}
+
+    def __contains__(self, device_id: str) -> bool:
+        return device_id in self.buffers
+
+    def write_rows(self, rows):
+        """Store alignment.AlignedRows, whose columns are named "<device>_<channel>"."""
+        for device_id, buffer in self.buffers.items():
+            buffer.extend(rows.timestamps, {ch: rows.columns[f"{device_id}_{ch}"] for ch in CHANNELS})
+
+    def latest(self, device_id: str) -> Optional[dict]:
+        buffer = self.buffers.get(device_id)
+        return buffer.latest() if buffer is not None else None
+
+    def window(self, seconds: float, devices: Iterable[str] = None, now: float = None) -> Dict[str, Dict[str, np.ndarray]]:
+        """Last `seconds` of samples per device, relative to `now` (defaults to the current time)."""
+        start = (time.time() if now is None else now) - seconds
+        names = self.buffers.keys() if devices is None else devices
+        return {name: self.buffers[name].since(start) for name in names if name in self.buffers}
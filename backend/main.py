@@ -1,15 +1,18 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
-import models, database
+import models, database, db_writer, queries, ingest, recorder, storage, metrics, downsample, registry, device_clock, dsp, calibration
 import datetime
-import socket
 import asyncio
-import time
+import json
+import numpy as np
 
-models.Base.metadata.create_all(bind=database.engine)
+# Creates or upgrades clinic.db, see migrations/
+database.upgrade_schema()
 
 app = FastAPI()
 
@@ -30,6 +33,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
 # --- Pydantic Models ---
 class PatientCreate(BaseModel):
     name: str
@@ -43,118 +50,564 @@ class PatientResponse(BaseModel):
 
 class SessionCreate(BaseModel):
     patient_id: int
-    duration_seconds: float
-    max_angle_esq: float
-    max_angle_dir: float
-    avg_emg_esq: float
-    avg_emg_dir: float
-    raw_data_blob: str
+    # Server-side recording to finalise (preferred)
+    recording_id: Optional[str] = None
+    # Legacy clients upload the whole session themselves
+    duration_seconds: Optional[float] = None
+    max_angle_esq: Optional[float] = None
+    max_angle_dir: Optional[float] = None
+    avg_emg_esq: Optional[float] = None
+    avg_emg_dir: Optional[float] = None
+    raw_data_blob: Optional[str] = None
+
+class SessionSummary(BaseModel):
+    id: int
+    patient_id: int
+    timestamp: datetime.datetime
+    duration_seconds: Optional[float] = None
+    max_angle_esq: Optional[float] = None
+    max_angle_dir: Optional[float] = None
+    avg_emg_esq: Optional[float] = None
+    avg_emg_dir: Optional[float] = None
+    delta_angle_esq: Optional[float] = None
+    delta_angle_dir: Optional[float] = None
+    mean_emg_esq: Optional[float] = None
+    mean_emg_dir: Optional[float] = None
+    mean_ecg_esq: Optional[float] = None
+    mean_ecg_dir: Optional[float] = None
+    class Config:
+        orm_mode = True
+
+class RecordingStart(BaseModel):
+    patient_id: int
+    station: str = registry.DEFAULT_STATION
+
+class DeviceAssign(BaseModel):
+    station: str
+    leg: str
+
+class CalibrationUpdate(BaseModel):
+    angle_offset: float = 0.0
+    angle_scale: float = 1.0
+    angle_min: Optional[float] = None
+    angle_max: Optional[float] = None
 
 # --- UDP Configuration ---
 UDP_IP = "0.0.0.0"
 UDP_PORT = 4210
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-sock.bind((UDP_IP, UDP_PORT))
-sock.setblocking(False)
+
+# --- Alignment Configuration ---
+# Both legs of a station are resampled onto one grid (see alignment.py)
+ALIGN_RATE = 100          # rows per second
+ALIGN_METHOD = "linear"   # or "hold" (sample-and-hold)
+ALIGN_MAX_LATENCY = 0.1   # seconds a row may wait for a lagging leg
+
+# --- Live Buffer Configuration ---
+# Depth of the per-station ring buffers served by GET /live
+LIVE_BUFFER_SECONDS = 60
 
 # --- State ---
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+# Saved sessions and recording chunks are committed by one writer task, see db_writer.py
+session_writer = db_writer.DatabaseWriter(database.AsyncSessionLocal)
+
+def write_chunk(recording: recorder.Recording, seq: int, channels) -> asyncio.Future:
+    future = session_writer.submit(storage.encode_chunk(recording.id, seq, channels))
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+    def done(f: asyncio.Future):
+        if not f.cancelled() and f.exception() is not None:
+            recording.failed_chunks += 1
+            print(f"Recording {recording.id}: chunk {seq} not stored: {f.exception()}")
+    future.add_done_callback(done)
+    return future
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+# Running recordings are written to recording_chunks every few seconds
+session_recorder = recorder.SessionRecorder(write_chunk)
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
+# Sequence/clock tracking of devices sending the extended packet format
+device_clocks = device_clock.DeviceClocks()
 
-manager = ConnectionManager()
+# Device id -> station/leg; every station has its own live buffers and WebSocket clients
+device_registry = registry.DeviceRegistry(LIVE_BUFFER_SECONDS, ALIGN_RATE, ALIGN_METHOD, ALIGN_MAX_LATENCY)
 
-# Buffer for latest data
-latest_data = {
-    "ESQ": {"angle": 0, "emg": 0, "ecg": 0, "last_seen": 0},
-    "DIR": {"angle": 0, "emg": 0, "ecg": 0, "last_seen": 0}
-}
+udp_protocol: Optional[ingest.UDPIngestProtocol] = None
+udp_task: Optional[asyncio.Task] = None
 
 # --- Background UDP Listener ---
 async def udp_listener():
+    global udp_protocol
     print(f"Listening for UDP on {UDP_PORT}...")
-    loop = asyncio.get_event_loop()
+    # The socket reader drains every pending datagram per wakeup and queues
+    # them as one batch; this task decodes and fans out a whole batch at once.
+    batches: asyncio.Queue = asyncio.Queue()
+    udp_protocol = await ingest.start_udp_listener(batches.put_nowait, UDP_IP, UDP_PORT)
     while True:
+        batch = await batches.get()
         try:
-            data = await loop.sock_recv(sock, 1024)
-            raw_msg = data.decode('utf-8').strip()
-            parts = raw_msg.split(',')
-            
-            if len(parts) == 4:
-                dev_id, angle, emg, ecg = parts[0], float(parts[1]), int(parts[2]), int(parts[3])
-                
-                # Update State
-                if dev_id in latest_data:
-                    latest_data[dev_id] = {
-                        "angle": angle,
-                        "emg": emg,
-                        "ecg": ecg,
-                        "last_seen": time.time()
-                    }
-                    
-                    # Broadcast immediately
-                    payload = {
-                        "type": "data",
-                        "id": dev_id,
-                        "timestamp": time.time(),
-                        "values": latest_data[dev_id]
-                    }
-                    await manager.broadcast(payload)
-                    
+            samples = []
+            for data, received_at in batch:
+                sample = ingest.parse_packet(data, received_at)
+                if sample is None:
+                    udp_protocol.stats.malformed_total += 1
+                    continue
+                # True sampling time from the device clock; None for duplicates
+                sample = device_clocks.stamp(sample)
+                if sample is not None:
+                    samples.append(sample)
+
+            # Update State, per station: clients only get their own station's traffic
+            for station, station_samples in device_registry.route(samples).items():
+                try:
+                    rows = station.align(station_samples)
+                    session_recorder.record(station.name, rows)
+                    station.publish(rows)
+                except Exception as e:
+                    # One station failing must not starve the others of this batch
+                    print(f"UDP Error (station {station.name}): {e}")
+
         except Exception as e:
             print(f"UDP Error: {e}")
-            await asyncio.sleep(0.1)
+
+def restore_recordings(db: Session):
+    # Recordings the server was running (or holding unsaved) when it last
+    # stopped come back as stopped recordings, ready to save or discard
+    saved = select(models.Session.recording_id).where(models.Session.recording_id.isnot(None))
+    for row in db.query(models.Recording).filter(models.Recording.id.notin_(saved)):
+        timestamps = storage.load_recording_channels(db, row.id, [storage.TIMESTAMP_CHANNEL])
+        chunks = db.query(func.max(models.RecordingChunk.seq)).filter(
+            models.RecordingChunk.recording_id == row.id).scalar()
+        session_recorder.restore(recorder.Recording.restored(
+            row.patient_id, row.station, row.id, row.started_at,
+            timestamps.get(storage.TIMESTAMP_CHANNEL, np.empty(0)), 0 if chunks is None else chunks + 1,
+        ))
 
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(udp_listener())
+    db = database.SessionLocal()
+    try:
+        device_registry.load(db)
+        restore_recordings(db)
+    finally:
+        db.close()
+    session_writer.start()
+    global udp_task
+    udp_task = asyncio.create_task(udp_listener())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Stop ingesting first so no batch reaches the recorder once the writer is gone
+    if udp_task is not None:
+        udp_task.cancel()
+        try:
+            await udp_task
+        except asyncio.CancelledError:
+            pass
+    try:
+        # Running recordings keep their pending samples
+        for recording in list(session_recorder.recordings.values()):
+            if recording.active:
+                session_recorder.flush(recording)
+        await session_writer.stop()
+    finally:
+        await database.async_engine.dispose()
 
 # --- API Routes ---
 @app.post("/patients", response_model=PatientResponse)
-def create_patient(patient: PatientCreate, db: Session = Depends(get_db)):
+async def create_patient(patient: PatientCreate, db: AsyncSession = Depends(get_async_db)):
     db_patient = models.Patient(name=patient.name)
     db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
+    await db.commit()
+    await db.refresh(db_patient)
     return db_patient
 
 @app.get("/patients", response_model=List[PatientResponse])
-def read_patients(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    patients = db.query(models.Patient).offset(skip).limit(limit).all()
-    return patients
+async def read_patients(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(models.Patient).offset(skip).limit(limit))
+    return result.scalars().all()
+
+def flush_live_streams(station_name: str):
+    # The decimated live view of a station shows the last samples of a recording that just ended
+    station = device_registry.station(station_name)
+    if station is not None:
+        station.manager.flush()
+
+@app.post("/recordings")
+async def start_recording(body: RecordingStart, db: AsyncSession = Depends(get_async_db)):
+    if await db.get(models.Patient, body.patient_id) is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    if device_registry.station(body.station) is None:
+        raise HTTPException(status_code=404, detail="Station not found")
+    recording = session_recorder.start(body.patient_id, body.station)
+    # Queued before any of its chunks, so the writer commits it first
+    try:
+        await session_writer.add(models.Recording(
+            id=recording.id, patient_id=recording.patient_id, station=recording.station,
+            started_at=recording.started_at,
+        ))
+    except Exception:
+        session_recorder.pop(recording.id)
+        raise HTTPException(status_code=503, detail="Recording could not be stored")
+    return recording.info()
+
+@app.get("/recordings")
+def list_recordings(patient_id: Optional[int] = None, station: Optional[str] = None):
+    return [
+        r.info() for r in session_recorder.recordings.values()
+        if (patient_id is None or r.patient_id == patient_id) and (station is None or r.station == station)
+    ]
+
+@app.post("/recordings/{recording_id}/stop")
+async def stop_recording(recording_id: str):
+    recording = session_recorder.stop(recording_id)
+    if recording is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    flush_live_streams(recording.station)
+    return recording.info()
+
+@app.delete("/recordings/{recording_id}")
+async def discard_recording(recording_id: str, db: AsyncSession = Depends(get_async_db)):
+    recording = session_recorder.pop(recording_id)
+    if recording is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    if recording.last_write is not None:
+        # Let queued chunks land first so none is left behind
+        await asyncio.gather(recording.last_write, return_exceptions=True)
+    await db.execute(delete(models.RecordingChunk).where(models.RecordingChunk.recording_id == recording_id))
+    await db.execute(delete(models.Recording).where(models.Recording.id == recording_id))
+    await db.commit()
+    return {"status": "success"}
+
+def prepare_session(db_session: models.Session, channels, overwrite: bool) -> models.Session:
+    metrics.apply_metrics(db_session, channels, overwrite=overwrite)
+    if db_session.recording_id is None:
+        # Raw samples are stored column-wise, see storage.py (recorded sessions keep their chunks)
+        storage.save_channels(db_session, channels)
+    return db_session
+
+def load_recording_channels(recording_id: str):
+    db = database.SessionLocal()
+    try:
+        return storage.load_recording_channels(db, recording_id)
+    finally:
+        db.close()
+
+def backfill_history_metrics(session_ids: List[int]) -> bool:
+    # Legacy blobs are decoded and reduced here, in a worker thread with its own session
+    db = database.SessionLocal()
+    try:
+        sessions = db.query(models.Session).filter(models.Session.id.in_(session_ids)).all()
+        if not metrics.backfill_metrics(db, sessions):
+            return False
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+def parse_raw_data_blob(raw_data_blob: str):
+    return storage.channels_from_rows(json.loads(raw_data_blob))
 
 @app.post("/sessions")
-def create_session(session: SessionCreate, db: Session = Depends(get_db)):
-    db_session = models.Session(**session.dict())
-    db.add(db_session)
-    db.commit()
-    db.refresh(db_session)
+async def create_session(session: SessionCreate):
+    if session.recording_id is not None:
+        recording = session_recorder.stop(session.recording_id)
+        if recording is None:
+            raise HTTPException(status_code=404, detail="Recording not found")
+        flush_live_streams(recording.station)
+        if recording.patient_id != session.patient_id:
+            raise HTTPException(status_code=400, detail="Recording belongs to another patient")
+        if len(recording) == 0:
+            raise HTTPException(status_code=400, detail="Recording has no samples")
+        if recording.last_write is not None:
+            # Every chunk is committed once the last one is (the writer keeps order)
+            await asyncio.gather(recording.last_write, return_exceptions=True)
+        # The samples are already stored: saving only adds the session and its metrics
+        channels = await asyncio.to_thread(load_recording_channels, recording.id)
+        if storage.TIMESTAMP_CHANNEL not in channels:
+            raise HTTPException(status_code=500, detail="Recording samples could not be stored")
+        db_session = models.Session(patient_id=session.patient_id, recording_id=recording.id)
+        overwrite = True
+    else:
+        fields = session.dict(exclude={"recording_id", "raw_data_blob"})
+        missing = [name for name, value in fields.items() if value is None]
+        if session.raw_data_blob is None:
+            missing.append("raw_data_blob")
+        if missing:
+            raise HTTPException(status_code=422, detail=f"Missing fields: {', '.join(missing)}")
+        try:
+            channels = await asyncio.to_thread(parse_raw_data_blob, session.raw_data_blob)
+        except (ValueError, TypeError, AttributeError):
+            raise HTTPException(status_code=422, detail="raw_data_blob is not valid session data")
+        db_session = models.Session(**fields)
+        # Client-computed values win; fill in the fields legacy clients do not send
+        overwrite = False
+
+    # Metrics and channel encoding off the event loop, the commit in the writer task
+    db_session = await asyncio.to_thread(prepare_session, db_session, channels, overwrite)
+    try:
+        db_session = await session_writer.add(db_session)
+    except RuntimeError:
+        # Server shutting down; a recording stays stopped and can be saved again
+        raise HTTPException(status_code=503, detail="Database writer not running")
+    if session.recording_id is not None:
+        session_recorder.pop(session.recording_id)
     return {"status": "success", "id": db_session.id}
 
-@app.get("/patients/{patient_id}/history")
-def get_history(patient_id: int, db: Session = Depends(get_db)):
-    sessions = db.query(models.Session).filter(models.Session.patient_id == patient_id).all()
+@app.get("/patients/{patient_id}/history", response_model=List[SessionSummary])
+async def get_history(patient_id: int, limit: Optional[int] = None, after: Optional[datetime.datetime] = None,
+                      after_id: Optional[int] = None, db: AsyncSession = Depends(get_async_db)):
+    # Summary columns only, oldest first: raw samples are fetched per session on demand.
+    # Keyset pagination: ?limit=50, then ?limit=50&after=<timestamp>&after_id=<id> of the
+    # last session received. Served by ix_sessions_patient_id_timestamp without a scan
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=422, detail="limit must be at least 1")
+    if after_id is not None and after is None:
+        raise HTTPException(status_code=422, detail="after_id requires after")
+    query = queries.patient_history(patient_id, limit, after, after_id)
+    sessions = (await db.execute(query)).scalars().all()
+    if not sessions:
+        return sessions
+    missing = (await db.execute(queries.sessions_without_metrics([s.id for s in sessions]))).scalars().all()
+    if missing and await asyncio.to_thread(backfill_history_metrics, missing):
+        # Reload the summary columns the backfill filled in
+        sessions = (await db.execute(query.execution_options(populate_existing=True))).scalars().all()
     return sessions
 
+@app.get("/sessions/{session_id}/metrics")
+def get_session_metrics(session_id: int, db: Session = Depends(get_db)):
+    db_session = db.get(models.Session, session_id)
+    if db_session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if metrics.backfill_metrics(db, [db_session]):
+        db.commit()
+    return metrics.metrics_dict(db_session)
+
+def json_values(values: np.ndarray) -> list:
+    # NaN marks samples without data (stale legs, legacy gaps); JSON has no NaN, so they go out as null
+    if values.dtype.kind == "f" and not np.isfinite(values).all():
+        return [None if value != value else value for value in values.tolist()]
+    return values.tolist()
+
+@app.get("/sessions/{session_id}/channels")
+def get_session_channels(session_id: int, names: Optional[str] = None,
+                         start: int = 0, count: Optional[int] = None, filtered: bool = False,
+                         db: Session = Depends(get_db)):
+    # ?names=ESQ_angle,DIR_angle selects channels, start/count select a sample range.
+    # ?filtered=true adds the dsp.py channels (ESQ_angle_lp, DIR_emg_env, ...), computed
+    # over the whole session exactly as the live chain does
+    if db.get(models.Session, session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if start < 0 or (count is not None and count < 0):
+        raise HTTPException(status_code=422, detail="start and count must be non-negative")
+    selected = names.split(",") if names else None
+    if filtered:
+        channels = storage.load_channels(db, session_id)
+        try:
+            fs = dsp.sample_rate(channels.get(storage.TIMESTAMP_CHANNEL), ALIGN_RATE)
+            channels.update(dsp.filter_channels(channels, recorder.LEGS, fs))
+        except KeyError as e:
+            raise HTTPException(status_code=422, detail=f"Session has no channel {e}")
+        if selected is not None:
+            channels = {name: values for name, values in channels.items() if name in selected}
+    else:
+        channels = storage.load_channels(db, session_id, selected)
+    total = max((len(values) for values in channels.values()), default=0)
+    end = total if count is None else min(total, start + count)
+    return {
+        "session_id": session_id,
+        "total": total,
+        "start": start,
+        "count": max(0, end - start),
+        "channels": {name: json_values(values[start:end]) for name, values in channels.items()},
+    }
+
+@app.get("/sessions/{session_id}/series")
+def get_session_series(session_id: int, width: int = 1000, names: Optional[str] = None,
+                       start_time: Optional[float] = None, end_time: Optional[float] = None,
+                       db: Session = Depends(get_db)):
+    # Chart-ready view: each channel LTTB-reduced to about `width` points.
+    # start_time/end_time are seconds from the first sample (sample numbers for
+    # legacy sessions stored without timestamps).
+    if db.get(models.Session, session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if width < downsample.MIN_LTTB_POINTS:
+        raise HTTPException(status_code=422, detail=f"width must be at least {downsample.MIN_LTTB_POINTS}")
+    selected = names.split(",") if names else None
+    if selected is not None:
+        selected.append(storage.TIMESTAMP_CHANNEL)
+    channels = storage.load_channels(db, session_id, selected)
+    timestamps = channels.pop(storage.TIMESTAMP_CHANNEL, None)
+    total = max((len(values) for values in channels.values()), default=0)
+    if timestamps is None or len(timestamps) != total:
+        timestamps = np.arange(total, dtype=np.float64)
+
+    offsets = timestamps - timestamps[0] if total else timestamps
+    lo = 0 if start_time is None else int(np.searchsorted(offsets, start_time, side="left"))
+    hi = total if end_time is None else int(np.searchsorted(offsets, end_time, side="right"))
+    series = {}
+    for name, values in channels.items():
+        x, y = downsample.lttb(timestamps[lo:hi], values[lo:hi], width)
+        series[name] = {"timestamp": x.tolist(), "values": y.tolist()}
+    return {
+        "session_id": session_id,
+        "total": total,
+        "start": lo,
+        "count": max(0, hi - lo),
+        "width": width,
+        "channels": series,
+    }
+
+# --- Devices & Stations ---
+@app.get("/devices")
+def list_devices():
+    return device_registry.info()
+
+@app.put("/devices/{device_id}")
+def assign_device(device_id: str, body: DeviceAssign, db: Session = Depends(get_db)):
+    if body.leg not in recorder.LEGS:
+        raise HTTPException(status_code=422, detail=f"leg must be one of {', '.join(recorder.LEGS)}")
+    db_device = db.get(models.Device, device_id)
+    if db_device is None:
+        db_device = models.Device(device_id=device_id)
+        db.add(db_device)
+    db_device.station = body.station
+    db_device.leg = body.leg
+    db.commit()
+    device_registry.assign(device_id, body.station, body.leg)
+    return {"device_id": device_id, "station": body.station, "leg": body.leg}
+
+@app.delete("/devices/{device_id}")
+def remove_device(device_id: str, db: Session = Depends(get_db)):
+    db_device = db.get(models.Device, device_id)
+    if db_device is None:
+        raise HTTPException(status_code=404, detail="Device not found")
+    db.delete(db_device)
+    db.commit()
+    device_registry.remove(device_id)
+    return {"status": "success"}
+
+# --- Calibration ---
+@app.get("/calibration")
+def list_calibration():
+    device_ids = sorted(set(device_registry.devices) | set(device_registry.profiles))
+    return [calibration.profile_dict(d, *device_registry.profile(d)) for d in device_ids]
+
+@app.get("/calibration/{device_id}")
+def get_calibration(device_id: str):
+    return calibration.profile_dict(device_id, *device_registry.profile(device_id))
+
+@app.put("/calibration/{device_id}")
+def update_calibration(device_id: str, body: CalibrationUpdate, db: Session = Depends(get_db)):
+    if body.angle_min is not None and body.angle_max is not None and body.angle_min > body.angle_max:
+        raise HTTPException(status_code=422, detail="angle_min must not exceed angle_max")
+    db_profile = db.get(models.CalibrationProfile, device_id)
+    if db_profile is None:
+        db_profile = models.CalibrationProfile(device_id=device_id)
+        db.add(db_profile)
+    for field, value in body.dict().items():
+        setattr(db_profile, field, value)
+    db.commit()
+    # Applied from the next ingest batch on, live and in running recordings
+    profile = calibration.from_model(db_profile)
+    device_registry.set_profile(device_id, profile)
+    return calibration.profile_dict(device_id, profile, True)
+
+@app.delete("/calibration/{device_id}")
+def reset_calibration(device_id: str, db: Session = Depends(get_db)):
+    # Back to the default of the device's leg
+    db_profile = db.get(models.CalibrationProfile, device_id)
+    if db_profile is None:
+        raise HTTPException(status_code=404, detail="Calibration profile not found")
+    db.delete(db_profile)
+    db.commit()
+    device_registry.set_profile(device_id, None)
+    return calibration.profile_dict(device_id, *device_registry.profile(device_id))
+
+@app.get("/stations")
+def list_stations():
+    devices = device_registry.info()
+    return [
+        {
+            "station": name,
+            "devices": [d for d in devices if d["station"] == name],
+            "clients": len(station.manager.active_connections),
+            "recordings": [r.id for r in session_recorder.recordings.values() if r.station == name and r.active],
+        }
+        for name, station in device_registry.stations.items()
+    ]
+
+@app.get("/live")
+async def get_live_window(seconds: float = 10, devices: Optional[str] = None,
+                          station: str = registry.DEFAULT_STATION):
+    # Backfill for (re)connecting dashboards: the last N seconds per device, column-wise.
+    # async so it runs on the event loop and never reads a buffer mid-write.
+    state = device_registry.station(station)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Station not found")
+    if seconds <= 0:
+        raise HTTPException(status_code=422, detail="seconds must be positive")
+    seconds = min(seconds, state.live_store.seconds)
+    selected = devices.split(",") if devices else None
+    window = state.live_store.window(seconds, selected)
+    return {
+        "station": station,
+        "seconds": seconds,
+        "devices": {
+            device: {name: values.tolist() for name, values in columns.items()}
+            for device, columns in window.items()
+        },
+    }
+
+@app.get("/ingest/stats")
+def get_ingest_stats():
+    if udp_protocol is None:
+        raise HTTPException(status_code=503, detail="UDP listener not running")
+    return {
+        **udp_protocol.stats.snapshot(),
+        "unknown_devices": device_registry.unknown_devices,
+        "devices": device_clocks.snapshot(),
+    }
+
+@app.get("/db/stats")
+def get_db_stats():
+    return {
+        "writer": session_writer.snapshot(),
+        "pool": database.async_engine.pool.status(),
+    }
+
+@app.get("/stream/stats")
+def get_stream_stats():
+    return {
+        "clients": [
+            {"station": name, **client}
+            for name, station in device_registry.stations.items()
+            for client in station.manager.stats()
+        ]
+    }
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, fps: Optional[float] = None, format: str = "json",
+                             pps: Optional[float] = None, view: str = dsp.DEFAULT_VIEW):
+    # The original single-station endpoint
+    await station_websocket_endpoint(websocket, registry.DEFAULT_STATION, fps, format, pps, view)
+
+@app.websocket("/ws/{station}")
+async def station_websocket_endpoint(websocket: WebSocket, station: str, fps: Optional[float] = None,
+                                     format: str = "json", pps: Optional[float] = None,
+                                     view: str = dsp.DEFAULT_VIEW):
+    # ?fps=N switches the client to coalesced frames sent at most N times per second,
+    # ?format=binary (or the binary subprotocol) to packed records,
+    # ?pps=N to min/max decimation at about N points per second per device, see streaming.py,
+    # and ?view=filtered|envelope|rms to filtered values, see dsp.py
+    state = device_registry.station(station)
+    if state is None or view not in dsp.VIEWS:
+        await websocket.close(code=1008)
+        return
+    manager = state.manager
+    await manager.connect(websocket, fps, binary=(format == "binary"), points_per_second=pps, view=view)
     try:
         while True:
             await websocket.receive_text()
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the writer task already closed a client that fell behind
+        pass
+    finally:
         manager.disconnect(websocket)
@@ -0,0 +1,117 @@
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import models
+import storage
+
+# --- Session Metrics ---
+# Computed once when a session is saved (or backfilled for older sessions)
+# and stored as SessionMetric rows; every consumer reads them from there.
+PERCENTILES = (5, 25, 50, 75, 95)
+PERCENTILE_FIELDS = ("p05", "p25", "p50", "p75", "p95")
+STAT_FIELDS = ("count", "min", "max", "delta", "mean", "std", "rms") + PERCENTILE_FIELDS
+
+
+def _float(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def channel_stats(channels: Dict[str, np.ndarray]) -> Dict[str, dict]:
+    """Statistics of every data channel; channels of equal length are reduced together as one matrix."""
+    # Non-finite samples (gaps in legacy sessions, stale legs) are dropped, as the analysis loader does
+    finite: Dict[str, np.ndarray] = {}
+    by_length: Dict[int, List[str]] = {}
+    for name, values in channels.items():
+        if name == storage.TIMESTAMP_CHANNEL:
+            continue
+        values = np.asarray(values, dtype=np.float64)
+        mask = np.isfinite(values)
+        if not mask.all():
+            values = values[mask]
+        if len(values) > 0:
+            finite[name] = values
+            by_length.setdefault(len(values), []).append(name)
+
+    stats = {}
+    for length, names in by_length.items():
+        matrix = np.vstack([finite[name] for name in names])
+        minimum = matrix.min(axis=1)
+        maximum = matrix.max(axis=1)
+        mean = matrix.mean(axis=1)
+        std = matrix.std(axis=1, ddof=1) if length > 1 else np.full(len(names), np.nan)
+        rms = np.sqrt(np.mean(np.square(matrix), axis=1))
+        percentiles = np.percentile(matrix, PERCENTILES, axis=1)
+
+        for i, name in enumerate(names):
+            row = {
+                "count": length,
+                "min": _float(minimum[i]),
+                "max": _float(maximum[i]),
+                "delta": _float(maximum[i] - minimum[i]),
+                "mean": _float(mean[i]),
+                "std": _float(std[i]),
+                "rms": _float(rms[i]),
+            }
+            for field, values in zip(PERCENTILE_FIELDS, percentiles):
+                row[field] = _float(values[i])
+            stats[name] = row
+    return stats
+
+
+def session_summary(stats: Dict[str, dict], channels: Dict[str, np.ndarray]) -> dict:
+    summary = {}
+    timestamps = channels.get(storage.TIMESTAMP_CHANNEL)
+    if timestamps is not None and len(timestamps) > 0:
+        summary["duration_seconds"] = float(timestamps[-1] - timestamps[0])
+
+    for leg in ("esq", "dir"):
+        prefix = leg.upper()
+        angle = stats.get(f"{prefix}_angle")
+        emg = stats.get(f"{prefix}_emg")
+        ecg = stats.get(f"{prefix}_ecg")
+
+        summary[f"max_angle_{leg}"] = angle["max"] if angle else None
+        summary[f"delta_angle_{leg}"] = angle["delta"] if angle else None
+        summary[f"mean_emg_{leg}"] = emg["mean"] if emg else None
+        summary[f"mean_ecg_{leg}"] = ecg["mean"] if ecg else None
+        # Average activation is EMG and ECG combined, as the dashboard reported it
+        if emg and ecg and emg["count"] == ecg["count"]:
+            summary[f"avg_emg_{leg}"] = (emg["mean"] + ecg["mean"]) / 2
+    return summary
+
+
+def apply_metrics(db_session: models.Session, channels: Dict[str, np.ndarray], overwrite: bool = True):
+    """Compute metrics for `channels`, attach them to the session and fill its summary columns."""
+    stats = channel_stats(channels)
+    db_session.metrics = [models.SessionMetric(channel=name, **row) for name, row in stats.items()]
+    for field, value in session_summary(stats, channels).items():
+        if value is not None and (overwrite or getattr(db_session, field) is None):
+            setattr(db_session, field, value)
+
+
+def backfill_metrics(db: Session, sessions: List[models.Session]) -> bool:
+    """Compute metrics of sessions saved before they existed. Returns True if any changed."""
+    if not sessions:
+        return False
+    ids = [s.id for s in sessions]
+    with_metrics = {
+        row[0] for row in
+        db.query(models.SessionMetric.session_id).filter(models.SessionMetric.session_id.in_(ids)).distinct()
+    }
+    changed = False
+    for db_session in sessions:
+        if db_session.id in with_metrics:
+            continue
+        channels = storage.load_channels(db, db_session.id)
+        if channels:
+            # Keep the values legacy clients computed, only fill the gaps
+            apply_metrics(db_session, channels, overwrite=False)
+            changed = True
+    return changed
+
+
+def metrics_dict(db_session: models.Session) -> Dict[str, dict]:
+    return {m.channel: {field: getattr(m, field) for field in STAT_FIELDS} for m in db_session.metrics}
@@ -0,0 +1,77 @@
+"""
+Convert legacy JSON raw_data_blob sessions into columnar SessionChannel rows.
+
+    python migrate_raw_blobs.py [--db clinic.db] [--compress] [--drop-json] [--vacuum]
+
+Sessions that already have channels are skipped, so the tool can be re-run.
+With --drop-json the JSON blob is cleared once its channels are written, and
+--vacuum then gives the freed pages back to the file system. Sessions without
+precomputed metrics get them computed as well.
+"""
+import argparse
+import json
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+import database
+import metrics
+import models
+import storage
+
+
+def migrate(db_path: str, compression: str, drop_json: bool) -> int:
+    engine = database.make_engine(f"sqlite:///{db_path}")
+    database.upgrade_schema(engine)
+    db = sessionmaker(bind=engine)()
+    converted = 0
+    try:
+        migrated_ids = {row[0] for row in db.query(models.SessionChannel.session_id).distinct()}
+        pending = db.query(models.Session.id).filter(models.Session.raw_data_blob.isnot(None)).all()
+        for (session_id,) in pending:
+            db_session = db.get(models.Session, session_id)
+            if session_id not in migrated_ids:
+                try:
+                    channels = storage.channels_from_rows(json.loads(db_session.raw_data_blob))
+                except (ValueError, TypeError, AttributeError) as e:
+                    print(f"  Session {session_id}: skipped, invalid JSON ({e})")
+                    continue
+                storage.save_channels(db_session, channels, compression)
+                converted += 1
+                print(f"  Session {session_id}: {len(channels)} channels")
+            if drop_json:
+                db_session.raw_data_blob = None
+            db.commit()
+            db.expunge_all()
+
+        for (session_id,) in db.query(models.Session.id).all():
+            if metrics.backfill_metrics(db, [db.get(models.Session, session_id)]):
+                db.commit()
+                print(f"  Session {session_id}: metrics computed")
+            db.expunge_all()
+    finally:
+        db.close()
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="clinic.db", help="Path to the SQLite database")
+    parser.add_argument("--compress", action="store_true", help="zlib-compress the channel blobs")
+    parser.add_argument("--drop-json", action="store_true", help="Clear raw_data_blob after conversion")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the database afterwards")
+    args = parser.parse_args()
+
+    compression = storage.COMPRESSION_ZLIB if args.compress else storage.COMPRESSION_NONE
+    converted = migrate(args.db, compression, args.drop_json)
+    print(f"Converted {converted} session(s)")
+
+    if args.vacuum:
+        engine = database.make_engine(f"sqlite:///{args.db}")
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+        print("Database vacuumed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+import database
+import models
+
+config = context.config
+if config.config_file_name is not None:
+    # Only when run through the alembic CLI; the server keeps its own logging
+    fileConfig(config.config_file_name)
+target_metadata = models.Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url") or database.SQLALCHEMY_DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # database.upgrade_schema passes its own connection; the alembic CLI does not
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    engine = database.make_engine(config.get_main_option("sqlalchemy.url") or database.SQLALCHEMY_DATABASE_URL)
+    try:
+        with engine.connect() as connection:
+            _run(connection)
+    finally:
+        engine.dispose()
+
+
+def _run(connection):
+    # SQLite cannot ALTER most things in place: batch mode recreates the table
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,115 @@
+"""baseline schema
+
+The tables as create_all() left them before migrations were introduced.
+database.upgrade_schema stamps existing databases with this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 20:01:21.525851
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('patients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_patients_id', 'patients', ['id'])
+    op.create_index('ix_patients_name', 'patients', ['name'])
+
+    op.create_table('devices',
+        sa.Column('device_id', sa.String(), nullable=False),
+        sa.Column('station', sa.String(), nullable=True),
+        sa.Column('leg', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('device_id'),
+    )
+    op.create_index('ix_devices_station', 'devices', ['station'])
+
+    op.create_table('calibration_profiles',
+        sa.Column('device_id', sa.String(), nullable=False),
+        sa.Column('angle_offset', sa.Float(), nullable=True),
+        sa.Column('angle_scale', sa.Float(), nullable=True),
+        sa.Column('angle_min', sa.Float(), nullable=True),
+        sa.Column('angle_max', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('device_id'),
+    )
+
+    op.create_table('sessions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('max_angle_esq', sa.Float(), nullable=True),
+        sa.Column('max_angle_dir', sa.Float(), nullable=True),
+        sa.Column('avg_emg_esq', sa.Float(), nullable=True),
+        sa.Column('avg_emg_dir', sa.Float(), nullable=True),
+        sa.Column('delta_angle_esq', sa.Float(), nullable=True),
+        sa.Column('delta_angle_dir', sa.Float(), nullable=True),
+        sa.Column('mean_emg_esq', sa.Float(), nullable=True),
+        sa.Column('mean_emg_dir', sa.Float(), nullable=True),
+        sa.Column('mean_ecg_esq', sa.Float(), nullable=True),
+        sa.Column('mean_ecg_dir', sa.Float(), nullable=True),
+        sa.Column('raw_data_blob', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_sessions_id', 'sessions', ['id'])
+
+    op.create_table('session_channels',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('dtype', sa.String(), nullable=True),
+        sa.Column('compression', sa.String(), nullable=True),
+        sa.Column('length', sa.Integer(), nullable=True),
+        sa.Column('data', sa.LargeBinary(), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['sessions.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('session_id', 'name'),
+    )
+    op.create_index('ix_session_channels_id', 'session_channels', ['id'])
+    op.create_index('ix_session_channels_session_id', 'session_channels', ['session_id'])
+
+    op.create_table('session_metrics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('channel', sa.String(), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=True),
+        sa.Column('min', sa.Float(), nullable=True),
+        sa.Column('max', sa.Float(), nullable=True),
+        sa.Column('delta', sa.Float(), nullable=True),
+        sa.Column('mean', sa.Float(), nullable=True),
+        sa.Column('std', sa.Float(), nullable=True),
+        sa.Column('rms', sa.Float(), nullable=True),
+        sa.Column('p05', sa.Float(), nullable=True),
+        sa.Column('p25', sa.Float(), nullable=True),
+        sa.Column('p50', sa.Float(), nullable=True),
+        sa.Column('p75', sa.Float(), nullable=True),
+        sa.Column('p95', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['sessions.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('session_id', 'channel'),
+    )
+    op.create_index('ix_session_metrics_id', 'session_metrics', ['id'])
+    op.create_index('ix_session_metrics_session_id', 'session_metrics', ['session_id'])
+
+
+def downgrade():
+    op.drop_table('session_metrics')
+    op.drop_table('session_channels')
+    op.drop_table('sessions')
+    op.drop_table('calibration_profiles')
+    op.drop_table('devices')
+    op.drop_table('patients')
@@ -0,0 +1,26 @@
+"""index sessions by patient and time
+
+Patient history filters on patient_id and orders by timestamp; without an
+index both mean a scan of the whole sessions table.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 20:10:04.118402
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_sessions_patient_id_timestamp', 'sessions', ['patient_id', 'timestamp'],
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_sessions_patient_id_timestamp', table_name='sessions')
@@ -0,0 +1,54 @@
+"""persist recordings in chunks
+
+Running recordings are written every few seconds to recording_chunks, and
+sessions saved from a recording point at its chunks instead of copying them.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 20:41:37.502913
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recordings',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=True),
+        sa.Column('station', sa.String(), nullable=True),
+        sa.Column('started_at', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table('recording_chunks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recording_id', sa.String(), nullable=True),
+        sa.Column('seq', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('dtype', sa.String(), nullable=True),
+        sa.Column('compression', sa.String(), nullable=True),
+        sa.Column('length', sa.Integer(), nullable=True),
+        sa.Column('data', sa.LargeBinary(), nullable=True),
+        sa.ForeignKeyConstraint(['recording_id'], ['recordings.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('recording_id', 'name', 'seq'),
+    )
+    with op.batch_alter_table('sessions') as batch_op:
+        batch_op.add_column(sa.Column('recording_id', sa.String(), nullable=True))
+        batch_op.create_foreign_key('fk_sessions_recording_id', 'recordings', ['recording_id'], ['id'])
+        batch_op.create_index('ix_sessions_recording_id', ['recording_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('sessions') as batch_op:
+        batch_op.drop_index('ix_sessions_recording_id')
+        batch_op.drop_constraint('fk_sessions_recording_id', type_='foreignkey')
+        batch_op.drop_column('recording_id')
+    op.drop_table('recording_chunks')
+    op.drop_table('recordings')
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from database import Base
 import datetime
@@ -12,8 +12,30 @@ class Patient(Base):
     
     sessions = relationship("Session", back_populates="patient")
 
+class Device(Base):
+    """Registry entry of one ESP32: the station (sensor pair) and leg its packets belong to"""
+    __tablename__ = "devices"
+
+    device_id = Column(String, primary_key=True)  # ID the firmware sends, e.g. "ESQ"
+    station = Column(String, index=True)
+    leg = Column(String)                          # "ESQ" or "DIR"
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class CalibrationProfile(Base):
+    """Angle calibration of one device: clip(scale * (raw + offset), min, max), see calibration.py"""
+    __tablename__ = "calibration_profiles"
+
+    device_id = Column(String, primary_key=True)
+    angle_offset = Column(Float, default=0.0)
+    angle_scale = Column(Float, default=1.0)
+    angle_min = Column(Float)                     # no lower clamp when NULL
+    angle_max = Column(Float)                     # no upper clamp when NULL
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
 class Session(Base):
     __tablename__ = "sessions"
+    # Patient history is always read by patient, in time order (see GET /patients/{id}/history)
+    __table_args__ = (Index("ix_sessions_patient_id_timestamp", "patient_id", "timestamp"),)
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"))
@@ -25,8 +47,83 @@ class Session(Base):
     max_angle_dir = Column(Float)
     avg_emg_esq = Column(Float)
     avg_emg_dir = Column(Float)
+    delta_angle_esq = Column(Float)
+    delta_angle_dir = Column(Float)
+    mean_emg_esq = Column(Float)
+    mean_emg_dir = Column(Float)
+    mean_ecg_esq = Column(Float)
+    mean_ecg_dir = Column(Float)
     
-    # Raw Data (stored as JSON string for simplicity in this prototype)
+    # Raw Data (legacy JSON string; new sessions store SessionChannel rows instead)
     raw_data_blob = Column(Text) 
+    # Sessions saved from a server-side recording keep its RecordingChunk rows as raw data
+    recording_id = Column(String, ForeignKey("recordings.id"), index=True)
 
     patient = relationship("Patient", back_populates="sessions")
+    channels = relationship("SessionChannel", back_populates="session", cascade="all, delete-orphan")
+    metrics = relationship("SessionMetric", back_populates="session", cascade="all, delete-orphan")
+
+class SessionChannel(Base):
+    """One channel of a session (timestamps, ESQ_angle, DIR_emg, ...) as a typed array blob"""
+    __tablename__ = "session_channels"
+    __table_args__ = (UniqueConstraint("session_id", "name"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"), index=True)
+    name = Column(String)
+    dtype = Column(String)        # NumPy dtype string, e.g. "<f4"
+    compression = Column(String)  # "none" or "zlib"
+    length = Column(Integer)
+    data = Column(LargeBinary)
+
+    session = relationship("Session", back_populates="channels")
+
+class SessionMetric(Base):
+    """Summary statistics of one channel of a session, computed when it is saved"""
+    __tablename__ = "session_metrics"
+    __table_args__ = (UniqueConstraint("session_id", "channel"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"), index=True)
+    channel = Column(String)      # e.g. "ESQ_angle", "DIR_emg"
+    count = Column(Integer)
+    min = Column(Float)
+    max = Column(Float)
+    delta = Column(Float)         # max - min
+    mean = Column(Float)
+    std = Column(Float)           # sample standard deviation (ddof=1)
+    rms = Column(Float)
+    p05 = Column(Float)
+    p25 = Column(Float)
+    p50 = Column(Float)
+    p75 = Column(Float)
+    p95 = Column(Float)
+
+    session = relationship("Session", back_populates="metrics")
+
+class Recording(Base):
+    """A server-side recording, persisted chunk by chunk while it runs (see recorder.py)"""
+    __tablename__ = "recordings"
+
+    id = Column(String, primary_key=True)         # recorder.Recording.id
+    patient_id = Column(Integer, ForeignKey("patients.id"))
+    station = Column(String)
+    started_at = Column(Float)                    # Unix time
+
+    chunks = relationship("RecordingChunk", back_populates="recording", cascade="all, delete-orphan")
+
+class RecordingChunk(Base):
+    """A few seconds of one channel of a recording, encoded like SessionChannel"""
+    __tablename__ = "recording_chunks"
+    __table_args__ = (UniqueConstraint("recording_id", "name", "seq"),)
+
+    id = Column(Integer, primary_key=True)
+    recording_id = Column(String, ForeignKey("recordings.id"))
+    seq = Column(Integer)         # chunk number within the recording
+    name = Column(String)
+    dtype = Column(String)
+    compression = Column(String)
+    length = Column(Integer)
+    data = Column(LargeBinary)
+
+    recording = relationship("Recording", back_populates="chunks")
@@ -0,0 +1,34 @@
+import datetime
+from typing import List, Optional
+
+from sqlalchemy import exists, select, tuple_
+from sqlalchemy.orm import defer
+
+import models
+
+# --- Hot Queries ---
+# Statements that must stay index-backed as clinic.db grows; shared by the
+# routes and check_query_plans.py, which fails if their plans turn into scans.
+
+
+def patient_history(patient_id: int, limit: Optional[int] = None, after: Optional[datetime.datetime] = None,
+                    after_id: Optional[int] = None):
+    """Sessions of a patient oldest first, optionally the page after (timestamp, id)."""
+    # Summary columns only: the legacy JSON blob is loaded on access, if ever
+    query = (select(models.Session).options(defer(models.Session.raw_data_blob))
+             .where(models.Session.patient_id == patient_id))
+    if after is not None:
+        if after.tzinfo is not None:
+            # Timestamps are stored as naive UTC
+            after = after.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        if after_id is None:
+            query = query.where(models.Session.timestamp > after)
+        else:
+            query = query.where(tuple_(models.Session.timestamp, models.Session.id) > tuple_(after, after_id))
+    return query.order_by(models.Session.timestamp, models.Session.id).limit(limit)
+
+
+def sessions_without_metrics(session_ids: List[int]):
+    """IDs among `session_ids` of sessions saved before metrics existed (see metrics.backfill_metrics)."""
+    has_metrics = exists().where(models.SessionMetric.session_id == models.Session.id)
+    return select(models.Session.id).where(models.Session.id.in_(session_ids), ~has_metrics)
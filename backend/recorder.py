@@ -0,0 +1,183 @@
+import time
+import uuid
+from array import array
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+LEGS = ("ESQ", "DIR")
+CHANNELS = ("angle", "emg", "ecg")
+# Angles arrive calibrated by the station; the uncalibrated value is kept too
+RECORDED_CHANNELS = ("angle", "angle_raw", "emg", "ecg")
+
+
+CHUNK_SECONDS = 2.0     # pending samples are written out as a chunk this often
+
+
+class Recording:
+    """
+    Samples of one session, recorded straight from the UDP listener.
+
+    Rows come from the station's alignment and calibration stages, one per
+    grid tick with both legs sampled at that instant, and are kept
+    column-wise in typed arrays rather than as a list of dicts. Only the
+    samples not yet written out are held in memory: every CHUNK_SECONDS the
+    SessionRecorder hands them to its chunk sink (main.py stores them as
+    RecordingChunk rows), so memory stays bounded however long the session
+    runs and a crash loses at most the last chunk.
+    """
+
+    def __init__(self, patient_id: int, station: str, recording_id: Optional[str] = None,
+                 started_at: Optional[float] = None):
+        self.id = recording_id or uuid.uuid4().hex
+        self.patient_id = patient_id
+        self.station = station
+        self.started_at = started_at or time.time()
+        self.stopped_at: Optional[float] = None
+        self.samples = 0            # written and pending
+        self.chunks = 0             # chunks handed to the sink
+        self.failed_chunks = 0
+        self.first_timestamp: Optional[float] = None
+        self.last_timestamp: Optional[float] = None
+        # What the sink returned for the latest chunk (an awaitable in main.py)
+        self.last_write = None
+        self._clear_pending()
+
+    @classmethod
+    def restored(cls, patient_id: int, station: str, recording_id: str, started_at: float,
+                 timestamps: np.ndarray, chunks: int) -> "Recording":
+        """A recording found in the database after a restart, stopped at its last stored sample."""
+        recording = cls(patient_id, station, recording_id, started_at)
+        recording.samples = len(timestamps)
+        recording.chunks = chunks
+        if len(timestamps):
+            recording.first_timestamp = float(timestamps[0])
+            recording.last_timestamp = float(timestamps[-1])
+        recording.stopped_at = recording.last_timestamp or started_at
+        return recording
+
+    def _clear_pending(self):
+        self.timestamps = array("d")
+        self.columns = {f"{leg}_{ch}": array("f") for leg in LEGS for ch in RECORDED_CHANNELS}
+
+    @property
+    def active(self) -> bool:
+        return self.stopped_at is None
+
+    def __len__(self):
+        return self.samples
+
+    def append(self, rows):
+        """Append alignment.AlignedRows."""
+        n = len(rows.timestamps)
+        if n == 0:
+            return
+        self.timestamps.frombytes(np.ascontiguousarray(rows.timestamps, dtype=np.float64).tobytes())
+        for name, column in self.columns.items():
+            column.frombytes(np.ascontiguousarray(rows.columns[name], dtype=np.float32).tobytes())
+        if self.first_timestamp is None:
+            self.first_timestamp = float(rows.timestamps[0])
+        self.last_timestamp = float(rows.timestamps[-1])
+        self.samples += n
+
+    def pending_seconds(self) -> float:
+        if len(self.timestamps) < 2:
+            return 0.0
+        return self.timestamps[-1] - self.timestamps[0]
+
+    def take_chunk(self) -> Optional[Dict[str, np.ndarray]]:
+        """Pending samples as channels (None if there are none); they are no longer kept here."""
+        if len(self.timestamps) == 0:
+            return None
+        # Zero-copy views; the arrays are replaced, not reused
+        channels = {"timestamp": np.frombuffer(self.timestamps, dtype=np.float64)}
+        for name, column in self.columns.items():
+            channels[name] = np.frombuffer(column, dtype=np.float32)
+        self._clear_pending()
+        return channels
+
+    def put_back(self, channels: Dict[str, np.ndarray]):
+        """Return a chunk from take_chunk that could not be written to the front of the pending samples."""
+        timestamps, columns = self.timestamps, self.columns
+        self._clear_pending()
+        self.timestamps.frombytes(np.ascontiguousarray(channels["timestamp"], dtype=np.float64).tobytes())
+        self.timestamps.extend(timestamps)
+        for name, column in self.columns.items():
+            column.frombytes(np.ascontiguousarray(channels[name], dtype=np.float32).tobytes())
+            column.extend(columns[name])
+
+    def duration_seconds(self) -> float:
+        if self.first_timestamp is None:
+            return 0.0
+        return self.last_timestamp - self.first_timestamp
+
+    def info(self) -> dict:
+        return {
+            "recording_id": self.id,
+            "patient_id": self.patient_id,
+            "station": self.station,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "active": self.active,
+            "samples": len(self),
+            "chunks": self.chunks,
+            "failed_chunks": self.failed_chunks,
+            "duration_seconds": self.duration_seconds(),
+        }
+
+
+class SessionRecorder:
+    """
+    Running and stopped (not yet saved) recordings.
+
+    `chunk_sink(recording, seq, channels)` persists one chunk; whatever it
+    returns is kept as the recording's `last_write`.
+    """
+
+    def __init__(self, chunk_sink: Callable, chunk_seconds: float = CHUNK_SECONDS):
+        self.chunk_sink = chunk_sink
+        self.chunk_seconds = chunk_seconds
+        self.recordings: Dict[str, Recording] = {}
+
+    def start(self, patient_id: int, station: str) -> Recording:
+        recording = Recording(patient_id, station)
+        self.recordings[recording.id] = recording
+        return recording
+
+    def restore(self, recording: Recording):
+        self.recordings[recording.id] = recording
+
+    def get(self, recording_id: str) -> Optional[Recording]:
+        return self.recordings.get(recording_id)
+
+    def stop(self, recording_id: str) -> Optional[Recording]:
+        """Stop a recording and write out its remaining samples."""
+        recording = self.recordings.get(recording_id)
+        if recording and recording.active:
+            recording.stopped_at = time.time()
+            self.flush(recording)
+        return recording
+
+    def pop(self, recording_id: str) -> Optional[Recording]:
+        return self.recordings.pop(recording_id, None)
+
+    def flush(self, recording: Recording):
+        channels = recording.take_chunk()
+        if channels is None:
+            return
+        try:
+            write = self.chunk_sink(recording, recording.chunks, channels)
+        except Exception as e:
+            # e.g. the database writer is stopped: the samples stay pending for the next flush
+            recording.put_back(channels)
+            print(f"Recording {recording.id}: chunk {recording.chunks} not written, kept pending: {e}")
+            return
+        recording.last_write = write
+        recording.chunks += 1
+
+    def record(self, station: str, rows):
+        for recording in self.recordings.values():
+            if recording.active and recording.station == station:
+                recording.append(rows)
+                if recording.pending_seconds() >= self.chunk_seconds:
+                    self.flush(recording)
@@ -0,0 +1,187 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import alignment
+import calibration
+import dsp
+import live_buffer
+import models
+import recorder
+import streaming
+
+# --- Device Registry ---
+# Maps the id an ESP32 sends in its packets to the station (one pair of leg
+# sensors and the dashboard watching it) and the leg it is strapped to.
+# Everything downstream of the registry (alignment, live buffers, recordings,
+# WebSocket frames) identifies samples by leg, so a station looks exactly like
+# the original single ESQ/DIR setup. The registry also holds the calibration
+# profile of every device and hands each station those of its legs.
+DEFAULT_STATION = "default"
+DEFAULT_DEVICES = {"ESQ": (DEFAULT_STATION, "ESQ"), "DIR": (DEFAULT_STATION, "DIR")}
+MAX_UNKNOWN_DEVICES = 64  # distinct unregistered ids tracked in the stats
+
+
+class Station:
+    """Per-station state: leg alignment, recent rows and the WebSocket clients watching it."""
+
+    def __init__(self, name: str, options: dict):
+        self.name = name
+        self.aligner = alignment.StreamAligner(
+            recorder.LEGS, options["align_rate"], options["align_method"], options["align_latency"]
+        )
+        # One aligned row per tick, so the ring buffers fill at the grid rate
+        self.live_store = live_buffer.LiveStore(recorder.LEGS, options["live_seconds"], options["align_rate"])
+        # Runs on every row even without subscribers, so filters are settled when one connects
+        self.filters = dsp.FilterChain(recorder.LEGS, options["align_rate"])
+        self.manager = streaming.ConnectionManager()
+        self.calibration: Dict[str, calibration.Profile] = {
+            leg: calibration.default_profile(leg) for leg in recorder.LEGS
+        }
+
+    def align(self, samples: list) -> alignment.AlignedRows:
+        """Aligned, calibrated rows (raw angles kept as <leg>_angle_raw)."""
+        return calibration.calibrate_rows(self.aligner.feed(samples), self.calibration)
+
+    def publish(self, rows: alignment.AlignedRows):
+        if len(rows.timestamps) == 0:
+            return
+        self.live_store.write_rows(rows)
+        derived = self.filters.process(rows.columns)
+        timestamps = rows.timestamps.tolist()
+        for view in self.manager.views():
+            # Only enqueues: per-client writer tasks do the sending
+            self.manager.broadcast(self._payloads(timestamps, rows.columns, derived, view), view)
+
+    def _payloads(self, timestamps: list, columns: dict, derived: dict, view: str) -> list:
+        # Clients keep receiving per-leg samples; both legs of a tick share its timestamp.
+        # A stale leg (NaN, see alignment.py) has no data, so it gets no sample at that tick.
+        present = {leg: np.isfinite(columns[f"{leg}_angle"]).tolist() for leg in recorder.LEGS}
+        sources = {}
+        for leg in recorder.LEGS:
+            for ch, suffix in dsp.VIEWS[view].items():
+                name = f"{leg}_{suffix}"
+                sources[f"{leg}_{ch}"] = (columns[name] if name in columns else derived[name]).tolist()
+        payloads = []
+        for i, timestamp in enumerate(timestamps):
+            for leg in recorder.LEGS:
+                if not present[leg][i]:
+                    continue
+                payloads.append({
+                    "id": leg,
+                    "timestamp": timestamp,
+                    "values": {
+                        "angle": sources[f"{leg}_angle"][i],
+                        "emg": sources[f"{leg}_emg"][i],
+                        "ecg": sources[f"{leg}_ecg"][i],
+                        "last_seen": timestamp
+                    }
+                })
+        return payloads
+
+
+class DeviceRegistry:
+    def __init__(self, live_seconds: float = live_buffer.DEFAULT_SECONDS,
+                 align_rate: float = alignment.DEFAULT_RATE, align_method: str = alignment.LINEAR,
+                 align_latency: float = alignment.DEFAULT_MAX_LATENCY):
+        self.station_options = {
+            "live_seconds": live_seconds,
+            "align_rate": align_rate,
+            "align_method": align_method,
+            "align_latency": align_latency,
+        }
+        self.stations: Dict[str, Station] = {}
+        self.devices: Dict[str, Tuple[Station, str]] = {}
+        self.profiles: Dict[str, calibration.Profile] = {}
+        self.unknown_devices: Dict[str, int] = {}
+
+    def load(self, db: Session):
+        """Read the registry from the database, seeding the original ESQ/DIR pair on first run."""
+        rows = db.query(models.Device).all()
+        if not rows:
+            rows = [models.Device(device_id=device_id, station=station, leg=leg)
+                    for device_id, (station, leg) in DEFAULT_DEVICES.items()]
+            db.add_all(rows)
+            db.commit()
+        profiles = db.query(models.CalibrationProfile).all()
+        if not profiles:
+            # The offsets the dashboard used to hardcode, now editable per device
+            profiles = [models.CalibrationProfile(device_id=device_id, **calibration.default_profile(leg)._asdict())
+                        for device_id, (_, leg) in DEFAULT_DEVICES.items()]
+            db.add_all(profiles)
+            db.commit()
+        self.devices.clear()
+        self.profiles = {row.device_id: calibration.from_model(row) for row in profiles}
+        for row in rows:
+            self.assign(row.device_id, row.station, row.leg)
+
+    def station(self, name: str) -> Optional[Station]:
+        return self.stations.get(name)
+
+    def assign(self, device_id: str, station: str, leg: str) -> Station:
+        if leg not in recorder.LEGS:
+            raise ValueError(f"Unknown leg: {leg}")
+        state = self.stations.get(station)
+        if state is None:
+            state = self.stations[station] = Station(station, self.station_options)
+        previous = self.devices.get(device_id)
+        self.devices[device_id] = (state, leg)
+        self.unknown_devices.pop(device_id, None)
+        self._refresh_calibration(state)
+        if previous is not None and previous[0] is not state:
+            self._refresh_calibration(previous[0])
+        return state
+
+    def remove(self, device_id: str) -> bool:
+        # The station keeps its state (and clients) even if its last device goes
+        removed = self.devices.pop(device_id, None)
+        if removed is not None:
+            self._refresh_calibration(removed[0])
+        return removed is not None
+
+    # --- Calibration ---
+    def profile(self, device_id: str) -> Tuple[calibration.Profile, bool]:
+        """Profile of a device and whether it is stored (otherwise the default of its leg)."""
+        if device_id in self.profiles:
+            return self.profiles[device_id], True
+        target = self.devices.get(device_id)
+        return calibration.default_profile(target[1] if target else None), False
+
+    def set_profile(self, device_id: str, profile: Optional[calibration.Profile]):
+        """Store (or with None, drop) a device's profile; applies from the next batch on."""
+        if profile is None:
+            self.profiles.pop(device_id, None)
+        else:
+            self.profiles[device_id] = profile
+        target = self.devices.get(device_id)
+        if target is not None:
+            self._refresh_calibration(target[0])
+
+    def _refresh_calibration(self, station: Station):
+        profiles = {leg: calibration.default_profile(leg) for leg in recorder.LEGS}
+        for device_id, (state, leg) in self.devices.items():
+            if state is station and device_id in self.profiles:
+                profiles[leg] = self.profiles[device_id]
+        station.calibration = profiles
+
+    def route(self, samples: list) -> Dict[Station, list]:
+        """Group samples by station, relabelled with their leg. Unregistered devices are counted and dropped."""
+        routed: Dict[Station, list] = {}
+        for sample in samples:
+            target = self.devices.get(sample.device_id)
+            if target is None:
+                if sample.device_id in self.unknown_devices or len(self.unknown_devices) < MAX_UNKNOWN_DEVICES:
+                    self.unknown_devices[sample.device_id] = self.unknown_devices.get(sample.device_id, 0) + 1
+                continue
+            station, leg = target
+            if sample.device_id != leg:
+                sample = sample._replace(device_id=leg)
+            routed.setdefault(station, []).append(sample)
+        return routed
+
+    def info(self) -> List[dict]:
+        return [
+            {"device_id": device_id, "station": station.name, "leg": leg}
+            for device_id, (station, leg) in self.devices.items()
+        ]
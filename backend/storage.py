@@ -0,0 +1,126 @@
+import json
+import zlib
+from typing import Dict, Iterable, List
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import models
+
+# --- Columnar Session Storage ---
+# Each channel of a session is one SessionChannel row holding the raw bytes
+# of a little-endian NumPy array, so loading it is a single np.frombuffer.
+# Sessions saved from a server-side recording reference its RecordingChunk
+# rows instead: the same encoding, a few seconds of one channel per row,
+# written while the recording ran and concatenated when loaded.
+TIMESTAMP_CHANNEL = "timestamp"
+TIMESTAMP_DTYPE = "<f8"
+FLOAT_DTYPE = "<f4"
+ADC_DTYPE = "<i2"           # 12-bit ADC readings (EMG/ECG) fit in int16
+ADC_SUFFIXES = ("_emg", "_ecg")
+
+COMPRESSION_NONE = "none"
+COMPRESSION_ZLIB = "zlib"
+DEFAULT_COMPRESSION = COMPRESSION_NONE
+
+
+def channel_dtype(name: str, values: np.ndarray) -> str:
+    if name == TIMESTAMP_CHANNEL:
+        return TIMESTAMP_DTYPE
+    if name.endswith(ADC_SUFFIXES):
+        info = np.iinfo(np.int16)
+        finite = values[np.isfinite(values)] if values.dtype.kind == "f" else values
+        if len(finite) == len(values) and np.all(finite == np.rint(finite)) \
+                and (len(finite) == 0 or (finite.min() >= info.min and finite.max() <= info.max)):
+            return ADC_DTYPE
+    return FLOAT_DTYPE
+
+
+def _encode(name: str, values, compression: str) -> dict:
+    values = np.asarray(values)
+    dtype = channel_dtype(name, values)
+    data = np.ascontiguousarray(values.astype(dtype, copy=False)).tobytes()
+    if compression == COMPRESSION_ZLIB:
+        data = zlib.compress(data)
+    elif compression != COMPRESSION_NONE:
+        raise ValueError(f"Unknown compression: {compression}")
+    return {"name": name, "dtype": dtype, "compression": compression, "length": len(values), "data": data}
+
+
+def encode_channel(name: str, values, compression: str = DEFAULT_COMPRESSION) -> models.SessionChannel:
+    return models.SessionChannel(**_encode(name, values, compression))
+
+
+def encode_chunk(recording_id: str, seq: int, channels: Dict[str, np.ndarray],
+                 compression: str = DEFAULT_COMPRESSION) -> List[models.RecordingChunk]:
+    """One RecordingChunk row per channel of a slice of a running recording."""
+    return [
+        models.RecordingChunk(recording_id=recording_id, seq=seq, **_encode(name, values, compression))
+        for name, values in channels.items()
+    ]
+
+
+def decode_channel(channel) -> np.ndarray:
+    """Array of a SessionChannel or RecordingChunk row."""
+    data = channel.data
+    if channel.compression == COMPRESSION_ZLIB:
+        data = zlib.decompress(data)
+    return np.frombuffer(data, dtype=channel.dtype, count=channel.length)
+
+
+def channels_from_rows(rows: List[dict]) -> Dict[str, np.ndarray]:
+    """Convert a legacy raw_data_blob (list of per-sample dicts) into columns."""
+    if isinstance(rows, dict):
+        # Older dict-of-lists layout
+        return {name: np.asarray(values, dtype=float) for name, values in rows.items()
+                if isinstance(values, list)}
+
+    names = []
+    for row in rows:
+        for key in row:
+            if key not in names and key != "time":
+                names.append(key)
+    return {
+        name: np.array([row.get(name, np.nan) for row in rows], dtype=float)
+        for name in names
+    }
+
+
+def save_channels(db_session: models.Session, channels: Dict[str, np.ndarray],
+                  compression: str = DEFAULT_COMPRESSION):
+    for name, values in channels.items():
+        db_session.channels.append(encode_channel(name, values, compression))
+
+
+def load_channels(db: Session, session_id: int, names: Iterable[str] = None) -> Dict[str, np.ndarray]:
+    query = db.query(models.SessionChannel).filter(models.SessionChannel.session_id == session_id)
+    if names is not None:
+        names = set(names)
+        query = query.filter(models.SessionChannel.name.in_(names))
+    channels = {row.name: decode_channel(row) for row in query.all()}
+    if channels:
+        return channels
+
+    db_session = db.get(models.Session, session_id)
+    if db_session is None:
+        return {}
+    if db_session.recording_id is not None:
+        return load_recording_channels(db, db_session.recording_id, names)
+    # Sessions saved before the columnar format and not migrated yet
+    if not db_session.raw_data_blob:
+        return {}
+    channels = channels_from_rows(json.loads(db_session.raw_data_blob))
+    if names is not None:
+        channels = {name: values for name, values in channels.items() if name in names}
+    return channels
+
+
+def load_recording_channels(db: Session, recording_id: str, names: Iterable[str] = None) -> Dict[str, np.ndarray]:
+    """Channels of a recording, stitched together from its chunks."""
+    query = db.query(models.RecordingChunk).filter(models.RecordingChunk.recording_id == recording_id)
+    if names is not None:
+        query = query.filter(models.RecordingChunk.name.in_(set(names)))
+    parts: Dict[str, List[np.ndarray]] = {}
+    for row in query.order_by(models.RecordingChunk.name, models.RecordingChunk.seq):
+        parts.setdefault(row.name, []).append(decode_channel(row))
+    return {name: np.concatenate(arrays) for name, arrays in parts.items()}
@@ -0,0 +1,225 @@
+import asyncio
+import math
+import struct
+from collections import deque
+from typing import Dict, List, Optional
+
+from fastapi import WebSocket
+
+import downsample
+import dsp
+
+# --- Fan-out Configuration ---
+MAX_FPS = 120
+MIN_POINTS_PER_SECOND = 2
+CLIENT_QUEUE_SIZE = 2048        # samples buffered per client before the oldest are dropped
+MAX_SAMPLES_PER_FRAME = 512     # larger backlogs are downsampled into one frame
+SEND_TIMEOUT = 5.0              # a client that cannot take a frame in this time is dropped
+IDLE_FLUSH_SECONDS = 0.5        # a decimated stream silent this long gets its unfinished bucket
+
+# --- Binary Frame Format ---
+# Opt-in with ?format=binary or the BINARY_SUBPROTOCOL WebSocket subprotocol.
+# One frame = 8 byte header followed by `count` fixed-width records, all
+# little-endian:
+#   header: magic b"HT" | version u8 | reserved u8 | count u32
+#   record: device id 4 bytes ASCII (NUL padded) | timestamp f64 (epoch s)
+#           | angle f32 | emg f32 | ecg f32
+BINARY_SUBPROTOCOL = "hiptech.binary.v1"
+BINARY_VERSION = 1
+FRAME_HEADER = struct.Struct("<2sBBI")
+FRAME_RECORD = struct.Struct("<4sdfff")
+
+
+def encode_binary_frame(samples: List[dict]) -> bytes:
+    buffer = bytearray(FRAME_HEADER.size + FRAME_RECORD.size * len(samples))
+    FRAME_HEADER.pack_into(buffer, 0, b"HT", BINARY_VERSION, 0, len(samples))
+    offset = FRAME_HEADER.size
+    for sample in samples:
+        values = sample["values"]
+        FRAME_RECORD.pack_into(
+            buffer, offset, sample["id"].encode("ascii", "replace")[:4], sample["timestamp"],
+            values["angle"], values["emg"], values["ecg"]
+        )
+        offset += FRAME_RECORD.size
+    return bytes(buffer)
+
+
+def decode_binary_frame(frame: bytes) -> List[dict]:
+    magic, version, _, count = FRAME_HEADER.unpack_from(frame, 0)
+    if magic != b"HT" or version != BINARY_VERSION:
+        raise ValueError("not a HipTech binary frame")
+    samples = []
+    for dev_id, timestamp, angle, emg, ecg in FRAME_RECORD.iter_unpack(
+        frame[FRAME_HEADER.size:FRAME_HEADER.size + FRAME_RECORD.size * count]
+    ):
+        samples.append({
+            "id": dev_id.rstrip(b"\0").decode("ascii"),
+            "timestamp": timestamp,
+            "values": {"angle": angle, "emg": emg, "ecg": ecg},
+        })
+    return samples
+
+
+class ClientStream:
+    """
+    Per-client bounded queue drained by its own writer task.
+
+    With `fps` set, everything queued since the previous frame is sent as a
+    single `{"type": "batch", "samples": [...]}` message (or one binary
+    frame), at most `fps` times per second. Binary clients without `fps` get
+    a frame as soon as samples are queued. Otherwise every sample is sent as
+    its own legacy `{"type": "data", ...}` message. Either way ingest only
+    appends to the queue and never waits on the socket.
+
+    With `points_per_second` set, samples are min/max decimated per device
+    before sending, see downsample.MinMaxDecimator. The bucket still filling
+    is sent once the samples stop for IDLE_FLUSH_SECONDS or on flush(), so
+    the tail of the view is never lost. `view` selects raw or filtered
+    values, see dsp.VIEWS.
+    """
+
+    def __init__(self, websocket: WebSocket, fps: Optional[float] = None, binary: bool = False,
+                 points_per_second: Optional[float] = None, view: str = dsp.DEFAULT_VIEW):
+        self.websocket = websocket
+        self.view = view
+        self.fps = fps
+        self.binary = binary
+        self.points_per_second = points_per_second
+        self.decimator = downsample.MinMaxDecimator(points_per_second) if points_per_second else None
+        self.queue: deque = deque(maxlen=CLIENT_QUEUE_SIZE)
+        self.dropped = 0
+        self.frames_sent = 0
+        self.task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._flush = False
+
+    def push(self, samples: List[dict]):
+        overflow = len(self.queue) + len(samples) - CLIENT_QUEUE_SIZE
+        if overflow > 0:
+            self.dropped += overflow
+        self.queue.extend(samples)
+        self._wakeup.set()
+
+    def flush(self):
+        """Send the decimator's unfinished buckets with the next frame."""
+        if self.decimator is not None:
+            self._flush = True
+            self._wakeup.set()
+
+    def _take(self) -> List[dict]:
+        samples = list(self.queue)
+        self.queue.clear()
+        return samples
+
+    async def _send(self, message: dict):
+        await asyncio.wait_for(self.websocket.send_json(message), SEND_TIMEOUT)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.fps if self.fps else 0.0
+        while True:
+            if self.decimator is not None and self.decimator.pending():
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), IDLE_FLUSH_SECONDS)
+                except asyncio.TimeoutError:
+                    # The samples stopped mid-bucket: send what it holds
+                    self._flush = True
+            else:
+                await self._wakeup.wait()
+            self._wakeup.clear()
+            started = loop.time()
+            samples = self._take()
+            if self.decimator is not None:
+                samples = self.decimator.feed(samples)
+                if self._flush:
+                    self._flush = False
+                    samples += self.decimator.flush()
+                if not samples:
+                    # Only an unfinished bucket so far; keep the frame pacing
+                    await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+                    continue
+
+            if not self.fps and not self.binary:
+                for sample in samples:
+                    await self._send({"type": "data", **sample})
+                continue
+
+            if len(samples) > MAX_SAMPLES_PER_FRAME:
+                # Client fell behind: keep an evenly spaced subset of the backlog
+                stride = math.ceil(len(samples) / MAX_SAMPLES_PER_FRAME)
+                kept = samples[::stride]
+                self.dropped += len(samples) - len(kept)
+                samples = kept
+
+            if self.binary:
+                await asyncio.wait_for(self.websocket.send_bytes(encode_binary_frame(samples)), SEND_TIMEOUT)
+            else:
+                await self._send({"type": "batch", "samples": samples})
+            self.frames_sent += 1
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+
+    def stats(self) -> dict:
+        return {
+            "fps": self.fps,
+            "points_per_second": self.points_per_second,
+            "view": self.view,
+            "format": "binary" if self.binary else "json",
+            "queued": len(self.queue),
+            "dropped": self.dropped,
+            "frames_sent": self.frames_sent,
+        }
+
+
+class ConnectionManager:
+    def __init__(self):
+        self.active_connections: Dict[WebSocket, ClientStream] = {}
+
+    async def connect(self, websocket: WebSocket, fps: Optional[float] = None, binary: bool = False,
+                      points_per_second: Optional[float] = None, view: str = dsp.DEFAULT_VIEW):
+        requested = websocket.scope.get("subprotocols", [])
+        if BINARY_SUBPROTOCOL in requested:
+            binary = True
+            await websocket.accept(subprotocol=BINARY_SUBPROTOCOL)
+        else:
+            await websocket.accept()
+        if fps is not None:
+            fps = min(max(fps, 1.0), MAX_FPS)
+        if points_per_second is not None:
+            points_per_second = max(points_per_second, MIN_POINTS_PER_SECOND)
+        stream = ClientStream(websocket, fps, binary, points_per_second, view)
+        self.active_connections[websocket] = stream
+        stream.task = asyncio.create_task(self._run_writer(stream))
+
+    def disconnect(self, websocket: WebSocket):
+        stream = self.active_connections.pop(websocket, None)
+        if stream and stream.task:
+            stream.task.cancel()
+
+    async def _run_writer(self, stream: ClientStream):
+        try:
+            await stream.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Slow or vanished client: stop feeding it and close the socket
+            self.active_connections.pop(stream.websocket, None)
+            try:
+                await stream.websocket.close()
+            except Exception:
+                pass
+
+    def flush(self):
+        """Send every client's unfinished decimation buckets (e.g. a recording ended)."""
+        for stream in self.active_connections.values():
+            stream.flush()
+
+    def views(self) -> set:
+        return {stream.view for stream in self.active_connections.values()}
+
+    def broadcast(self, samples: List[dict], view: str = dsp.DEFAULT_VIEW):
+        for stream in list(self.active_connections.values()):
+            if stream.view == view:
+                stream.push(samples)
+
+    def stats(self) -> List[dict]:
+        return [stream.stats() for stream in self.active_connections.values()]
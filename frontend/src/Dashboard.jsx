@@ -4,12 +4,42 @@ import { Activity, Wifi, WifiOff, User, Save, RotateCcw, StopCircle, ArrowLeft }
 import { useParams, useLocation, useNavigate } from 'react-router-dom';
 
 const MAX_DATA_POINTS = 100;
+const STREAM_FPS = 30; // Coalesced frames per second requested from the backend
+const STREAM_POINTS_PER_SECOND = 50; // Per device; the backend min/max decimates to this rate, keeping EMG peaks
+const STREAM_VIEW = 'raw'; // Or 'filtered', 'envelope', 'rms' (see backend/dsp.py), 'uncalibrated'
+const BACKFILL_SECONDS = 10; // History fetched from the backend ring buffer on (re)connect
+
+// Binary frame layout (see backend/streaming.py): 8 byte header, then 24 byte little-endian records
+const FRAME_HEADER_SIZE = 8;
+const FRAME_RECORD_SIZE = 24;
+const deviceIdDecoder = new TextDecoder('ascii');
+
+const decodeBinaryFrame = (buffer) => {
+    const view = new DataView(buffer);
+    const count = view.getUint32(4, true);
+    const samples = new Array(count);
+    for (let i = 0; i < count; i++) {
+        const offset = FRAME_HEADER_SIZE + i * FRAME_RECORD_SIZE;
+        samples[i] = {
+            id: deviceIdDecoder.decode(new Uint8Array(buffer, offset, 4)).replace(/\0+$/, ''),
+            timestamp: view.getFloat64(offset + 4, true),
+            values: {
+                angle: view.getFloat32(offset + 12, true),
+                emg: view.getFloat32(offset + 16, true),
+                ecg: view.getFloat32(offset + 20, true)
+            }
+        };
+    }
+    return samples;
+};
 
 function Dashboard() {
     const { id } = useParams();
     const location = useLocation();
     const navigate = useNavigate();
     const patient = location.state?.patient || { name: "Paciente", id: id };
+    // Sensor pair to watch, e.g. /dashboard/3?station=sala2 (see GET /stations)
+    const station = new URLSearchParams(location.search).get('station') || 'default';
 
     const [connected, setConnected] = useState(false);
     const [data, setData] = useState([]);
@@ -21,25 +51,48 @@ function Dashboard() {
     const [showSaveOptions, setShowSaveOptions] = useState(false);
 
     const ws = useRef(null);
-    const sessionDataRef = useRef([]);
+    const recordingIdRef = useRef(null); // Samples are recorded by the backend, not kept in the browser
     const latestValuesRef = useRef({
         ESQ: { angle: 0, emg: 0, ecg: 0 },
         DIR: { angle: 0, emg: 0, ecg: 0 }
     });
 
     useEffect(() => {
+        startRecording();
         connectWebSocket();
         return () => {
             if (ws.current) ws.current.close();
         };
     }, []);
 
+    const startRecording = async () => {
+        try {
+            // Resume a recording left running for this patient (e.g. tab closed or reloaded)
+            const res = await fetch(`http://localhost:8000/recordings?patient_id=${patient.id}&station=${station}`);
+            const open = (await res.json()).find(r => r.active);
+            if (open) {
+                recordingIdRef.current = open.recording_id;
+                return;
+            }
+            const started = await fetch('http://localhost:8000/recordings', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ patient_id: Number(patient.id), station })
+            });
+            recordingIdRef.current = (await started.json()).recording_id;
+        } catch (err) {
+            console.error("Error starting recording:", err);
+        }
+    };
+
     const connectWebSocket = () => {
-        ws.current = new WebSocket('ws://localhost:8000/ws');
+        ws.current = new WebSocket(`ws://localhost:8000/ws/${station}?fps=${STREAM_FPS}&pps=${STREAM_POINTS_PER_SECOND}&view=${STREAM_VIEW}&format=binary`);
+        ws.current.binaryType = 'arraybuffer';
 
         ws.current.onopen = () => {
             setConnected(true);
             console.log('Connected to WebSocket');
+            backfillCharts();
         };
 
         ws.current.onclose = () => {
@@ -51,127 +104,136 @@ function Dashboard() {
         ws.current.onmessage = (event) => {
             if (!isSessionActive) return; // Don't update if stopped
 
+            if (event.data instanceof ArrayBuffer) {
+                handleSamples(decodeBinaryFrame(event.data));
+                return;
+            }
+
             const message = JSON.parse(event.data);
-            if (message.type === 'data') {
-                const { id: rawId, values, timestamp } = message;
-                const deviceId = rawId.trim(); // Handle potential whitespace and avoid shadowing
-
-                // Calibration Offsets (Hardware Correction)
-                const LEFT_LEG_OFFSET = 26; // Fine tuning: 36 - 10 = 26 to raise the graph by 10 degrees
-
-                // Apply specific calibration per leg
-                let calibratedAngle = values.angle;
-
-                if (deviceId === 'ESQ') {
-                    // Invert direction: -(Raw + Offset)
-                    calibratedAngle = -(values.angle + LEFT_LEG_OFFSET);
-                } else if (deviceId === 'DIR') {
-                    // Right Leg: Original (Raw)
-                    calibratedAngle = values.angle;
-                }
-
-                // Clamp to 0 to prevent negative values (Hyperextension/Noise)
-                calibratedAngle = Math.max(0, calibratedAngle);
-
-                // Update Latest Values Ref (Merge State)
-                latestValuesRef.current[deviceId] = {
-                    ...values,
-                    angle: calibratedAngle
-                };
-
-                // Update Current Values (Instant)
-                setCurrentValues(prev => ({
-                    ...prev,
-                    [deviceId]: {
-                        ...values,
-                        angle: calibratedAngle
-                    }
-                }));
-
-                // Create Data Point using MERGED state from both legs
-                const newDataPoint = {
-                    time: new Date().toLocaleTimeString(),
-                    ESQ_angle: latestValuesRef.current.ESQ.angle,
-                    ESQ_emg: latestValuesRef.current.ESQ.emg,
-                    ESQ_ecg: latestValuesRef.current.ESQ.ecg,
-                    DIR_angle: latestValuesRef.current.DIR.angle,
-                    DIR_emg: latestValuesRef.current.DIR.emg,
-                    DIR_ecg: latestValuesRef.current.DIR.ecg
-                };
-
-                // Accumulate ALL data for saving (Full History)
-                sessionDataRef.current.push(newDataPoint);
-
-                // Update Graph Data (Windowed History for UI)
-                setData(prevData => {
-                    const newData = [...prevData, newDataPoint];
-                    if (newData.length > MAX_DATA_POINTS) newData.shift();
-                    return newData;
-                });
+            if (message.type === 'batch') {
+                handleSamples(message.samples);
+            } else if (message.type === 'data') {
+                handleSamples([message]);
             }
         };
     };
 
-    const handleStop = () => {
+    // Fills the charts with the last seconds kept by the backend instead of starting empty
+    const backfillCharts = async () => {
+        try {
+            const res = await fetch(`http://localhost:8000/live?station=${station}&seconds=${BACKFILL_SECONDS}`);
+            const { devices } = await res.json();
+            const samples = [];
+            for (const [deviceId, columns] of Object.entries(devices)) {
+                columns.timestamp.forEach((timestamp, i) => {
+                    samples.push({
+                        id: deviceId,
+                        timestamp,
+                        values: { angle: columns.angle[i], emg: columns.emg[i], ecg: columns.ecg[i] }
+                    });
+                });
+            }
+            samples.sort((a, b) => a.timestamp - b.timestamp);
+            setData([]);
+            handleSamples(samples);
+        } catch (err) {
+            console.error("Error loading live history:", err);
+        }
+    };
+
+    // Applies one frame of samples: a single state update per frame instead of per sample
+    const handleSamples = (samples) => {
+        // Both legs of an aligned row share its timestamp, but the decimated stream (?pps=)
+        // sends each device's buckets in turn (ESQ t0, t1, then DIR t0, t1): group by
+        // timestamp so every instant becomes a single data point, in time order
+        const rows = new Map();
+        samples.forEach(({ id: rawId, timestamp, values }) => {
+            const deviceId = rawId.trim(); // Handle potential whitespace and avoid shadowing
+            if (!rows.has(timestamp)) rows.set(timestamp, []);
+            rows.get(timestamp).push([deviceId, values]);
+        });
+
+        const newDataPoints = [];
+        [...rows.keys()].sort((a, b) => a - b).forEach((timestamp) => {
+            // Angles arrive calibrated by the backend (per-device profiles, see GET /calibration)
+            rows.get(timestamp).forEach(([deviceId, values]) => {
+                latestValuesRef.current[deviceId] = values;
+            });
+
+            // Create Data Point using MERGED state from both legs
+            newDataPoints.push({
+                time: new Date(timestamp * 1000).toLocaleTimeString(),
+                ESQ_angle: latestValuesRef.current.ESQ.angle,
+                ESQ_emg: latestValuesRef.current.ESQ.emg,
+                ESQ_ecg: latestValuesRef.current.ESQ.ecg,
+                DIR_angle: latestValuesRef.current.DIR.angle,
+                DIR_emg: latestValuesRef.current.DIR.emg,
+                DIR_ecg: latestValuesRef.current.DIR.ecg
+            });
+        });
+
+        if (newDataPoints.length === 0) return;
+
+        // Update Current Values (Instant)
+        setCurrentValues({
+            ESQ: latestValuesRef.current.ESQ,
+            DIR: latestValuesRef.current.DIR
+        });
+
+        // Update Graph Data (Windowed History for UI)
+        setData(prevData => {
+            const newData = prevData.concat(newDataPoints);
+            return newData.length > MAX_DATA_POINTS ? newData.slice(-MAX_DATA_POINTS) : newData;
+        });
+    };
+
+    const handleStop = async () => {
         setIsSessionActive(false);
         setShowSaveOptions(true);
+        if (recordingIdRef.current) {
+            await fetch(`http://localhost:8000/recordings/${recordingIdRef.current}/stop`, { method: 'POST' });
+        }
     };
 
-    const handleRestart = () => {
+    const handleRestart = async () => {
         setData([]);
-        sessionDataRef.current = []; // Clear full history
         latestValuesRef.current = { // Reset latest values
             ESQ: { angle: 0, emg: 0, ecg: 0 },
             DIR: { angle: 0, emg: 0, ecg: 0 }
         };
+        if (recordingIdRef.current) {
+            // Discard the stopped recording and start a fresh one
+            await fetch(`http://localhost:8000/recordings/${recordingIdRef.current}`, { method: 'DELETE' });
+            recordingIdRef.current = null;
+        }
+        await startRecording();
         setIsSessionActive(true);
         setShowSaveOptions(false);
     };
 
     const handleSave = async () => {
         try {
-            const fullSessionData = sessionDataRef.current;
-
-            if (fullSessionData.length === 0) {
+            if (!recordingIdRef.current) {
                 alert("Nenhum dado coletado para salvar.");
                 return;
             }
 
-            // Calculate simple stats for the session using FULL data
-            const maxAngleEsq = Math.max(...fullSessionData.map(d => d.ESQ_angle || 0), 0);
-            const maxAngleDir = Math.max(...fullSessionData.map(d => d.DIR_angle || 0), 0);
-
-            // Calculate Average Muscle Activation (EMG + ECG combined)
-            // Since ECG is used as a second EMG channel, we average them to get a "Total Activation" metric
-            const avgEmgEsq = fullSessionData.reduce((acc, curr) => {
-                const val = ((curr.ESQ_emg || 0) + (curr.ESQ_ecg || 0)) / 2;
-                return acc + val;
-            }, 0) / (fullSessionData.length || 1);
-
-            const avgEmgDir = fullSessionData.reduce((acc, curr) => {
-                const val = ((curr.DIR_emg || 0) + (curr.DIR_ecg || 0)) / 2;
-                return acc + val;
-            }, 0) / (fullSessionData.length || 1);
-
-            const sessionData = {
-                patient_id: patient.id,
-                duration_seconds: fullSessionData.length * 0.1, // Approx, assuming 10Hz
-                max_angle_esq: maxAngleEsq,
-                max_angle_dir: maxAngleDir,
-                avg_emg_esq: avgEmgEsq,
-                avg_emg_dir: avgEmgDir,
-                raw_data_blob: JSON.stringify(fullSessionData)
-            };
-
+            // The backend finalises its own recording and computes the session stats
             const res = await fetch('http://localhost:8000/sessions', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(sessionData)
+                body: JSON.stringify({
+                    patient_id: Number(patient.id),
+                    recording_id: recordingIdRef.current
+                })
             });
 
             if (res.ok) {
+                recordingIdRef.current = null;
                 alert("Sessão salva com sucesso!");
                 navigate(`/patient/${patient.id}`, { state: { patient } });
+            } else if (res.status === 400) {
+                alert("Nenhum dado coletado para salvar.");
             } else {
                 alert("Erro ao salvar sessão.");
             }
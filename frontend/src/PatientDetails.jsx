@@ -18,45 +18,17 @@ function PatientDetails() {
         try {
             const res = await fetch(`http://localhost:8000/patients/${id}/history`);
             const data = await res.json();
-            // Format data for chart
-            const formattedData = data.map(session => {
-                let avgEmgEsq = session.avg_emg_esq;
-                let avgEmgDir = session.avg_emg_dir;
-                let avgEcgEsq = 0;
-                let avgEcgDir = 0;
-
-                // Try to parse raw data to get separate averages if available
-                if (session.raw_data_blob) {
-                    try {
-                        const rawData = JSON.parse(session.raw_data_blob);
-                        if (Array.isArray(rawData) && rawData.length > 0) {
-                            // Calculate averages from raw data
-                            const sumEmgEsq = rawData.reduce((acc, curr) => acc + (curr.ESQ_emg || 0), 0);
-                            const sumEmgDir = rawData.reduce((acc, curr) => acc + (curr.DIR_emg || 0), 0);
-                            const sumEcgEsq = rawData.reduce((acc, curr) => acc + (curr.ESQ_ecg || 0), 0);
-                            const sumEcgDir = rawData.reduce((acc, curr) => acc + (curr.DIR_ecg || 0), 0);
-
-                            avgEmgEsq = sumEmgEsq / rawData.length;
-                            avgEmgDir = sumEmgDir / rawData.length;
-                            avgEcgEsq = sumEcgEsq / rawData.length;
-                            avgEcgDir = sumEcgDir / rawData.length;
-                        }
-                    } catch (e) {
-                        console.error("Error parsing raw data blob:", e);
-                    }
-                }
-
-                return {
-                    date: new Date(session.timestamp).toLocaleDateString(),
-                    fullDate: new Date(session.timestamp).toLocaleString(),
-                    max_angle_esq: session.max_angle_esq,
-                    max_angle_dir: session.max_angle_dir,
-                    avg_emg_esq: avgEmgEsq,
-                    avg_emg_dir: avgEmgDir,
-                    avg_ecg_esq: avgEcgEsq,
-                    avg_ecg_dir: avgEcgDir
-                };
-            });
+            // Format data for chart (summary values are computed by the backend)
+            const formattedData = data.map(session => ({
+                date: new Date(session.timestamp).toLocaleDateString(),
+                fullDate: new Date(session.timestamp).toLocaleString(),
+                max_angle_esq: session.max_angle_esq,
+                max_angle_dir: session.max_angle_dir,
+                avg_emg_esq: session.mean_emg_esq ?? session.avg_emg_esq,
+                avg_emg_dir: session.mean_emg_dir ?? session.avg_emg_dir,
+                avg_ecg_esq: session.mean_ecg_esq ?? 0,
+                avg_ecg_dir: session.mean_ecg_dir ?? 0
+            }));
             setHistory(formattedData);
         } catch (err) {
             console.error("Error fetching history:", err);
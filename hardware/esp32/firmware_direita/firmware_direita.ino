@@ -1,7 +1,7 @@
 /*
  * FIRMWARE PERNA DIREITA (Wi-Fi UDP)
  * ID: DIR
- * Envia: ID, ANGULO, EMG, ECG
+ * Envia: ID, ANGULO, EMG, ECG, SEQ, TEMPO_US
  */
 #include <WiFi.h>
 #include <WiFiUdp.h>
@@ -16,6 +16,8 @@ const char* password = "thomazqw";
 const char* host_ip = "172.20.10.7";  
 const int udp_port = 4210; 
 
+// Com várias estações, use um ID único por placa (ex: "DIR2", até 4 caracteres)
+// e registre-o no backend: PUT /devices/{ID} {"station": "...", "leg": "DIR"}
 const char* ID_DISPOSITIVO = "DIR"; 
 WiFiUDP udp;
 
@@ -30,6 +32,7 @@ Adafruit_MPU6050 mpuCoxa;
 
 float pitchQuadril = 0, pitchCoxa = 0;
 unsigned long last_time;
+uint32_t seq = 0; // Contador de pacotes: o backend detecta perdas e reordenação
 const float COMPL_FILTER_ALPHA = 0.98;
 
 void setup() {
@@ -58,6 +61,7 @@ void setup() {
 }
 
 void loop() {
+    uint32_t sample_us = micros(); // Instante da amostra no relógio do ESP32
     unsigned long current_time = millis();
     float delta_time = (current_time - last_time) / 1000.0;
     last_time = current_time;
@@ -75,9 +79,10 @@ void loop() {
     int ecg_val = analogRead(ECG_PIN);
     float final_angle = fabs(pitchQuadril - pitchCoxa); 
 
-    char buffer_dados[64];
-    // Formato CSV simples: ESQ,ANGULO,EMG,ECG
-    sprintf(buffer_dados, "%s,%.2f,%d,%d", ID_DISPOSITIVO, final_angle, emg_val, ecg_val);
+    char buffer_dados[80];
+    // Formato CSV: ESQ,ANGULO,EMG,ECG,SEQ,TEMPO_US (o backend também aceita só os 4 primeiros)
+    sprintf(buffer_dados, "%s,%.2f,%d,%d,%lu,%lu", ID_DISPOSITIVO, final_angle, emg_val, ecg_val,
+            (unsigned long)seq++, (unsigned long)sample_us);
 
     udp.beginPacket(host_ip, udp_port);
     udp.print(buffer_dados); 